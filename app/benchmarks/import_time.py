@@ -0,0 +1,71 @@
+"""
+Cold-start import benchmark.
+
+Runs a fresh interpreter with ``-X importtime`` on the startup imports and
+prints the slowest modules. Exits with status 1 if the total import time is
+over the budget, so it can be used as a regression check.
+
+Usage (from the app directory):
+    python benchmarks/import_time.py [--budget-ms 1500] [--top 15] [--load-sensors]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_importtime(statement: str) -> list:
+    """
+    Import ``statement`` in a fresh interpreter and parse the importtime report.
+
+    Returns:
+        list: (self_us, cumulative_us, module) tuples, one per imported module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        entries.append((int(self_us), int(cumulative_us), module.rstrip()))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Maximum allowed total import time")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to show")
+    parser.add_argument("--load-sensors", action="store_true",
+                        help="Also import the drivers of all enabled sensors")
+    args = parser.parse_args()
+
+    statement = "import sensors.read_sensors as r"
+    if args.load_sensors:
+        statement += "; r.load_sensors()"
+
+    entries = run_importtime(statement)
+    # Top-level imports are the ones without leading indentation in the module column
+    total_us = sum(cumulative for _, cumulative, module in entries if not module.startswith("  "))
+
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, module in sorted(entries, key=lambda e: e[0], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {module.strip()}")
+    print(f"\nTotal: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if total_us / 1000 > args.budget_ms:
+        print("Import time budget exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
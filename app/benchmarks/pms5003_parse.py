@@ -0,0 +1,180 @@
+"""
+PMS5003 frame parsing microbenchmark.
+
+Feeds a recorded (or generated) PMS5003 byte stream through the buffered
+frame reader in sensors/libs/PMS5003.py and through the previous
+byte-at-a-time reader, and reports frames per second for both.
+
+The "pty" source streams through a pseudo-terminal opened with pyserial,
+so every read pays the real select/read system call cost as on the UART;
+this is the comparison that matters on the station. The "memory" source
+serves the stream from memory, which measures parsing CPU only and makes
+the baseline's one-byte reads look free. Both run by default.
+
+Usage (from the app directory):
+    python benchmarks/pms5003_parse.py [--stream recording.bin] [--frames 20000] [--record out.bin]
+                                       [--source both|pty|memory]
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sensors.libs.PMS5003 import (  # noqa: E402
+    PMS5003, PMS5003Data, PMS5003_SOF, ChecksumMismatchError, SerialTimeoutError
+)
+from sensors.libs.fake_devices import pms5003_frame  # noqa: E402
+
+
+class StreamSerial:
+    """Serves a byte stream like a UART, with up to `fifo` bytes waiting at a time."""
+
+    def __init__(self, stream: bytes, fifo: int = 64):
+        self.stream = stream
+        self.position = 0
+        self.fifo = fifo
+
+    @property
+    def in_waiting(self) -> int:
+        return min(self.fifo, len(self.stream) - self.position)
+
+    def read(self, size: int = 1) -> bytes:
+        chunk = self.stream[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+    def flushInput(self):
+        pass
+
+
+def pty_serial(stream: bytes):
+    """Open a pyserial port on a pseudo-terminal fed with the stream by a writer thread."""
+    import serial
+    import tty
+
+    master, slave = os.openpty()
+    tty.setraw(master)
+    port = serial.Serial(os.ttyname(slave), 9600, timeout=1)
+
+    def feed():
+        view = memoryview(stream)
+        while view:
+            written = os.write(master, view[:4096])
+            view = view[written:]
+
+    threading.Thread(target=feed, daemon=True).start()
+    return port
+
+
+def generate_stream(frames: int, seed: int = 1) -> bytes:
+    """Frames with realistic values and occasional line noise between them."""
+    rng = random.Random(seed)
+    out = bytearray()
+    for _ in range(frames):
+        values = [rng.randint(0, 500) for _ in range(12)]
+        out += pms5003_frame(values)
+        if rng.random() < 0.05:
+            out += bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 8)))
+    return bytes(out)
+
+
+def legacy_read(serial) -> PMS5003Data:
+    """The previous byte-at-a-time reader, kept here as the baseline."""
+    sof_index = 0
+    while True:
+        sof = serial.read(1)
+        if len(sof) == 0:
+            raise EOFError
+        sof = ord(sof)
+        if sof == PMS5003_SOF[sof_index]:
+            if sof_index == 0:
+                sof_index = 1
+            elif sof_index == 1:
+                break
+        else:
+            sof_index = 0
+
+    checksum = sum(PMS5003_SOF)
+    data_length_bytes = bytearray(serial.read(2))
+    checksum += sum(data_length_bytes)
+    frame_length = struct.unpack(">H", data_length_bytes)[0]
+    raw_data = bytearray(serial.read(frame_length))
+    if len(raw_data) != frame_length:
+        raise EOFError
+    data = PMS5003Data(raw_data)
+    checksum += sum(raw_data[:-2])
+    if checksum != data.checksum:
+        raise ChecksumMismatchError("checksum")
+    return data
+
+
+def run(name: str, read_frame, limit: int = None) -> int:
+    frames = errors = 0
+    start = time.perf_counter()
+    while limit is None or frames + errors < limit:
+        try:
+            read_frame()
+            frames += 1
+        except (EOFError, SerialTimeoutError):
+            break
+        except (ChecksumMismatchError, struct.error):
+            errors += 1
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {frames:8d} frames {errors:4d} errors {elapsed * 1000:9.1f} ms "
+          f"{frames / elapsed:12.0f} frames/s")
+    return frames + errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stream", help="Recorded PMS5003 byte stream to replay")
+    parser.add_argument("--frames", type=int, default=20000, help="Frames to generate without --stream")
+    parser.add_argument("--record", help="Save the generated stream to this file")
+    parser.add_argument("--source", choices=("both", "pty", "memory"), default="both",
+                        help="Read through a pseudo-terminal with pyserial, from memory, or both")
+    args = parser.parse_args()
+
+    if args.stream:
+        with open(args.stream, "rb") as f:
+            stream = f.read()
+    else:
+        stream = generate_stream(args.frames)
+        if args.record:
+            with open(args.record, "wb") as f:
+                f.write(stream)
+    print(f"Stream: {len(stream)} bytes")
+
+    # Parser only: skip setup(), which opens the real port and GPIO
+    sensor = PMS5003.__new__(PMS5003)
+    sensor._buffer = bytearray()
+
+    if args.source in ("both", "pty"):
+        print("Through a pty (system call cost per read, as on the UART):")
+        # Count the frames first so the pty runs stop without waiting for a read timeout
+        sensor._serial = StreamSerial(stream)
+        total = run("(count)", sensor.read)
+
+        legacy_serial = pty_serial(stream)
+        run("legacy", lambda: legacy_read(legacy_serial), total)
+
+        sensor._buffer.clear()
+        sensor._serial = pty_serial(stream)
+        run("buffered", sensor.read, total)
+
+    if args.source in ("both", "memory"):
+        print("From memory (parsing CPU only):")
+        legacy_serial = StreamSerial(stream)
+        run("legacy", lambda: legacy_read(legacy_serial))
+
+        sensor._buffer.clear()
+        sensor._serial = StreamSerial(stream)
+        run("buffered", sensor.read)
+
+
+if __name__ == "__main__":
+    main()
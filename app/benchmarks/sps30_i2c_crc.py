@@ -0,0 +1,91 @@
+"""
+SPS30 I2C CRC and measurement parsing microbenchmark.
+
+Times CRC validation and parsing of a 60-byte measurement response in
+sensors/libs/SPS30_I2C.py against the previous bit-by-bit / hex-string
+implementation. The CRC known answers are tested in tests/test_sps30_i2c.py.
+
+Usage (from the app directory):
+    python benchmarks/sps30_i2c_crc.py [--iterations 20000]
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sensors.libs import SPS30_I2C  # noqa: E402
+from sensors.libs.fake_devices import sensirion_crc8, sensirion_words  # noqa: E402
+
+VALUES = (8.5, 11.9, 13.1, 15.4, 52.6, 63.1, 65.8, 66.3, 66.8, 0.55)
+
+
+def legacy_calculate_crc(input):
+    crc = 0xFF
+    for i in range(0, 2):
+        crc = crc ^ input[i]
+        for j in range(8, 0, -1):
+            if crc & 0x80:
+                crc = (crc << 1) ^ 0x31
+            else:
+                crc = crc << 1
+    return crc & 0xFF
+
+
+def legacy_parse(result):
+    """The previous read_measured_values path: CRC of every word, then floats via hex strings."""
+    crc_result = False
+    for i in range(2, len(result), 3):
+        crc_result = result[i] == legacy_calculate_crc([result[i - 2], result[i - 1]])
+
+    values = []
+    for i in range(4, len(result), 6):
+        value = result[i] + result[i - 1] * pow(2, 8) + result[i - 3] * pow(2, 16) + result[i - 4] * pow(2, 24)
+        values.append(struct.unpack('>f', bytes.fromhex(str(hex(value)).replace("0x", "")))[0])
+    return crc_result, values
+
+
+def new_parse(sensor, result):
+    if not SPS30_I2C.checkCRC(result):
+        return False, None
+    sensor.parse_sensor_values(SPS30_I2C.strip_crc(result))
+    return True, list(sensor.dict_values.values())
+
+
+def check_equivalence():
+    """Both implementations must agree before their timings mean anything (correctness: tests/test_sps30_i2c.py)."""
+    response = sensirion_words(struct.pack('>10f', *VALUES))
+    sensor = SPS30_I2C.SPS30.__new__(SPS30_I2C.SPS30)
+    sensor.dict_values = dict.fromkeys(SPS30_I2C.SPS30.VALUE_KEYS)
+    ok, values = new_parse(sensor, response)
+    if not ok or values != legacy_parse(list(response))[1]:
+        raise RuntimeError("New parser disagrees with the legacy implementation")
+    return sensor, response
+
+
+def timed(name, func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<16} {elapsed * 1e6 / iterations:8.2f} us/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    sensor, response = check_equivalence()
+    as_list = list(response)
+
+    timed("legacy crc", lambda: legacy_calculate_crc(b'\xbe\xef'), args.iterations)
+    timed("table crc", lambda: SPS30_I2C.calculateCRC(b'\xbe\xef'), args.iterations)
+    timed("legacy parse", lambda: legacy_parse(as_list), args.iterations)
+    timed("struct parse", lambda: new_parse(sensor, response), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
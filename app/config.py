@@ -9,6 +9,65 @@ MQTT_BROKER_ENDPOINT = os.getenv('MQTT_BROKER_ENDPOINT', '')
 MQTT_TOPIC = os.getenv('MQTT_TOPIC', '')
 DEVICE_ID = os.getenv('DEVICE_ID', '')
 
+# Driver backend: "hardware" talks to the real devices, "fake" swaps in
+# deterministic simulated drivers so the station runs on a normal Linux box
+BACKEND = os.getenv('CLIMATENET_BACKEND', 'hardware')
+
+FAKE_BACKEND = {
+    "seed": int(os.getenv('CLIMATENET_FAKE_SEED', 42)),
+    # Seconds added to every simulated device transaction
+    "latency": float(os.getenv('CLIMATENET_FAKE_LATENCY', 0)),
+    # Probability (0-1) that a simulated device transaction raises OSError
+    "failure_rate": float(os.getenv('CLIMATENET_FAKE_FAILURE_RATE', 0)),
+    # Device behind the air quality UART: "pms5003" or "sps30"
+    "air_quality": os.getenv('CLIMATENET_FAKE_AIR_QUALITY', 'sps30'),
+    # File with recorded serial bytes, replayed instead of simulated frames
+    "serial_replay": os.getenv('CLIMATENET_FAKE_SERIAL_REPLAY', ''),
+    "wind_pulse_hz": 3.0,
+    "rain_tip_interval": 120,
+    # Seconds the simulated DS3231 is ahead of the system clock
+    "rtc_offset": 0
+}
+
+LOGGING = {
+    "level": os.getenv('CLIMATENET_LOG_LEVEL', 'INFO'),
+    "file": "parsing.log",
+    # The log is rotated and gzipped at max_bytes; the oldest rotations are
+    # deleted to keep the log and its rotations within disk_budget
+    "max_bytes": 2 * 1024 * 1024,
+    "disk_budget": 20 * 1024 * 1024,
+    # Records are kept in RAM and written in one append when the buffer fills,
+    # every flush_interval seconds, at flush_level or above, and on shutdown
+    "buffer_bytes": 64 * 1024,
+    "flush_interval": 60,
+    "flush_level": "ERROR",
+    # An identical message at one of repeat_levels is written at most once per
+    # this many seconds, followed by a "(repeated N times)" note when it next
+    # gets through. Records with a traceback are never dropped
+    "repeat_interval": 600,
+    "repeat_levels": ["WARNING"]
+}
+
+METRICS = {
+    # Prometheus text exporter: Unix socket path if set, else HTTP on bind:port (port 0 disables)
+    "unix_socket": os.getenv('CLIMATENET_METRICS_SOCKET', ''),
+    "bind": "127.0.0.1",
+    "port": int(os.getenv('CLIMATENET_METRICS_PORT', 0)),
+    # Attach a compact metrics summary to every data packet
+    "packet_summary": False
+}
+
+PROFILING = {
+    # Cycles to profile right after startup (0: only on SIGUSR1)
+    "cycles": int(os.getenv('CLIMATENET_PROFILE_CYCLES', 0)),
+    # Cycles profiled per SIGUSR1
+    "signal_cycles": 3,
+    "directory": os.getenv('CLIMATENET_PROFILE_DIR', 'profiles'),
+    # Allocation diff lines written per cycle and traceback depth kept by tracemalloc
+    "top": 25,
+    "frames": 10
+}
+
 SSID = ""
 PASSWORD = ""
 # It is recommended to set the value > than
@@ -20,10 +79,54 @@ TRANSMISSION_INTERVAL = 900
 MEASURING_TIME = 300
 READING_TIME = 30
 
+# Maximum time in seconds a single sensor may take to initialize at startup
+SENSOR_INIT_TIMEOUT = 20
+
+# A sensor is skipped after `failure_threshold` consecutive failed readings and
+# re-probed in the background, backing off from `probe_backoff_min` to
+# `probe_backoff_max` seconds between probes
+SENSOR_HEALTH = {
+    "failure_threshold": 3,
+    "probe_backoff_min": 60,
+    "probe_backoff_max": 1800
+}
+
+# Sensor probe results (air quality mode, BME280 calibration, wind direction
+# table) reused at the next boot while the board and sensor config are unchanged
+PROBE_CACHE = {
+    "enabled": True,
+    "file": os.getenv('CLIMATENET_PROBE_CACHE', 'probe_cache.json')
+}
+
+# DS3231 real-time clock
+RTC = {
+    "port": 1,
+    # Seconds between RTC offset measurements and system clock trust checks
+    "check_interval": 3600,
+    # Seconds to wait for NTP synchronization after enabling it
+    "ntp_timeout": 15
+}
+
 SENSORS = {
     "ltr390": {
         "working": True,
-        "address": 0x53
+        "port": 1,
+        "address": 0x53,
+        # "api": UV index from the Open-Meteo forecast, "sensor": computed from the UVS channel
+        "uv_source": "api",
+        # Lux (ALS) gain and resolution; 3x / 16-bit keeps full daylight in range
+        "gain": 3,          # 1, 3, 6, 9 or 18
+        "resolution": 16,   # bits: 13, 16, 17, 18, 19 or 20
+        # Switched to for each UVS reading when uv_source is "sensor"
+        "uv_gain": 18,
+        "uv_resolution": 20,
+        # Multiplier applied to the UV index computed from raw counts (window factor, calibration)
+        "uv_calibration": 1.0,
+        # Location of the hourly UV index forecast
+        "latitude": 40.18,
+        "longitude": 44.51,
+        "uv_cache_file": "uv_forecast.json",
+        "uv_cache_ttl": 3 * 3600
     },
     "bme280": {
         "working": True,
@@ -37,7 +140,21 @@ SENSORS = {
         "pin_enable": 22,
         "pin_enable_working": False,
         "pin_reset": 27,
-        "pin_reset_working": False
+        "pin_reset_working": False,
+        # Seconds to listen for a frame when identifying the device on the port
+        # (active mode sends one every 0.2-2.3 s)
+        "detect_timeout": 2.5,
+        # "active": sensor streams a frame per second, "passive": frames are requested
+        "mode": "active",
+        "passive_interval": 1,
+        # Reported value per reading: "mean" of the frames since the last reading or "latest"
+        "window": "mean",
+        "ring_size": 64,
+        # Sleep between measurement periods (enable pin if wired, else sleep command)
+        "sleep_between_windows": False,
+        "warmup": 30,
+        # Also report particle counts per 0.1 L (0.3-10 um)
+        "report_counts": False
     },
     "sps30": {
         "warmup": 30,
@@ -57,17 +174,36 @@ SENSORS = {
         "pin": 5,
         "speed_coefficient": 2.4,
         "interval_sec": 30,
+        # Gust is the highest running mean over this many seconds (WMO: 3 s)
+        "gust_seconds": 3,
+        # Pulse timestamps kept between readings, enough for READING_TIME at storm speeds
+        "pulse_buffer": 8192,
     },
     "direction": {
         "working": True,
         "adc_channel": 0,
         "adc_max": 1024,
         "adc_vref": 5.12,
-        "tolerance": 0.1
+        "tolerance": 0.1,
+        # Background ADC samples per second while measuring
+        "sample_rate_hz": 2
     },
     "rain": {
         "working": True,
         "pin": 6,
-        "bucket_size": 0.2794
+        "bucket_size": 0.2794,
+        # Memory-mapped tip counter, survives restarts
+        "state_file": "rain_state.bin",
+        # Tip timestamps kept between transmissions
+        "tip_buffer": 4096
     }
-}
\ No newline at end of file
+}
+
+# Overrides from a JSON file with the same structure, e.g. {"READING_TIME": 20,
+# "SENSORS": {"bme280": {"working": false}}}. Validated against the defaults
+# above; reloaded on SIGHUP (see utils/config_loader.py).
+CONFIG_FILE = os.getenv('CLIMATENET_CONFIG', 'config.json')
+
+from utils.config_loader import apply_config_file  # noqa: E402
+
+apply_config_file(globals(), CONFIG_FILE)
@@ -1,16 +1,34 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueListener
 
-# Set up rotating file handler for logging
-handler = RotatingFileHandler(
-    filename='parsing.log',
-    maxBytes=10 * 1024 * 1024,  # 10 MB
-    backupCount=5
+from config import LOGGING
+from utils.log_handlers import BufferedRotatingFileHandler, LazyQueueHandler, RateLimitFilter
+
+# Batched file handler: records are buffered in RAM to spare the SD card
+handler = BufferedRotatingFileHandler(
+    filename=LOGGING["file"],
+    max_bytes=LOGGING["max_bytes"],
+    disk_budget=LOGGING["disk_budget"],
+    buffer_bytes=LOGGING["buffer_bytes"],
+    flush_interval=LOGGING["flush_interval"],
+    flush_level=logging.getLevelName(LOGGING["flush_level"])
 )
 
 formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 handler.setFormatter(formatter)
+handler.addFilter(RateLimitFilter(LOGGING["repeat_interval"],
+                                  levels=[logging.getLevelName(level) for level in LOGGING["repeat_levels"]]))
+
+# Callers only enqueue records; filtering, formatting and file writes happen in the listener thread
+log_queue = queue.SimpleQueue()
+listener = QueueListener(log_queue, handler, respect_handler_level=True)
+listener.start()
+# atexit runs these last-registered first: drain the queue, then write out the buffer
+atexit.register(handler.close)
+atexit.register(listener.stop)
 
 # Set logging level and add handler to root logger
-logging.getLogger().setLevel(logging.INFO)
-logging.getLogger().addHandler(handler)
\ No newline at end of file
+logging.getLogger().setLevel(LOGGING["level"])
+logging.getLogger().addHandler(LazyQueueHandler(log_queue))
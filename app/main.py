@@ -1,23 +1,85 @@
 import time
 import datetime
-from config import TRANSMISSION_INTERVAL, MEASURING_TIME
+import signal
+import config
+from config import PROFILING
 from logger_config import logging
 from utils.rtc import RTCControl
 from utils.network import check_internet, reconnect
-from utils.mqtt import MQTTClient, DEVICE_ID
+from utils.mqtt import MQTTClient
 from utils.data_storage import DataStorage
 from utils.scheduler import calculate_next_transmission, calculate_measurement_start
 from utils.sensor_manager import SensorManager
+from utils.metrics import start_exporter
+from utils.profiling import CycleProfiler
+from utils.config_loader import ConfigReloader
 import warnings
 
 
+def handle_sigterm(signum, frame):
+    # Stop like on Ctrl+C so sensors are cleaned up and buffered logs are written at exit
+    raise KeyboardInterrupt
+
+
+# Settings the cycle schedule is computed from
+SCHEDULE_SETTINGS = ("TRANSMISSION_INTERVAL", "MEASURING_TIME", "READING_TIME")
+MQTT_SETTINGS = ("MQTT_BROKER_ENDPOINT", "MQTT_TOPIC", "DEVICE_ID")
+
+
+def apply_config_changes(changes, sensor_manager, mqtt_client):
+    """Apply a config reload to the running station; returns the MQTT client to use."""
+    sensor_manager.apply_config_changes(changes)
+
+    if "LOGGING.level" in changes:
+        logging.getLogger().setLevel(config.LOGGING["level"])
+
+    if mqtt_client is not None and any(change in MQTT_SETTINGS for change in changes):
+        # Reconnected with the new settings at the next transmission
+        mqtt_client.close()
+        mqtt_client = None
+
+    return mqtt_client
+
+
+def send_stored_data(data_storage, mqtt_client, rtc):
+    """
+    Send the stored backlog. Records saved under an untrusted clock are
+    corrected first if the clock is trusted by now; an untrusted clock is
+    re-checked in the background, whose sync listener corrects them once it is.
+    """
+    if rtc is not None:
+        if rtc.trusted:
+            data_storage.correct_timestamps()
+        else:
+            rtc.check_async()
+    return data_storage.send_stored_data(mqtt_client)
+
+
 def main():
     """Main execution loop"""
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    # `kill -HUP` reloads the config file; applied between cycles and while waiting for one
+    config_reloader = ConfigReloader()
+    signal.signal(signal.SIGHUP, config_reloader.signal_handler)
+
+    # Opt-in profiling: CLIMATENET_PROFILE_CYCLES at startup, or `kill -USR1` at any time
+    profiler = CycleProfiler(PROFILING["directory"], PROFILING["top"], PROFILING["frames"])
+    profiler.request(PROFILING["cycles"])
+    signal.signal(signal.SIGUSR1, profiler.signal_handler(PROFILING["signal_cycles"]))
     logging.info("=== Starting ClimateNet Station ===")
+    start_exporter()
 
-    # Initialize RTC
+    # Local storage first, so its timestamps can be corrected when NTP syncs the clock
+    data_storage = DataStorage()
+
+    # Initialize RTC. The schedule and packet times come from its clock, whose
+    # calls also run the periodic drift check, RTC write-back and NTP retry
+    rtc = None
+    clock = datetime.datetime.now
     try:
         rtc = RTCControl()
+        rtc.add_sync_listener(data_storage.correct_timestamps)
 
         if check_internet():
             if not rtc.sync_from_ntp():
@@ -28,20 +90,21 @@ def main():
             rtc.sync_system_from_rtc()
 
         current_time = rtc.get_time()
+        clock = rtc.get_time
+        data_storage.clock = clock  # Stored records keep the reference of the clock that stamps them
 
     except Exception as e:
         logging.error(f"RTC init failed: {e}")
         current_time = datetime.datetime.now()
 
     # Initialize sensors
-    sensor_manager = SensorManager()
-    data_storage = DataStorage()
+    sensor_manager = SensorManager(clock=clock)
 
     # Initialize MQTT client
     mqtt_client = None
     if check_internet():
         try:
-            mqtt_client = MQTTClient(DEVICE_ID)
+            mqtt_client = MQTTClient(config.DEVICE_ID)
             logging.info("MQTT connected")
         except Exception as e:
             logging.error(f"MQTT connection failed: {e}")
@@ -54,13 +117,18 @@ def main():
     mqtt_working = False
 
     while True:
+        profiler.next_cycle()
         try:
-            next_transmission = calculate_next_transmission(TRANSMISSION_INTERVAL)
-            measurement_start = calculate_measurement_start(next_transmission, MEASURING_TIME)
+            changes = config_reloader.apply_pending()
+            if changes:
+                mqtt_client = apply_config_changes(changes, sensor_manager, mqtt_client)
+
+            next_transmission = calculate_next_transmission(config.TRANSMISSION_INTERVAL, clock())
+            measurement_start = calculate_measurement_start(next_transmission, config.MEASURING_TIME, clock())
 
             if measurement_start >= next_transmission:
                 logging.warning(f"Skipping cycle, next: {next_transmission.strftime('%Y-%m-%d %H:%M:%S')}")
-                while datetime.datetime.now() < next_transmission:
+                while clock() < next_transmission:
                     time.sleep(1)
                 continue
 
@@ -68,30 +136,44 @@ def main():
 
             # Wait until measurement start time
             last_stored_data_attempt = 0
-            while datetime.datetime.now() < measurement_start:
+            while clock() < measurement_start:
+                changes = config_reloader.apply_pending()
+                if changes:
+                    mqtt_client = apply_config_changes(changes, sensor_manager, mqtt_client)
+                    if any(change in SCHEDULE_SETTINGS for change in changes):
+                        logging.info("Schedule settings changed, recalculating the next cycle")
+                        break
+
+                # Start sensors with a warmup (SPS30) so they are ready at measurement_start
+                sensor_manager.prepare_sensors(measurement_start)
                 if check_internet() and mqtt_client and mqtt_working and time.time() - last_stored_data_attempt > 60:
-                    sent_count = data_storage.send_stored_data(mqtt_client)
+                    sent_count = send_stored_data(data_storage, mqtt_client, rtc)
                     if sent_count > 0:
                         logging.info(f"✓ Sent {sent_count} stored records")
                     last_stored_data_attempt = time.time()
                 time.sleep(1)
 
+            if clock() < measurement_start:
+                continue  # Rescheduled by a config reload
+
             # Start measurements
             logging.info("+" * 15 + " Starting measurement period...")
             sensor_manager.start_measurement_period(measurement_start, next_transmission)
 
             # Wait until transmission time
-            while datetime.datetime.now() < next_transmission:
+            while clock() < next_transmission:
                 time.sleep(0.1)
+            transmission_start = time.time()
+            clock_skew = clock().timestamp() - transmission_start
 
             # Prepare and send data
             data_packet = sensor_manager.get_averaged_data(next_transmission)
 
             if check_internet():
                 if mqtt_client is None:
-                    mqtt_client = MQTTClient(DEVICE_ID)
+                    mqtt_client = MQTTClient(config.DEVICE_ID)
 
-                stored_count = data_storage.send_stored_data(mqtt_client)
+                stored_count = send_stored_data(data_storage, mqtt_client, rtc)
                 if stored_count > 0:
                     logging.info(f"✓ Sent {stored_count} stored records")
 
@@ -109,13 +191,13 @@ def main():
                     logging.warning("✗ MQTT failed, saving locally")
                     mqtt_working = False
                     data_storage.save_locally(data_packet)
-                    logging.info(data_packet)
+                    logging.debug("Data packet: %s", data_packet)
             else:
                 if reconnect():
                     if mqtt_client is None:
-                        mqtt_client = MQTTClient(DEVICE_ID)
+                        mqtt_client = MQTTClient(config.DEVICE_ID)
 
-                    stored_count = data_storage.send_stored_data(mqtt_client)
+                    stored_count = send_stored_data(data_storage, mqtt_client, rtc)
                     if stored_count > 0:
                         logging.info(f"✓ Sent {stored_count} stored records")
 
@@ -133,14 +215,18 @@ def main():
                         logging.warning("✗ Still no connection, saving locally")
                         mqtt_working = False
                         data_storage.save_locally(data_packet)
-                        logging.info(data_packet)
+                        logging.debug("Data packet: %s", data_packet)
                 else:
                     logging.warning("✗ No internet, saving locally")
                     mqtt_working = False
                     data_storage.save_locally(data_packet)
-                    logging.info(data_packet)
+                    logging.debug("Data packet: %s", data_packet)
                     mqtt_client = None
 
+            sensor_manager.schedule.record_transmission(next_transmission.timestamp() - clock_skew, transmission_start,
+                                                        time.time())
+            sensor_manager.schedule.log_report()
+
         except KeyboardInterrupt:
             sensor_manager.cleanup()
             break
@@ -1,44 +1,171 @@
 import time
 from config import SENSORS
 from logger_config import logging
-from .libs.SPS30_I2C import SPS30 as SPS30I2C
-from .libs.SPS30_UART import SPS30 as SPS30UART
-from .libs.PMS5003 import PMS5003
+from .read_sensors import NOT_READY
+from utils.probe_cache import probe_cache
 
 
 class AirQualitySensor:
     """
     Unified class for SPS30 (UART/I2C) and PMS5003.
-    Selects automatically based on config and fallback.
+    Selects automatically based on config: the device on a configured UART
+    is identified in one listening pass per baud rate, then SPS30 over I2C.
+
+    The detected mode and device serial are kept in the probe cache; the
+    next boot sets up that mode directly and only falls back to the full
+    probe if the device no longer answers with the same serial.
     """
 
+    PMS_COUNT_KEYS = ("pc0_3", "pc0_5", "pc1_0", "pc2_5", "pc5_0", "pc10")
+
     def __init__(self):
         self.sensor = None
         self.mode = None      # sps30_i2c / sps30_uart / pms5003
         self.is_started = False
+        self.ready_at = None  # time.monotonic() deadline after which readings are valid
+        self.pms_reader = None
+        self._window_start = 0.0
+        self.device_serial = None
+        self.article_code = None
 
         self.conf_pms = SENSORS["pms5003"]
         self.conf_sps = SENSORS["sps30"]
+        probe_conf = {"pms5003": self.conf_pms, "sps30": self.conf_sps}
 
-        # Try PMS5003 first if enabled
-        if self.conf_pms["working"]:
-            if self._setup_pms():
-                logging.info("[AirQuality] Using PMS5003")
+        cached = probe_cache.get("airQuality", probe_conf)
+        if cached is not None:
+            if self._setup_cached(cached):
+                logging.info(f"[AirQuality] Using {self.mode} (cached probe)")
                 return
+            logging.info("[AirQuality] Cached probe no longer matches, probing all sensors")
+            probe_cache.invalidate("airQuality")
+
+        uart_mode = self._detect_uart()
+        if uart_mode == "pms5003" and self._setup_pms():
+            logging.info("[AirQuality] Using PMS5003")
+        elif uart_mode == "sps30_uart" and self._setup_sps_uart(self.conf_sps["uart"]):
+            logging.info("[AirQuality] Using SPS30")
+        elif self.conf_sps["i2c"]["working"] and self._setup_sps_i2c(self.conf_sps["i2c"]):
+            logging.info("[AirQuality] Using SPS30")
+        elif uart_mode is None and self.conf_pms["working"] and self._setup_pms():
+            # Not cached: nothing confirmed a PMS5003 is there
+            logging.warning("[AirQuality] No frame from the PMS5003 while probing, using it as configured")
+            return
+        else:
+            logging.error("[AirQuality] No air quality sensor available")
+            return
 
-        # If PMS disabled or not working → try SPS30
-        if self.conf_sps["uart"]["working"] or self.conf_sps["i2c"]["working"]:
-            if self._setup_sps():
-                logging.info("[AirQuality] Using SPS30")
-                return
+        self._cache_probe(probe_conf)
+
+    def _detect_uart(self):
+        """Mode of the enabled sensor answering on its configured UART, or None."""
+        from .libs import uart_detect
+
+        # port -> [(baudrate, listening window)], and the mode each device maps to if enabled
+        candidates = {}
+        modes = {}
+        if self.conf_pms["working"]:
+            self._wake_pms()
+            candidates.setdefault(self.conf_pms["address"], []).append(
+                (self.conf_pms["baudrate"], self.conf_pms["detect_timeout"]))
+            modes["pms5003"] = "pms5003"
+        conf_uart = self.conf_sps["uart"]
+        if conf_uart["working"]:
+            candidates.setdefault(conf_uart["address"], []).append((conf_uart["baudrate"], conf_uart["timeout"]))
+            modes["sps30"] = "sps30_uart"
+
+        for port, port_candidates in candidates.items():
+            start = time.monotonic()
+            try:
+                result = uart_detect.detect(port, port_candidates)
+            except Exception as e:
+                logging.error(f"[AirQuality] Detection on {port} failed: {e}")
+                continue
+
+            elapsed_ms = (time.monotonic() - start) * 1000
+            if result is None:
+                logging.warning(f"[AirQuality] No sensor answered on {port} ({elapsed_ms:.0f} ms)")
+                continue
+
+            logging.info(f"[AirQuality] Detected {result['device']} on {port} at {result['baudrate']} baud "
+                         f"({elapsed_ms:.0f} ms)")
+            mode = modes.get(result["device"])
+            if mode is None:
+                logging.warning(f"[AirQuality] {result['device']} is disabled in config")
+            return mode
+        return None
+
+    def _setup_cached(self, cached):
+        """Set up the cached mode only, checking that the device serial still matches."""
+        mode = cached.get("mode")
+        if mode == "pms5003":
+            # PMS5003 setup does not check that a device answers; listen for a frame first
+            ready = self._pms_answers() and self._setup_pms()
+        elif mode == "sps30_uart":
+            ready = self._setup_sps_uart(self.conf_sps["uart"], cached.get("serial"))
+        elif mode == "sps30_i2c":
+            ready = self._setup_sps_i2c(self.conf_sps["i2c"], cached.get("serial"))
+        else:
+            ready = False
+
+        if ready and self.article_code is None:
+            self.article_code = cached.get("article_code")
+        return ready
 
-        logging.error("[AirQuality] No air quality sensor available")
+    def _wake_pms(self):
+        """Drive the PMS5003 enable and reset pins high if wired; a PMS5003 left asleep by its pin sends nothing."""
+        from .libs import drivers
+
+        conf = self.conf_pms
+        pins = [conf[pin] for pin in ("pin_enable", "pin_reset") if conf[f"{pin}_working"]]
+        if not pins:
+            return  # A PMS5003 put to sleep by command is woken by the detection requests
+        try:
+            GPIO = drivers.gpio()
+            GPIO.setwarnings(False)
+            GPIO.setmode(GPIO.BCM)
+            for pin in pins:
+                GPIO.setup(pin, GPIO.OUT, initial=GPIO.HIGH)
+        except Exception as e:
+            logging.error(f"[PMS5003] Could not drive the enable pin before detection: {e}")
+
+    def _pms_answers(self):
+        from .libs import uart_detect
+
+        conf = self.conf_pms
+        self._wake_pms()
+        try:
+            result = uart_detect.detect(conf["address"], [(conf["baudrate"], conf["detect_timeout"])])
+        except Exception as e:
+            logging.error(f"[PMS5003] Detection on {conf['address']} failed: {e}")
+            return False
+        return result is not None and result["device"] == "pms5003"
+
+    def _cache_probe(self, probe_conf):
+        probe_cache.put("airQuality", probe_conf, {
+            "mode": self.mode,
+            "serial": self.device_serial,
+            "article_code": self.article_code
+        })
 
     def _setup_pms(self):
         try:
+            from .libs.PMS5003 import PMS5003, PMS5003Reader
+
+            conf = self.conf_pms
             self.sensor = PMS5003(
-                device=self.conf_pms["address"],
-                baudrate=self.conf_pms["baudrate"]
+                device=conf["address"],
+                baudrate=conf["baudrate"],
+                pin_enable=conf["pin_enable"],
+                pin_reset=conf["pin_reset"],
+                pin_enable_working=conf["pin_enable_working"],
+                pin_reset_working=conf["pin_reset_working"]
+            )
+            self.pms_reader = PMS5003Reader(
+                self.sensor,
+                ring_size=conf["ring_size"],
+                passive=conf["mode"] == "passive",
+                interval=conf["passive_interval"]
             )
             self.mode = "pms5003"
             return True
@@ -48,34 +175,32 @@ class AirQualitySensor:
             self.sensor = None
             return False
 
-    def _setup_sps(self):
-        conf = self.conf_sps
-
-        # Determine priority (default UART first)
-        if conf["i2c"]["working"] and not conf["uart"]["working"]:
-            priority = ["i2c"]
-        elif conf["uart"]["working"] and not conf["i2c"]["working"]:
-            priority = ["uart"]
-        else:
-            priority = ["uart", "i2c"]
-
-        for mode in priority:
-            if mode == "i2c" and self._setup_sps_i2c(conf["i2c"]):
-                return True
-            if mode == "uart" and self._setup_sps_uart(conf["uart"]):
-                return True
-
-        return False
+    @staticmethod
+    def _check_serial(serial, expected_serial):
+        if expected_serial is not None and serial != expected_serial:
+            raise RuntimeError(f"Serial {serial!r} does not match the cached {expected_serial!r}")
 
-    def _setup_sps_i2c(self, conf):
+    def _setup_sps_i2c(self, conf, expected_serial=None):
         try:
+            from .libs.SPS30_I2C import SPS30 as SPS30I2C
+
             sensor = SPS30I2C(conf["port"])
-            article_code = sensor.read_article_code()
-            if article_code == sensor.ARTICLE_CODE_ERROR:
+            # A known device is identified by its serial alone
+            if expected_serial is None:
+                article_code = sensor.read_article_code()
+                if article_code == sensor.ARTICLE_CODE_ERROR:
+                    raise RuntimeError("CRC ERROR on SPS30 I2C")
+                self.article_code = article_code.strip("\x00")
+
+            serial = sensor.read_device_serial()
+            if serial == sensor.SERIAL_NUMBER_ERROR:
                 raise RuntimeError("CRC ERROR on SPS30 I2C")
+            serial = serial.strip("\x00")
+            self._check_serial(serial, expected_serial)
 
             self.sensor = sensor
             self.mode = "sps30_i2c"
+            self.device_serial = serial
             return True
 
         except Exception as e:
@@ -83,23 +208,45 @@ class AirQualitySensor:
             self.sensor = None
             return False
 
-    def _setup_sps_uart(self, conf):
+    def _setup_sps_uart(self, conf, expected_serial=None):
+        sensor = None
         try:
+            from .libs.SPS30_UART import SPS30 as SPS30UART
+
             sensor = SPS30UART(conf["address"], conf["baudrate"], conf["timeout"])
+            # Also returns a fan left running by a crashed run to idle
             sensor.resetDevice()
-            if not sensor.readDeviceInfo():
+            info = sensor.readDeviceInfo()
+            if not info["Serial"]:
                 raise RuntimeError("No response from SPS30 UART")
+            self._check_serial(info["Serial"], expected_serial)
 
             self.sensor = sensor
             self.mode = "sps30_uart"
+            self.device_serial = info["Serial"]
+            self.article_code = info["Product Type"]
             return True
 
         except Exception as e:
             logging.error(f"[SPS30] UART init failed: {e}")
+            self._close_port(sensor)
             self.sensor = None
             return False
 
+    @property
+    def warmup_seconds(self) -> float:
+        """Seconds the sensor needs after start() before its readings are valid."""
+        if self.mode and self.mode.startswith("sps30"):
+            return self.conf_sps["warmup"]
+        if self.mode == "pms5003" and self.conf_pms["sleep_between_windows"]:
+            return self.conf_pms["warmup"]
+        return 0
+
+    def is_ready(self) -> bool:
+        return self.is_started and time.monotonic() >= self.ready_at
+
     def start(self):
+        """Start the fan without waiting for warmup; read_data returns NOT_READY until it is over."""
         if not self.sensor or self.is_started:
             return
 
@@ -112,26 +259,76 @@ class AirQualitySensor:
 
                 self.is_started = True
 
-                warmup = self.conf_sps["warmup"]
+                warmup = self.warmup_seconds
+                self.ready_at = time.monotonic() + warmup
                 logging.info(f"[SPS30] Warming up for {warmup}s...")
-                time.sleep(warmup)
 
             except Exception as e:
                 logging.error(f"[SPS30] Start failed: {e}")
                 self.is_started = False
 
+        elif self.mode == "pms5003":
+            try:
+                if self.conf_pms["sleep_between_windows"]:
+                    self._set_pms_asleep(False)
+                self.pms_reader.start()
+                self.is_started = True
+
+                warmup = self.warmup_seconds
+                self.ready_at = time.monotonic() + warmup
+                self._window_start = self.ready_at
+                if warmup:
+                    logging.info(f"[PMS5003] Warming up for {warmup}s...")
+
+            except Exception as e:
+                logging.error(f"[PMS5003] Start failed: {e}")
+                self.is_started = False
+
+    def _set_pms_asleep(self, asleep: bool):
+        """Sleep or wake the PMS5003 through the enable pin if wired, else by command."""
+        if self.conf_pms["pin_enable_working"]:
+            if asleep:
+                self.sensor.stop()
+            else:
+                self.sensor.enable()
+        else:
+            self.sensor.sleep(asleep)
+
+    def _read_pms(self, data):
+        """Fill data from the background reader's frames since the last call, or one direct read."""
+        if self.pms_reader.running:
+            now = time.monotonic()
+            frames = self.pms_reader.window(self._window_start, now)
+            self._window_start = now
+            if not frames:
+                logging.warning(f"[PMS5003] No frames since last reading "
+                                f"({self.pms_reader.errors} errors, last: {self.pms_reader.last_error})")
+                return
+        else:
+            frames = [self.sensor.read()]
+
+        if self.conf_pms["window"] == "latest":
+            frames = frames[-1:]
+        # Atmospheric PM1/2.5/10 followed by particle counts for 0.3/0.5/1/2.5/5/10 um
+        values = [sum(frame.data[i] for frame in frames) / len(frames) for i in range(3, 12)]
+
+        data["pm1"], data["pm2_5"], data["pm10"] = (round(v, 2) for v in values[:3])
+        if self.conf_pms["report_counts"]:
+            for key, value in zip(self.PMS_COUNT_KEYS, values[3:]):
+                data[key] = round(value, 2)
+
     def read_data(self):
         data = {"pm1": None, "pm2_5": None, "pm10": None}
 
         if not self.sensor:
             return data
 
+        if self.is_started and not self.is_ready():
+            return NOT_READY
+
         try:
             if self.mode == "pms5003":
-                frame = self.sensor.read()
-                data["pm1"] = frame.pm_ug_per_m3(size=1.0, atmospheric_environment=True)
-                data["pm2_5"] = frame.pm_ug_per_m3(size=2.5, atmospheric_environment=True)
-                data["pm10"] = frame.pm_ug_per_m3(size=10, atmospheric_environment=True)
+                self._read_pms(data)
 
             elif self.mode == "sps30_i2c":
                 if not self.sensor.read_data_ready_flag():
@@ -172,10 +369,31 @@ class AirQualitySensor:
             except Exception as e:
                 logging.error(f"[SPS30] Stop failed: {e}")
 
+        elif self.mode == "pms5003":
+            try:
+                self.pms_reader.stop()
+                if self.conf_pms["sleep_between_windows"]:
+                    self._set_pms_asleep(True)
+            except Exception as e:
+                logging.error(f"[PMS5003] Stop failed: {e}")
+
         self.is_started = False
+        self.ready_at = None
 
     def cleanup(self):
         try:
             self.stop()
         except Exception:
             pass
+
+        # Close the port so a re-created sensor can open it
+        self._close_port(self.sensor)
+
+    @staticmethod
+    def _close_port(sensor):
+        port = getattr(sensor, "ser", None) or getattr(sensor, "_serial", None)
+        if port is not None:
+            try:
+                port.close()
+            except Exception as e:
+                logging.error(f"[AirQuality] Closing port failed: {e}")
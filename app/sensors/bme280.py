@@ -1,13 +1,22 @@
-import bme280
-from smbus2 import SMBus
+import struct
 from config import SENSORS
 from logger_config import logging
+from .libs import drivers
+from .libs.i2c_bus import get_bus
+from utils.probe_cache import probe_cache
 
 class BME280Sensor:
+    CHIP_ID_REGISTER = 0xD0
+    CHIP_ID = 0x60
+    # dig_T1..dig_T3, enough to tell one chip's factory calibration from another's
+    CALIBRATION_T_REGISTER = 0x88
+    CALIBRATION_T = struct.Struct("<Hhh")
+
     def __init__(self):
         conf = SENSORS["bme280"]
         self.working = conf["working"]
-        self.bus = conf["port"]
+        self.port = conf["port"]
+        self.bus = None
         self.address = conf["address"]
         self.calibration = None
         self.sensor = None
@@ -19,19 +28,45 @@ class BME280Sensor:
 
     def setup_sensor(self):
         try:
-            self.bus = SMBus(self.bus)
-            self.calibration = bme280.load_calibration_params(self.bus, self.address)
+            self.bme280 = drivers.bme280_module()
+            self.bus = get_bus(self.port)
+            with self.bus.transaction(self.address) as bus:
+                self.calibration = self._cached_calibration(bus)
+                cached = self.calibration is not None
+                if not cached:
+                    self.calibration = self.bme280.load_calibration_params(bus, self.address)
+                    probe_cache.put("bme280", SENSORS["bme280"], dict(self.calibration))
             self.sensor = True
-            logging.info("[BME280] Initialized")
+            logging.info(f"[BME280] Initialized{' (cached calibration)' if cached else ''}")
         except Exception as e:
             logging.error(f"[BME280] Init failed: {e}")
 
+    def _cached_calibration(self, bus):
+        """Calibration from the probe cache if the chip at the address is the one it was read from."""
+        cached = probe_cache.get("bme280", SENSORS["bme280"])
+        if cached is None:
+            return None
+
+        try:
+            if bus.read_byte_data(self.address, self.CHIP_ID_REGISTER) == self.CHIP_ID:
+                block = bus.read_i2c_block_data(self.address, self.CALIBRATION_T_REGISTER, self.CALIBRATION_T.size)
+                if self.CALIBRATION_T.unpack(bytes(block)) == (cached["dig_T1"], cached["dig_T2"], cached["dig_T3"]):
+                    return self.bme280.params(cached)
+        except (OSError, KeyError, struct.error) as e:
+            logging.warning(f"[BME280] Checking cached calibration failed: {e}")
+
+        logging.info("[BME280] Cached calibration does not match the sensor, reloading")
+        probe_cache.invalidate("bme280")
+        return None
+
     def read_data(self):
         data = {"temperature": None, "pressure": None, "humidity": None}
 
         if self.working and self.sensor:
             try:
-                result = bme280.sample(bus=self.bus, compensation_params=self.calibration)
+                # One locked transaction for the whole trigger/wait/read sequence
+                with self.bus.transaction(self.address) as bus:
+                    result = self.bme280.sample(bus=bus, address=self.address, compensation_params=self.calibration)
             except AttributeError as e:
                 logging.error(f"Attribute error while reading BME280: {e}")
             except OSError as e:
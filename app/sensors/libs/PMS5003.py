@@ -1,12 +1,29 @@
 import struct
+import threading
 import time
+from collections import deque
 
-import RPi.GPIO as GPIO
-import serial
+from . import drivers
 
 __version__ = '0.0.5'
 
 PMS5003_SOF = bytearray(b'\x42\x4d')
+PMS5003_FRAME_LENGTH = 28  # Payload bytes after the length field: 13 values + checksum
+PMS5003_FRAME_SIZE = 4 + PMS5003_FRAME_LENGTH
+
+_FRAME_STRUCT = struct.Struct(">HHHHHHHHHHHHHH")
+_LENGTH_STRUCT = struct.Struct(">H")
+
+# Host commands: 0x42 0x4D CMD DATAH DATAL followed by the 16-bit byte sum
+PMS5003_CMD_READ = 0xE2
+PMS5003_CMD_MODE = 0xE1   # data 0: passive, 1: active
+PMS5003_CMD_SLEEP = 0xE4  # data 0: sleep, 1: wakeup
+
+
+def command_frame(cmd: int, data: int = 0) -> bytes:
+    """Host command frame for PMS5003_CMD_* with a 16-bit argument."""
+    frame = bytes(PMS5003_SOF) + struct.pack(">BH", cmd, data)
+    return frame + struct.pack(">H", sum(frame))
 
 
 class ChecksumMismatchError(RuntimeError):
@@ -42,7 +59,7 @@ class PMS5003Data:
             raw_data (bytes): Raw data received from PMS5003 sensor.
         """
         self.raw_data = raw_data
-        self.data = struct.unpack(">HHHHHHHHHHHHHH", raw_data)
+        self.data = _FRAME_STRUCT.unpack(raw_data)
         self.checksum = self.data[13]
 
     def pm_ug_per_m3(self, size: float, atmospheric_environment: bool = False) -> int:
@@ -132,6 +149,7 @@ class PMS5003:
             pin_reset_working (bool, optional): Indicates if GPIO pin for resetting is active.
         """
         self._serial = None
+        self._buffer = bytearray()  # Received bytes not yet parsed into a frame
         self._device = device
         self._baudrate = baudrate
         self._pin_enable = pin_enable
@@ -145,6 +163,7 @@ class PMS5003:
         """
         Sets up the serial connection and GPIO pins for the sensor.
         """
+        GPIO = drivers.gpio()
         GPIO.setwarnings(False)
         GPIO.setmode(GPIO.BCM)
 
@@ -156,7 +175,7 @@ class PMS5003:
         if self._serial is not None:
             self._serial.close()
 
-        self._serial = serial.Serial(self._device, baudrate=self._baudrate, timeout=4)
+        self._serial = drivers.open_serial(self._device, self._baudrate, timeout=4)
 
         if self._pin_reset_working:
             self.reset()
@@ -165,8 +184,47 @@ class PMS5003:
         """
         Stops the sensor by setting the enable pin low.
         """
+        GPIO = drivers.gpio()
         GPIO.output(self._pin_enable, GPIO.LOW)
 
+    def enable(self) -> None:
+        """
+        Wakes the sensor by setting the enable pin high.
+        """
+        GPIO = drivers.gpio()
+        GPIO.output(self._pin_enable, GPIO.HIGH)
+
+    def command(self, cmd: int, data: int = 0) -> None:
+        """
+        Sends a host command to the sensor.
+
+        Args:
+            cmd (int): Command byte (PMS5003_CMD_*).
+            data (int, optional): 16-bit command argument.
+        """
+        self._serial.write(command_frame(cmd, data))
+
+    def set_passive_mode(self, passive: bool = True) -> None:
+        """
+        Switches between passive (frames on request) and active (one frame per second) mode.
+        """
+        self.command(PMS5003_CMD_MODE, 0 if passive else 1)
+
+    def request_read(self) -> None:
+        """
+        Asks for one frame in passive mode.
+        """
+        self.command(PMS5003_CMD_READ)
+
+    def sleep(self, asleep: bool = True) -> None:
+        """
+        Puts the sensor to sleep (fan and laser off) or wakes it up by command.
+        """
+        self.command(PMS5003_CMD_SLEEP, 0 if asleep else 1)
+        if not asleep:
+            self._serial.flushInput()
+            self._buffer.clear()
+
     def get_pin_state(self) -> str:
         """
         Retrieves the state of the enable pin.
@@ -174,6 +232,7 @@ class PMS5003:
         Returns:
             str: State of the enable pin ('HIGH' or 'LOW').
         """
+        GPIO = drivers.gpio()
         state = GPIO.input(self._pin_enable)
         return 'HIGH' if state == GPIO.HIGH else 'LOW'
 
@@ -181,9 +240,11 @@ class PMS5003:
         """
         Resets the sensor by toggling the reset pin.
         """
+        GPIO = drivers.gpio()
         time.sleep(0.1)
         GPIO.output(self._pin_reset, GPIO.LOW)
         self._serial.flushInput()
+        self._buffer.clear()
         time.sleep(0.1)
         GPIO.output(self._pin_reset, GPIO.HIGH)
 
@@ -191,6 +252,11 @@ class PMS5003:
         """
         Reads data from the PMS5003 sensor.
 
+        Pulls everything the UART has buffered in one call into a reusable
+        buffer, finds the start of frame with bytes.find and validates the
+        checksum over a memoryview, so a frame costs a handful of calls
+        instead of one read per byte.
+
         Returns:
             PMS5003Data: Parsed data object containing sensor readings.
 
@@ -200,44 +266,138 @@ class PMS5003:
             ChecksumMismatchError: If checksum verification fails.
         """
         start = time.time()
-        sof_index = 0
 
         while True:
+            data = self._parse_buffer()
+            if data is not None:
+                return data
+
             elapsed = time.time() - start
             if elapsed > 5:
                 raise ReadTimeoutError("PMS5003 Read Timeout: Could not find start of frame")
 
-            sof = self._serial.read(1)
-            if len(sof) == 0:
+            # At least the rest of the current frame, or whatever has already arrived
+            needed = PMS5003_FRAME_SIZE - len(self._buffer) if self._buffer[:2] == PMS5003_SOF else PMS5003_FRAME_SIZE
+            chunk = self._serial.read(max(needed, self._serial.in_waiting))
+            if len(chunk) == 0:
                 raise SerialTimeoutError("PMS5003 Read Timeout: Failed to read start of frame byte")
-            sof = ord(sof) if isinstance(sof, bytes) else sof
+            self._buffer += chunk
 
-            if sof == PMS5003_SOF[sof_index]:
-                if sof_index == 0:
-                    sof_index = 1
-                elif sof_index == 1:
-                    break
-            else:
-                sof_index = 0
+    def _parse_buffer(self):
+        """
+        Take the first complete frame out of the receive buffer.
 
-        checksum = sum(PMS5003_SOF)
+        Returns:
+            PMS5003Data or None: The frame, or None if more bytes are needed.
 
-        data_length_bytes = bytearray(self._serial.read(2))
-        if len(data_length_bytes) != 2:
-            raise SerialTimeoutError("PMS5003 Read Timeout: Could not find length packet")
-        checksum += sum(data_length_bytes)
-        frame_length = struct.unpack(">H", data_length_bytes)[0]
+        Raises:
+            ChecksumMismatchError: If checksum verification fails.
+        """
+        buf = self._buffer
+
+        while True:
+            sof = buf.find(PMS5003_SOF)
+            if sof < 0:
+                # Keep a trailing 0x42, its 0x4D may still be on the way
+                del buf[:-1 if buf[-1:] == PMS5003_SOF[:1] else len(buf)]
+                return None
+            if sof > 0:
+                del buf[:sof]
+
+            if len(buf) < 4:
+                return None
+            if _LENGTH_STRUCT.unpack_from(buf, 2)[0] != PMS5003_FRAME_LENGTH:
+                # 0x42 0x4D inside the payload or a corrupted header, resync after it
+                del buf[:2]
+                continue
+            if len(buf) < PMS5003_FRAME_SIZE:
+                return None
+
+            with memoryview(buf) as view:
+                checksum = sum(view[:PMS5003_FRAME_SIZE - 2])
+                data = PMS5003Data(bytes(view[4:PMS5003_FRAME_SIZE]))
+            del buf[:PMS5003_FRAME_SIZE]
+
+            if checksum != data.checksum:
+                raise ChecksumMismatchError("PMS5003 Checksum Mismatch {} != {}".format(checksum, data.checksum))
+
+            return data
+
+
+
+class PMS5003Reader:
+    """
+    Background thread consuming every PMS5003 frame into a small ring.
+
+    In active mode the thread reads the frames the sensor sends once a second;
+    in passive mode it requests one every ``interval`` seconds. Readers get the
+    latest frame or the frames of a time window without touching the UART.
 
-        raw_data = bytearray(self._serial.read(frame_length))
-        if len(raw_data) != frame_length:
-            raise SerialTimeoutError("PMS5003 Read Timeout: Invalid frame length. Got {} bytes, expected {}."
-                                     .format(len(raw_data), frame_length))
+    Attributes:
+        errors (int): Read errors since start().
+        last_error (Exception or None): The most recent read error.
+    """
 
-        data = PMS5003Data(raw_data)
+    def __init__(self, sensor: PMS5003, ring_size: int = 64, passive: bool = False, interval: float = 1.0):
+        self._sensor = sensor
+        self._frames = deque(maxlen=ring_size)  # (time.monotonic(), PMS5003Data)
+        self._passive = passive
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.errors = 0
+        self.last_error = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._sensor.set_passive_mode(self._passive)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="pms5003-reader", daemon=True)
+        self._thread.start()
 
-        checksum += sum(raw_data[:-2])
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                if self._passive:
+                    self._sensor.request_read()
+                frame = self._sensor.read()
+                self._frames.append((time.monotonic(), frame))
+            except Exception as e:
+                self.errors += 1
+                self.last_error = e
+                self._stop_event.wait(1)
+                continue
+
+            if self._passive:
+                self._stop_event.wait(max(0.0, self._interval - (time.monotonic() - started)))
+
+    def latest(self):
+        """
+        Returns:
+            PMS5003Data or None: The most recent frame.
+        """
+        return self._frames[-1][1] if self._frames else None
 
-        if checksum != data.checksum:
-            raise ChecksumMismatchError("PMS5003 Checksum Mismatch {} != {}".format(checksum, data.checksum))
+    def window(self, since: float, until: float = float("inf")) -> list:
+        """
+        Args:
+            since (float): time.monotonic() value where the window starts (exclusive).
+            until (float, optional): time.monotonic() value where the window ends (inclusive).
 
-        return data
\ No newline at end of file
+        Returns:
+            list: Frames received in the window, oldest first.
+        """
+        return [frame for received, frame in list(self._frames) if since < received <= until]
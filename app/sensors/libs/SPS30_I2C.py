@@ -1,47 +1,42 @@
 #!/usr/bin/env python3
 
-from smbus2 import SMBus, i2c_msg
 import struct
 from time import sleep
 
-def calculateCRC(input):
-    crc = 0xFF
-    for i in range (0, 2):
-        crc = crc ^ input[i]
-        for j in range(8, 0, -1):
-            if crc & 0x80:
-                crc = (crc << 1) ^ 0x31
-            else:
-                crc = crc << 1
-    crc = crc & 0x0000FF
-    return crc
+from . import drivers
+from .i2c_bus import get_bus
 
-def checkCRC(result):
-    for i in range(2, len(result), 3):
-        data = []
-        data.append(result[i-2])
-        data.append(result[i-1])
+i2c_msg = drivers.i2c_msg()
 
-        crc = result[i]
+def _build_crc_table():
+    # CRC-8, polynomial 0x31 (x^8 + x^5 + x^4 + 1), one entry per byte value
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
 
-        if crc == calculateCRC(data):
-            crc_result = True
-        else:
-            crc_result = False
-    return crc_result
+CRC_TABLE = _build_crc_table()
 
-def bytes_to_int(bytes):
-    result = 0
-    for b in bytes:
-        result = result * 256 + int(b)
-    return result
+MEASURED_VALUES = struct.Struct('>10f')
 
-def convertPMValues(value):
-    string_value = str(hex(value)).replace("0x", "")
+def calculateCRC(input):
+    """CRC of a 2-byte word, initial value 0xFF."""
+    return CRC_TABLE[CRC_TABLE[0xFF ^ input[0]] ^ input[1]]
 
-    byte_value = bytes.fromhex(string_value)
+def checkCRC(result):
+    """True if every 3-byte group (word, CRC) in the response is valid."""
+    return all(CRC_TABLE[CRC_TABLE[0xFF ^ hi] ^ lo] == crc
+               for hi, lo, crc in zip(result[0::3], result[1::3], result[2::3]))
 
-    return struct.unpack('>f', byte_value)[0]
+def strip_crc(result):
+    """Return the data bytes of a response with the CRC after every word removed."""
+    payload = bytearray(len(result) // 3 * 2)
+    payload[0::2] = result[0::3]
+    payload[1::2] = result[1::3]
+    return payload
 
 class SPS30():
     SPS_ADDR = 0x69
@@ -63,79 +58,44 @@ class SPS30():
     DATA_READY_FLAG_ERROR = -4
     MEASURED_VALUES_ERROR = -5
 
-    dict_values = {"pm1p0"  : None,
-                   "pm2p5"  : None,
-                   "pm4p0"  : None,
-                   "pm10p0" : None,
-                   "nc0p5"  : None,
-                   "nc1p0"  : None,
-                   "nc2p5"  : None,
-                   "nc4p0"  : None,
-                   "nc10p0" : None,
-                   "typical": None}
+    VALUE_KEYS = ("pm1p0", "pm2p5", "pm4p0", "pm10p0",
+                  "nc0p5", "nc1p0", "nc2p5", "nc4p0", "nc10p0",
+                  "typical")
 
     def __init__(self, port):
-        self.bus = SMBus(port)
-
-    def read_article_code(self):
-        result = []
-        article_code = []
-
-        write = i2c_msg.write(self.SPS_ADDR, self.R_ARTICLE_CD)
-        self.bus.i2c_rdwr(write)
+        self.bus = get_bus(port)
+        self.dict_values = dict.fromkeys(self.VALUE_KEYS)
 
-        read = i2c_msg.read(self.SPS_ADDR, 48)
-        self.bus.i2c_rdwr(read)
+    def _read(self, command, length):
+        """Send a command and read `length` bytes back; returns the data bytes, or None on a CRC error."""
+        write = i2c_msg.write(self.SPS_ADDR, command)
+        read = i2c_msg.read(self.SPS_ADDR, length)
+        with self.bus.transaction(self.SPS_ADDR) as bus:
+            bus.i2c_rdwr(write)
+            bus.i2c_rdwr(read)
 
-        for i in range(read.len):
-            result.append(bytes_to_int(read.buf[i]))
+        result = bytes(read)
+        if not checkCRC(result):
+            return None
+        return strip_crc(result)
 
-        if checkCRC(result):
-            for i in range (2, len(result), 3):
-                article_code.append(chr(result[i-2]))
-                article_code.append(chr(result[i-1]))
-            return str("".join(article_code))
-        else:
+    def read_article_code(self):
+        payload = self._read(self.R_ARTICLE_CD, 48)
+        if payload is None:
             return self.ARTICLE_CODE_ERROR
+        return payload.decode('latin-1')
 
     def read_device_serial(self):
-        result = []
-        device_serial = []
-
-        write = i2c_msg.write(self.SPS_ADDR, self.R_SERIAL_NUM)
-        self.bus.i2c_rdwr(write)
-
-        read = i2c_msg.read(self.SPS_ADDR, 48)
-        self.bus.i2c_rdwr(read)
-
-        for i in range(read.len):
-            result.append(bytes_to_int(read.buf[i]))
-
-        if checkCRC(result):
-            for i in range(2, len(result), 3):
-                device_serial.append(chr(result[i-2]))
-                device_serial.append(chr(result[i-1]))
-            return str("".join(device_serial))
-        else:
+        payload = self._read(self.R_SERIAL_NUM, 48)
+        if payload is None:
             return self.SERIAL_NUMBER_ERROR
+        return payload.decode('latin-1')
 
     def read_auto_cleaning_interval(self):
-        result = []
-
-        write = i2c_msg.write(self.SPS_ADDR, self.RW_AUTO_CLN)
-        self.bus.i2c_rdwr(write)
-
-        read = i2c_msg.read(self.SPS_ADDR, 6)
-        self.bus.i2c_rdwr(read)
-
-        for i in range(read.len):
-            result.append(bytes_to_int(read.buf[i]))
-
-        if checkCRC(result):
-            result = result[0] * pow(2, 24) + result[1] * pow(2, 16) + result[3] * pow(2, 8) + result[4]
-            return result
-        else:
+        payload = self._read(self.RW_AUTO_CLN, 6)
+        if payload is None:
             return self.AUTO_CLN_INTERVAL_ERROR
+        return int.from_bytes(payload, 'big')
 
     def set_auto_cleaning_interval(self, seconds):
         # FIX: Create a copy instead of modifying the class list
@@ -151,11 +111,11 @@ class SPS30():
         command.append(calculateCRC(command[5:7]))
 
         write = i2c_msg.write(self.SPS_ADDR, command)
-        self.bus.i2c_rdwr(write)
+        self.bus.i2c_rdwr(self.SPS_ADDR, write)
 
     def start_fan_cleaning(self):
         write = i2c_msg.write(self.SPS_ADDR, self.START_CLN)
-        self.bus.i2c_rdwr(write)
+        self.bus.i2c_rdwr(self.SPS_ADDR, write)
 
     def start_measurement(self):
         # FIX: Create a copy instead of modifying the class list
@@ -167,59 +127,30 @@ class SPS30():
         command.append(crc)
 
         write = i2c_msg.write(self.SPS_ADDR, command)
-        self.bus.i2c_rdwr(write)
+        self.bus.i2c_rdwr(self.SPS_ADDR, write)
 
     def stop_measurement(self):
         write = i2c_msg.write(self.SPS_ADDR, self.STOP_MEAS)
-        self.bus.i2c_rdwr(write)
+        self.bus.i2c_rdwr(self.SPS_ADDR, write)
 
     def read_data_ready_flag(self):
-        result = []
-
-        write = i2c_msg.write(self.SPS_ADDR, self.R_DATA_RDY)
-        self.bus.i2c_rdwr(write)
-
-        read = i2c_msg.read(self.SPS_ADDR, 3)
-        self.bus.i2c_rdwr(read)
-
-        for i in range(read.len):
-            result.append(bytes_to_int(read.buf[i]))
-
-        if checkCRC(result):
-            return result[1]
-        else:
+        payload = self._read(self.R_DATA_RDY, 3)
+        if payload is None:
             return self.DATA_READY_FLAG_ERROR
+        return payload[1]
 
     def read_measured_values(self):
-        result = []
-
-        write = i2c_msg.write(self.SPS_ADDR, self.R_VALUES)
-        self.bus.i2c_rdwr(write)
-
-        read = i2c_msg.read(self.SPS_ADDR, 60)
-        self.bus.i2c_rdwr(read)
-
-        for i in range(read.len):
-            result.append(bytes_to_int(read.buf[i]))
-
-        if checkCRC(result):
-            self.parse_sensor_values(result)
-            return self.NO_ERROR
-        else:
+        payload = self._read(self.R_VALUES, 60)
+        if payload is None:
             return self.MEASURED_VALUES_ERROR
+        self.parse_sensor_values(payload)
+        return self.NO_ERROR
 
     def device_reset(self):
         write = i2c_msg.write(self.SPS_ADDR, self.RESET)
-        self.bus.i2c_rdwr(write)
+        self.bus.i2c_rdwr(self.SPS_ADDR, write)
         sleep(1)
 
-    def parse_sensor_values(self, input):
-        index = 0
-        pm_list = []
-        for i in range (4, len(input), 6):
-            value = input[i] + input[i-1] * pow(2, 8) +input[i-3] * pow(2, 16) + input[i-4] * pow(2, 24)
-            pm_list.append(value)
-
-        for i in self.dict_values.keys():
-            self.dict_values[i] = convertPMValues(pm_list[index])
-            index += 1
+    def parse_sensor_values(self, payload):
+        """Unpack the 40 data bytes of a measurement (CRCs already removed) into dict_values."""
+        self.dict_values.update(zip(self.VALUE_KEYS, MEASURED_VALUES.unpack_from(memoryview(payload))))
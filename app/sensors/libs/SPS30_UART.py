@@ -1,7 +1,79 @@
-import serial
 import struct
 import time
-import sys
+
+from logger_config import logging
+from . import drivers
+
+# Byte stuffing pairs in the order they must be applied when stuffing; 0x7D
+# goes first so escapes added for the other bytes are not escaped again
+_STUFFING = ((b'\x7d', b'\x7d\x5d'), (b'\x7e', b'\x7d\x5e'), (b'\x11', b'\x7d\x31'), (b'\x13', b'\x7d\x33'))
+
+_MEASUREMENT = struct.Struct('>10f')
+
+
+class ShdlcDecoder:
+    """
+    Incremental SHDLC frame decoder.
+
+    Bytes from bulk reads are fed in as they arrive; next_frame() returns the
+    unstuffed content of the first complete frame (without the 0x7E
+    delimiters) as soon as its closing 0x7E is in the buffer.
+    """
+
+    DELIMITER = 0x7E
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        self._buffer += data
+
+    def clear(self):
+        self._buffer.clear()
+
+    def next_frame(self):
+        buf = self._buffer
+        while True:
+            start = buf.find(self.DELIMITER)
+            if start < 0:
+                buf.clear()
+                return None
+            end = buf.find(self.DELIMITER, start + 1)
+            if end < 0:
+                del buf[:start]
+                return None
+            if end == start + 1:
+                # Two delimiters in a row: end of a frame we missed, then our start
+                del buf[:end]
+                continue
+
+            content = bytes(buf[start + 1:end])
+            del buf[:end + 1]
+            return unstuff(content)
+
+
+def stuff(data):
+    for raw, escaped in _STUFFING:
+        data = data.replace(raw, escaped)
+    return data
+
+
+def make_frame(command, data=b'', address=0x00):
+    """MOSI frame: address, command, length, data and checksum, stuffed and delimited."""
+    body = bytes((address, command, len(data))) + bytes(data)
+    body += bytes(((~sum(body)) & 0xFF,))
+    return b'\x7e' + stuff(body) + b'\x7e'
+
+
+def unstuff(data):
+    # Every 0x7D starts an escape, so a 0x7D not followed by 0x5D after the
+    # other escapes are resolved is invalid. 0x7D 0x5D is resolved last so the
+    # 0x7D it produces cannot pair with the next byte.
+    for raw, escaped in reversed(_STUFFING[1:]):
+        data = data.replace(escaped, raw)
+    if data.count(b'\x7d') != data.count(b'\x7d\x5d'):
+        raise ValueError("Invalid byte stuffing in frame")
+    return data.replace(b'\x7d\x5d', b'\x7d')
 
 
 class SPS30:
@@ -19,61 +91,50 @@ class SPS30:
     READ_VERSION = 0xD1
     READ_STATUS_REGISTER = 0xD2
 
+    RESET_TIME = 0.1  # The device reboots after acknowledging a reset
+
     def __init__(self, port='/dev/ttyS0', baudrate=115200, timeout=1):
-        self.ser = serial.Serial(port, baudrate, timeout=timeout)
+        self.ser = drivers.open_serial(port, baudrate, timeout)
+        self.decoder = ShdlcDecoder()
 
     def calcCheckSum(self, dataBytes):
-        total = sum(dataBytes)
-        lsb = total & 0xFF
-        checksum = (~lsb) & 0xFF
-        return checksum
+        return (~sum(dataBytes)) & 0xFF
 
     def readFrame(self, max_len=255, command=None):
-        buffer = bytearray()
+        """
+        Read the response frame to `command` and return its data.
 
-        start_found = False
+        Reads whatever the UART has buffered in bulk and returns as soon as the
+        closing 0x7E arrives, or raises once `ser.timeout` has passed.
+        """
+        deadline = time.monotonic() + self.ser.timeout
 
-        start_time = time.time()
-        while time.time() - start_time < self.ser.timeout:
-            byte = self.ser.read(1)
-            if not byte:
-                continue
+        while True:
+            frame = self.decoder.next_frame()
+            if frame is not None:
+                return self._parseFrame(frame, command)
+
+            if time.monotonic() >= deadline:
+                raise Exception("Frame too short or timed out")
+            self.decoder.feed(self.ser.read(max(1, self.ser.in_waiting)))
 
-            b = byte[0]
-            if b == self.START_END_BYTE:
-                if not start_found:
-                    start_found = True
-                    buffer = bytearray()
-                    buffer.append(b)
-                else:
-                    buffer.append(b)
-                    break
-            elif start_found:
-                buffer.append(b)
-
-        if not buffer:
-            raise Exception("Frame is empty")
-
-        if len(buffer) < 7:
-            raise Exception("Frame too short or timed out")
-
-        if buffer[0] != self.START_END_BYTE or buffer[-1] != self.START_END_BYTE:
-            raise Exception(f"Invalid start/end byte: {buffer.hex()}")
-
-        unstuffed = self.unstuff(buffer[1:-1])
-        addr = unstuffed[0]
-        cmd = unstuffed[1]
-        state = unstuffed[2]
-        length = unstuffed[3]
-        data = unstuffed[4:4 + length]
-        checksum = unstuffed[4 + length]
-        calc_checksum = self.calcCheckSum(unstuffed[:4 + length])
+    def _parseFrame(self, frame, command):
+        if len(frame) < 5:
+            raise Exception(f"Frame too short: {frame.hex()}")
+
+        addr, cmd, state, length = frame[0], frame[1], frame[2], frame[3]
+        data = frame[4:4 + length]
+        if len(frame) != 5 + length:
+            raise Exception(f"Frame length mismatch: {frame.hex()}")
+
+        checksum = frame[4 + length]
+        calc_checksum = self.calcCheckSum(frame[:4 + length])
 
         if cmd != command:
-            raise Exception(f"Command mismatch: expected {command}, got {data[2]}")
+            raise Exception(f"Command mismatch: expected {command}, got {cmd}")
 
         if state != 0:
-            raise Exception(f"Device returned error state: {data[3]}")
+            raise Exception(f"Device returned error state: {state}")
 
         if checksum != calc_checksum:
             raise Exception(f"Checksum mismatch: got 0x{checksum:02X}, expected 0x{calc_checksum:02X}")
@@ -81,36 +142,21 @@ class SPS30:
         return data
 
     def makeFrame(self, command, data=b''):
-        frame_body = bytearray()
-        frame_body.append(self.ADDRESS)
-        frame_body.append(command)
-        frame_body.append(len(data))
-        frame_body.extend(data)
-
-        checksum = self.calcCheckSum(frame_body)
-        frame_body.append(checksum)
-
-        stuffed = self.stuff(frame_body)
+        return make_frame(command, data, self.ADDRESS)
 
-        frame = bytearray([self.START_END_BYTE]) + stuffed + bytearray([self.START_END_BYTE])
-        return frame
-
-    def sendCommand(self, command, data=b'', responseLen=0, delay=0.05):
-        frame = self.makeFrame(command, data)
-        self.ser.write(frame)
-        time.sleep(delay)
-        if responseLen > 0:
-            return self.readFrame(responseLen, command)
-        return b''
+    def sendCommand(self, command, data=b'', responseLen=0):
+        """Send a command and wait for the device's response frame; returns its data."""
+        self.decoder.clear()
+        self.ser.reset_input_buffer()
+        self.ser.write(self.makeFrame(command, data))
+        return self.readFrame(responseLen, command)
 
     def startMeasurement(self, format_type=0x03):
         data = bytes([0x01, format_type])
         self.sendCommand(self.START_MEASUREMENT, data)
-        self.ser.reset_input_buffer()
 
     def stopMeasurement(self):
         self.sendCommand(self.STOP_MEASUREMENT)
-        self.ser.reset_input_buffer()
 
     def getVersion(self):
         data = self.sendCommand(self.READ_VERSION, responseLen=14)
@@ -121,27 +167,21 @@ class SPS30:
 
     def resetDevice(self):
         self.sendCommand(self.RESET)
-        self.ser.reset_input_buffer()
+        time.sleep(self.RESET_TIME)
 
     def sleepDevice(self):
         self.sendCommand(self.SLEEP)
-        self.ser.reset_input_buffer()
 
     def wakeUpDevice(self):
+        # A falling edge on RX wakes the interface, the command must follow within 100 ms
         self.ser.write(b'\xFF')
         self.sendCommand(self.WAKE_UP)
-        self.ser.reset_input_buffer()
 
     def startFanCleaning(self):
-        print("Start Fan Cleanning...")
+        logging.info("[SPS30] Starting fan cleaning")
         self.sendCommand(self.START_FAN_CLEANING)
-        self.ser.reset_input_buffer()
-        for i in range(1, 101):
-            time.sleep(0.1)
-            sys.stdout.write(f"\rProgress: {i}%")
-            sys.stdout.flush()
-        time.sleep(0.1)
-        print("\nFan Cleanning is done.")
+        time.sleep(10.1)
+        logging.info("[SPS30] Fan cleaning done")
 
     def readDeviceInfo(self):
         data = bytes([0x03])
@@ -149,9 +189,10 @@ class SPS30:
 
         try:
             decoded = response.decode('ascii').strip('\x00')
-            print(decoded)
+            logging.debug(f"[SPS30] Serial: {decoded}")
         except UnicodeDecodeError:
-            print("Response is not valid ASCII:", response)
+            logging.warning(f"[SPS30] Serial is not valid ASCII: {response!r}")
+            decoded = None
 
         return {
             "Product Type": "00080000",
@@ -159,28 +200,10 @@ class SPS30:
         }
 
     def stuff(self, data):
-        stuffed = bytearray()
-        for b in data:
-            if b in [0x7E, 0x7D, 0x11, 0x13]:
-                stuffed.append(0x7D)
-                stuffed.append(b ^ 0x20)
-            else:
-                stuffed.append(b)
-        return stuffed
+        return stuff(bytes(data))
 
     def unstuff(self, stuffed):
-        i = 0
-        unstuffed = bytearray()
-        while i < len(stuffed):
-            if stuffed[i] == 0x7D:
-                i += 1
-                if i >= len(stuffed):
-                    raise ValueError("Invalid stuffing at end of frame")
-                unstuffed.append(stuffed[i] ^ 0x20)
-            else:
-                unstuffed.append(stuffed[i])
-            i += 1
-        return unstuffed
+        return unstuff(bytes(stuffed))
 
     def readStatusRegister(self, reset=False):
         data = bytes([0x01]) if reset else bytes([0x00])
@@ -198,14 +221,15 @@ class SPS30:
         }
 
     def readMeasurement(self):
-        self.sendCommand(self.READ_MEASURED_VALUE)
-        time.sleep(1.0)
-        raw_data = self.readFrame(command=self.READ_MEASURED_VALUE)
+        """Read the latest measurement; returns None if the device has no new values yet."""
+        raw_data = self.sendCommand(self.READ_MEASURED_VALUE)
 
+        if len(raw_data) == 0:
+            return None
         if len(raw_data) != 40:
             raise Exception(f"Expected 40 bytes, got {len(raw_data)}")
 
-        values = [struct.unpack(">f", raw_data[i:i + 4])[0] for i in range(0, 40, 4)]
+        values = _MEASUREMENT.unpack(raw_data)
         labels = [
             "Mass PM1.0",
             "Mass PM2.5",
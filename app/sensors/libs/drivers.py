@@ -0,0 +1,104 @@
+"""
+Driver backend switch.
+
+Sensors and the RTC open their hardware through these helpers instead of
+importing driver libraries directly. With ``CLIMATENET_BACKEND=fake`` they get
+the simulated devices from ``fake_devices``; otherwise the real driver is
+imported on first use, so a missing library only affects the device using it.
+"""
+from config import BACKEND
+
+
+def is_fake() -> bool:
+    return BACKEND == "fake"
+
+
+def open_serial(port: str, baudrate: int, timeout: float):
+    """Open a serial port (pyserial ``Serial`` interface)."""
+    if is_fake():
+        from .fake_devices import FakeSerial
+        return FakeSerial(port, baudrate, timeout=timeout)
+
+    import serial
+    return serial.Serial(port, baudrate, timeout=timeout)
+
+
+def open_smbus(port: int):
+    """Open an I2C bus (smbus2 ``SMBus`` interface)."""
+    if is_fake():
+        from .fake_devices import FakeSMBus
+        return FakeSMBus(port)
+
+    from smbus2 import SMBus
+    return SMBus(port)
+
+
+def i2c_msg():
+    """Return the ``i2c_msg`` class matching ``open_smbus``."""
+    if is_fake():
+        from .fake_devices import FakeI2CMsg
+        return FakeI2CMsg
+
+    from smbus2 import i2c_msg as msg
+    return msg
+
+
+def bme280_module():
+    """Return the RPi.bme280 module (``load_calibration_params`` / ``sample``)."""
+    if is_fake():
+        from . import fake_devices
+        return fake_devices.FakeBME280
+
+    import bme280
+    return bme280
+
+
+def ltr390(i2c):
+    if is_fake():
+        from .fake_devices import FakeLTR390
+        return FakeLTR390(i2c)
+
+    from adafruit_ltr390 import LTR390
+    return LTR390(i2c)
+
+
+def ds3231(i2c):
+    if is_fake():
+        from .fake_devices import FakeDS3231
+        return FakeDS3231(i2c)
+
+    import adafruit_ds3231
+    return adafruit_ds3231.DS3231(i2c)
+
+
+def gpio():
+    """Return the RPi.GPIO module."""
+    if is_fake():
+        from .fake_devices import FakeGPIO
+        return FakeGPIO
+
+    import RPi.GPIO as GPIO
+    return GPIO
+
+
+def button(pin: int):
+    """Create a gpiozero ``Button``. The fake backend drives it from the mock pin factory."""
+    from gpiozero import Button
+
+    if is_fake():
+        from .fake_devices import install_mock_pin_factory, start_pulses
+        install_mock_pin_factory()
+        device = Button(pin)
+        start_pulses(pin)
+        return device
+
+    return Button(pin)
+
+
+def mcp3008(channel: int):
+    if is_fake():
+        from .fake_devices import FakeMCP3008
+        return FakeMCP3008(channel)
+
+    from gpiozero import MCP3008
+    return MCP3008(channel=channel)
@@ -0,0 +1,674 @@
+"""
+Deterministic simulated devices for CLIMATENET_BACKEND=fake.
+
+Every fake mimics the interface of the driver it replaces closely enough for
+the sensor classes to run unchanged: the serial ports emit valid PMS5003 and
+SPS30 SHDLC frames, the I2C bus answers SPS30 commands with correct CRCs and
+the gpiozero buttons are driven through the mock pin factory. Values follow
+slow sine waves plus seeded noise. Latency and failures are injected as set
+in ``config.FAKE_BACKEND``.
+"""
+import errno
+import math
+import random
+import struct
+import threading
+import time
+import zlib
+
+from config import FAKE_BACKEND, SENSORS
+
+_START = time.monotonic()
+
+
+def _rng(name: str) -> random.Random:
+    """Per-device random generator, stable across runs for the same seed."""
+    return random.Random(FAKE_BACKEND["seed"] ^ zlib.crc32(name.encode()))
+
+
+def _wave(base: float, amplitude: float, period: float, phase: float = 0.0) -> float:
+    elapsed = time.monotonic() - _START
+    return base + amplitude * math.sin(2 * math.pi * elapsed / period + phase)
+
+
+class FaultInjector:
+    """Adds the configured latency to a device transaction and randomly fails it."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._rng = _rng(f"faults:{name}")
+
+    def check(self):
+        latency = FAKE_BACKEND["latency"]
+        if latency > 0:
+            time.sleep(latency)
+        if self._rng.random() < FAKE_BACKEND["failure_rate"]:
+            raise OSError(errno.EIO, f"[fake] Injected failure on {self.name}")
+
+
+# --------------------------------------------------------------------------
+# Frame builders
+# --------------------------------------------------------------------------
+
+def pms5003_frame(values) -> bytes:
+    """
+    Build a 32-byte PMS5003 frame.
+
+    Args:
+        values: 12 readings in data sheet order (PM1/2.5/10 standard, PM1/2.5/10
+            atmospheric, particle counts for 0.3/0.5/1/2.5/5/10 um).
+    """
+    body = b"BM" + struct.pack(">H", 28) + struct.pack(">13H", *values, 0)
+    return body + struct.pack(">H", sum(body) & 0xFFFF)
+
+
+def shdlc_stuff(data: bytes) -> bytes:
+    stuffed = bytearray()
+    for b in data:
+        if b in (0x7E, 0x7D, 0x11, 0x13):
+            stuffed += bytes((0x7D, b ^ 0x20))
+        else:
+            stuffed.append(b)
+    return bytes(stuffed)
+
+
+def shdlc_unstuff(data: bytes) -> bytes:
+    unstuffed = bytearray()
+    escape = False
+    for b in data:
+        if escape:
+            unstuffed.append(b ^ 0x20)
+            escape = False
+        elif b == 0x7D:
+            escape = True
+        else:
+            unstuffed.append(b)
+    return bytes(unstuffed)
+
+
+def shdlc_frame(command: int, data: bytes = b"", state: int = 0, address: int = 0) -> bytes:
+    """Build a SPS30 SHDLC frame. Pass ``state=None`` for a MOSI (request) frame."""
+    header = bytes((address, command)) if state is None else bytes((address, command, state))
+    body = header + bytes((len(data),)) + data
+    checksum = (~sum(body)) & 0xFF
+    return b"\x7e" + shdlc_stuff(body + bytes((checksum,))) + b"\x7e"
+
+
+def sensirion_crc8(data: bytes) -> int:
+    crc = 0xFF
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def sensirion_words(data: bytes) -> bytes:
+    """Split data into 2-byte words each followed by its CRC, as the SPS30 I2C interface sends them."""
+    out = bytearray()
+    for i in range(0, len(data), 2):
+        word = data[i:i + 2]
+        out += word + bytes((sensirion_crc8(word),))
+    return bytes(out)
+
+
+def _pm_values(rng: random.Random):
+    """Simulated SPS30-style readings: 4 mass concentrations, 5 number concentrations, typical size."""
+    pm1 = max(0.0, _wave(8, 4, 3600) + rng.gauss(0, 0.5))
+    pm25 = pm1 * 1.4 + abs(rng.gauss(0, 0.3))
+    pm4 = pm25 * 1.1
+    pm10 = pm25 * 1.3
+    nc05 = pm1 * 6.5
+    return [pm1, pm25, pm4, pm10, nc05, nc05 * 1.2, nc05 * 1.25, nc05 * 1.26, nc05 * 1.27, 0.55]
+
+
+# --------------------------------------------------------------------------
+# Serial devices
+# --------------------------------------------------------------------------
+
+class FakePMS5003Device:
+    """PMS5003 sending one frame per second in active mode, or on request in passive mode."""
+
+    baudrate = 9600
+
+    def __init__(self):
+        self._rng = _rng("pms5003")
+        self._next_frame = time.monotonic()
+        self._pending = bytearray()
+        self.passive = False
+        self.asleep = False
+
+    def pump(self, now: float) -> bytes:
+        out = bytearray()
+        if self.passive or self.asleep:
+            self._next_frame = now
+            return b""
+        while now >= self._next_frame:
+            out += self.frame()
+            self._next_frame += 1.0
+        return bytes(out)
+
+    def next_event(self) -> float:
+        return float("inf") if self.passive or self.asleep else self._next_frame
+
+    def frame(self) -> bytes:
+        pm = _pm_values(self._rng)
+        mass = [round(pm[0]), round(pm[1]), round(pm[3])]
+        counts = [round(pm[4] * 100), round(pm[4] * 30), round(pm[4] * 6), round(pm[1]), round(pm[1] / 3), round(pm[1] / 9)]
+        return pms5003_frame(mass + mass + counts)
+
+    def receive(self, data: bytes, now: float) -> bytes:
+        """Handle 7-byte host commands: 0x42 0x4D CMD DATAH DATAL CHK CHK."""
+        self._pending += data
+        out = bytearray()
+        while True:
+            start = self._pending.find(b"BM")
+            if start < 0 or len(self._pending) - start < 7:
+                break
+            command, argument = struct.unpack_from(">BH", self._pending, start + 2)
+            del self._pending[:start + 7]
+            if command == 0xE1:
+                self.passive = argument == 0
+            elif command == 0xE4:
+                self.asleep = argument == 0
+            elif command == 0xE2 and self.passive and not self.asleep:
+                out += self.frame()
+        return bytes(out)
+
+
+class FakeSPS30Device:
+    """SPS30 answering SHDLC requests on the UART."""
+
+    baudrate = 115200
+    SERIAL = "FAKE00000000000000030"
+
+    def __init__(self):
+        self._rng = _rng("sps30")
+        self._pending = bytearray()
+        self.measuring_since = None
+
+    def pump(self, now: float) -> bytes:
+        return b""
+
+    def next_event(self) -> float:
+        return float("inf")
+
+    def receive(self, data: bytes, now: float) -> bytes:
+        """Consume request bytes and return the response frames."""
+        self._pending += data
+        responses = bytearray()
+        while True:
+            start = self._pending.find(0x7E)
+            if start < 0:
+                self._pending.clear()
+                break
+            end = self._pending.find(0x7E, start + 1)
+            if end < 0:
+                del self._pending[:start]
+                break
+            raw = shdlc_unstuff(bytes(self._pending[start + 1:end]))
+            del self._pending[:end + 1]
+            if len(raw) >= 4:
+                responses += self._respond(raw[1], raw[3:3 + raw[2]], now)
+        return bytes(responses)
+
+    def _respond(self, command: int, data: bytes, now: float) -> bytes:
+        payload = b""
+        if command == 0x00:
+            self.measuring_since = now
+        elif command in (0x01, 0x10, 0xD3):
+            self.measuring_since = None
+        elif command == 0x03:
+            if self.measuring_since is not None and now - self.measuring_since >= 1.0:
+                payload = struct.pack(">10f", *_pm_values(self._rng))
+        elif command == 0xD0:
+            if data[:1] == b"\x00":
+                payload = b"00080000\x00"
+            else:
+                payload = self.SERIAL.encode() + b"\x00"
+        elif command == 0xD1:
+            payload = bytes((2, 2, 0, 7, 0, 2, 0))
+        elif command == 0xD2:
+            payload = bytes(5)
+        elif command == 0x80 and len(data) == 1:
+            payload = struct.pack(">I", 604800)
+        return shdlc_frame(command, payload, state=0)
+
+
+class _ReplayDevice:
+    """Replays a file of recorded serial bytes in a loop, 32 bytes (one PMS5003 frame) per second."""
+
+    def __init__(self, path: str, baudrate: int):
+        with open(path, "rb") as f:
+            self._data = f.read()
+        self.baudrate = baudrate
+        self._offset = 0
+        self._next_chunk = time.monotonic()
+        self._chunk = 32
+
+    def pump(self, now: float) -> bytes:
+        out = bytearray()
+        while now >= self._next_chunk and self._data:
+            end = self._offset + self._chunk
+            out += self._data[self._offset:end]
+            self._offset = end if end < len(self._data) else 0
+            self._next_chunk += 1.0
+        return bytes(out)
+
+    def next_event(self) -> float:
+        return self._next_chunk
+
+    def receive(self, data: bytes, now: float) -> bytes:
+        return b""
+
+
+_serial_devices = {}
+_serial_lock = threading.Lock()
+
+
+def serial_device(port: str):
+    """The simulated device attached to a port; kept across reopens like real hardware."""
+    with _serial_lock:
+        if port not in _serial_devices:
+            if FAKE_BACKEND["air_quality"] == "pms5003":
+                device = FakePMS5003Device()
+            else:
+                device = FakeSPS30Device()
+            if FAKE_BACKEND["serial_replay"]:
+                device = _ReplayDevice(FAKE_BACKEND["serial_replay"], device.baudrate)
+            _serial_devices[port] = device
+        return _serial_devices[port]
+
+
+class FakeSerial:
+    """pyserial-compatible port connected to a simulated device."""
+
+    def __init__(self, port: str = "/dev/ttyAMA0", baudrate: int = 9600, timeout: float = None, **kwargs):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self._device = serial_device(port)
+        self._rx = bytearray()
+        self._faults = FaultInjector(f"serial:{port}")
+        self._noise = _rng(f"noise:{port}")
+
+    def _pump(self):
+        chunk = self._device.pump(time.monotonic())
+        if chunk and self.baudrate != self._device.baudrate:
+            # Wrong baud rate: the bytes arrive garbled
+            chunk = bytes(self._noise.getrandbits(8) for _ in chunk)
+        self._rx += chunk
+
+    @property
+    def in_waiting(self) -> int:
+        self._pump()
+        return len(self._rx)
+
+    def read(self, size: int = 1) -> bytes:
+        self._faults.check()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        self._pump()
+        while len(self._rx) < size:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            wake = self._device.next_event()
+            if deadline is not None:
+                wake = min(wake, deadline)
+            if wake == float("inf"):
+                wake = now + 0.05
+            time.sleep(max(0.0, wake - now))
+            self._pump()
+        data = bytes(self._rx[:size])
+        del self._rx[:size]
+        return data
+
+    def write(self, data) -> int:
+        self._faults.check()
+        if self.baudrate == self._device.baudrate:
+            self._rx += self._device.receive(bytes(data), time.monotonic())
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._pump()
+        self._rx.clear()
+
+    flushInput = reset_input_buffer
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+# --------------------------------------------------------------------------
+# I2C devices
+# --------------------------------------------------------------------------
+
+class FakeI2CMsg:
+    """smbus2 ``i2c_msg`` look-alike."""
+
+    def __init__(self, addr: int, data: bytes, is_read: bool):
+        self.addr = addr
+        self.is_read = is_read
+        self.len = len(data)
+        self._data = bytearray(data)
+
+    @classmethod
+    def write(cls, address: int, buf):
+        return cls(address, bytes(buf), False)
+
+    @classmethod
+    def read(cls, address: int, length: int):
+        return cls(address, bytes(length), True)
+
+    @property
+    def buf(self):
+        # smbus2 exposes a ctypes char array: indexing yields 1-byte bytes
+        return [bytes((b,)) for b in self._data]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __bytes__(self):
+        return bytes(self._data)
+
+    def __len__(self):
+        return self.len
+
+
+class FakeSPS30I2C:
+    """SPS30 I2C command interface with Sensirion CRC words."""
+
+    ARTICLE_CODE = b"00080000".ljust(32, b"\x00")
+    SERIAL = b"FAKE0000000000000031".ljust(32, b"\x00")
+
+    def __init__(self):
+        self._rng = _rng("sps30-i2c")
+        self._pointer = 0
+        self.measuring_since = None
+
+    def write(self, data: bytes):
+        if len(data) < 2:
+            return
+        self._pointer = (data[0] << 8) | data[1]
+        if self._pointer == 0x0010:
+            self.measuring_since = time.monotonic()
+        elif self._pointer in (0x0104, 0xD304):
+            self.measuring_since = None
+
+    def read(self, length: int) -> bytes:
+        if self._pointer == 0x0202:
+            ready = self.measuring_since is not None and time.monotonic() - self.measuring_since >= 1.0
+            data = sensirion_words(bytes((0, int(ready))))
+        elif self._pointer == 0x0300:
+            data = sensirion_words(struct.pack(">10f", *_pm_values(self._rng)))
+        elif self._pointer == 0xD025:
+            data = sensirion_words(self.ARTICLE_CODE)
+        elif self._pointer == 0xD033:
+            data = sensirion_words(self.SERIAL)
+        elif self._pointer == 0x8004:
+            data = sensirion_words(struct.pack(">I", 604800))
+        else:
+            data = b""
+        return data[:length].ljust(length, b"\x00")
+
+
+class FakeSMBus:
+    """smbus2 ``SMBus`` look-alike. Unknown addresses behave as plain register files."""
+
+    def __init__(self, port: int = 1):
+        self.port = port
+        self.devices = {0x69: FakeSPS30I2C()}
+        self.registers = {SENSORS["bme280"]["address"]: FakeBME280.registers()}
+        self._faults = FaultInjector(f"i2c-{port}")
+
+    def _registers(self, address: int) -> dict:
+        return self.registers.setdefault(address, {})
+
+    def i2c_rdwr(self, *msgs):
+        self._faults.check()
+        for msg in msgs:
+            device = self.devices.get(msg.addr)
+            if device is None:
+                raise OSError(errno.EREMOTEIO, f"[fake] No device at 0x{msg.addr:02X}")
+            if msg.is_read:
+                msg._data[:] = device.read(msg.len)
+            else:
+                device.write(bytes(msg._data))
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        self._faults.check()
+        return self._registers(address).get(register, 0)
+
+    def write_byte_data(self, address: int, register: int, value: int):
+        self._faults.check()
+        self._registers(address)[register] = value & 0xFF
+
+    def read_i2c_block_data(self, address: int, register: int, length: int) -> list:
+        self._faults.check()
+        registers = self._registers(address)
+        return [registers.get(register + i, 0) for i in range(length)]
+
+    def write_i2c_block_data(self, address: int, register: int, data):
+        self._faults.check()
+        registers = self._registers(address)
+        for i, value in enumerate(data):
+            registers[register + i] = value & 0xFF
+
+    def close(self):
+        pass
+
+
+class _BME280Reading:
+    def __init__(self, temperature: float, pressure: float, humidity: float):
+        self.timestamp = time.time()
+        self.temperature = temperature
+        self.pressure = pressure
+        self.humidity = humidity
+
+
+class FakeBME280:
+    """Stand-in for the RPi.bme280 module."""
+
+    _random = _rng("bme280")
+    _faults = FaultInjector("bme280")
+    CALIBRATION = {"dig_T1": 28485, "dig_T2": 26735, "dig_T3": 50}
+
+    class params(dict):
+        def __getattr__(self, name):
+            try:
+                return self[name]
+            except KeyError:
+                raise AttributeError(name)
+
+        __setattr__ = dict.__setitem__
+
+    @classmethod
+    def registers(cls) -> dict:
+        """Chip ID and temperature calibration registers, as read over the bus."""
+        calibration = struct.pack("<Hhh", cls.CALIBRATION["dig_T1"], cls.CALIBRATION["dig_T2"],
+                                  cls.CALIBRATION["dig_T3"])
+        registers = {0xD0: 0x60}
+        registers.update((0x88 + i, value) for i, value in enumerate(calibration))
+        return registers
+
+    @classmethod
+    def load_calibration_params(cls, bus, address: int = 0x76):
+        cls._faults.check()
+        return cls.params(cls.CALIBRATION, address=address)
+
+    @classmethod
+    def sample(cls, bus, address: int = 0x76, compensation_params=None, sampling=None):
+        cls._faults.check()
+        return _BME280Reading(
+            temperature=_wave(18, 6, 86400) + cls._random.gauss(0, 0.05),
+            pressure=_wave(1013, 4, 43200) + cls._random.gauss(0, 0.1),
+            humidity=min(100.0, max(0.0, _wave(55, 15, 86400, math.pi) + cls._random.gauss(0, 0.3)))
+        )
+
+
+class FakeLTR390:
+    """Stand-in for ``adafruit_ltr390.LTR390``."""
+
+    ALS = 0
+    UV = 1
+
+    def __init__(self, i2c):
+        self.i2c = i2c
+        self.gain = 1       # GAIN_3X
+        self.resolution = 2  # RESOLUTION_18BIT
+        self.mode = self.ALS
+        self._rng = _rng("ltr390")
+        self._faults = FaultInjector("ltr390")
+
+    def _daylight(self) -> float:
+        return max(0.0, _wave(0, 1, 86400, -math.pi / 2) + 0.2)
+
+    @property
+    def light(self) -> int:
+        self._faults.check()
+        self.mode = self.ALS
+        return int(self._daylight() * 40000 + self._rng.randint(0, 20))
+
+    @property
+    def lux(self) -> float:
+        return self.light * 0.6 / 3
+
+    @property
+    def uvs(self) -> int:
+        self._faults.check()
+        self.mode = self.UV
+        # Counts for a UV index peaking at 8, scaled like the real sensor
+        gain = (1, 3, 6, 9, 18)[self.gain]
+        resolution = (20, 19, 18, 17, 16, 13)[self.resolution]
+        counts_per_uvi = 2300 * (gain / 18) * 2 ** (resolution - 20)
+        return int(self._daylight() * 8 * counts_per_uvi + self._rng.randint(0, 2))
+
+    @property
+    def data_ready(self) -> bool:
+        return True
+
+
+class FakeDS3231:
+    """In-memory DS3231 keeping a fixed offset from the system clock."""
+
+    def __init__(self, i2c):
+        self.i2c = i2c
+        self._offset = float(FAKE_BACKEND["rtc_offset"])
+        self._faults = FaultInjector("ds3231")
+        self.lost_power = False
+
+    @property
+    def datetime(self) -> time.struct_time:
+        self._faults.check()
+        return time.localtime(time.time() + self._offset)
+
+    @datetime.setter
+    def datetime(self, value: time.struct_time):
+        self._faults.check()
+        self._offset = time.mktime(value) - time.time()
+
+
+class FakeMCP3008:
+    """MCP3008 channel wandering slowly around the wind vane's voltage range."""
+
+    def __init__(self, channel: int = 0):
+        self.channel = channel
+        self._rng = _rng(f"mcp3008:{channel}")
+        self._faults = FaultInjector(f"mcp3008:{channel}")
+        self._position = self._rng.random()
+
+    @property
+    def value(self) -> float:
+        self._faults.check()
+        self._position = (self._position + self._rng.gauss(0, 0.01)) % 1.0
+        return 0.06 + self._position * 0.84
+
+    def close(self):
+        pass
+
+
+class FakeGPIO:
+    """No-op stand-in for the RPi.GPIO module."""
+
+    BCM = 11
+    OUT = 0
+    IN = 1
+    HIGH = 1
+    LOW = 0
+
+    _levels = {}
+
+    @staticmethod
+    def setwarnings(flag):
+        pass
+
+    @staticmethod
+    def setmode(mode):
+        pass
+
+    @classmethod
+    def setup(cls, pin, direction, initial=LOW):
+        cls._levels[pin] = initial
+
+    @classmethod
+    def output(cls, pin, level):
+        cls._levels[pin] = level
+
+    @classmethod
+    def input(cls, pin):
+        return cls._levels.get(pin, cls.LOW)
+
+    @staticmethod
+    def cleanup(*pins):
+        pass
+
+
+# --------------------------------------------------------------------------
+# gpiozero
+# --------------------------------------------------------------------------
+
+_factory_lock = threading.Lock()
+_pulse_threads = {}
+
+
+def install_mock_pin_factory():
+    """Make gpiozero use its mock pin factory for every device."""
+    from gpiozero import Device
+    from gpiozero.pins.mock import MockFactory
+
+    with _factory_lock:
+        if not isinstance(Device.pin_factory, MockFactory):
+            Device.pin_factory = MockFactory()
+        return Device.pin_factory
+
+
+def _pulse_interval(pin: int):
+    if pin == SENSORS["speed"]["pin"]:
+        return lambda: 1.0 / max(0.1, _wave(FAKE_BACKEND["wind_pulse_hz"], FAKE_BACKEND["wind_pulse_hz"] / 2, 600))
+    if pin == SENSORS["rain"]["pin"]:
+        return lambda: FAKE_BACKEND["rain_tip_interval"]
+    return None
+
+
+def start_pulses(pin: int):
+    """Press and release a mock pin periodically: anemometer pulses or rain bucket tips."""
+    interval = _pulse_interval(pin)
+    if interval is None or pin in _pulse_threads:
+        return
+
+    mock_pin = install_mock_pin_factory().pin(pin)
+    rng = _rng(f"pulses:{pin}")
+
+    def run():
+        while True:
+            time.sleep(interval() * rng.uniform(0.9, 1.1))
+            mock_pin.drive_low()
+            mock_pin.drive_high()
+
+    thread = threading.Thread(target=run, name=f"fake-pulses-{pin}", daemon=True)
+    _pulse_threads[pin] = thread
+    thread.start()
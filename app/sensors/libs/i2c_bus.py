@@ -0,0 +1,162 @@
+"""
+Shared I2C bus manager.
+
+Every device on a bus goes through the same ``I2CBus``: one SMBus handle per
+port, opened through ``drivers``, and one lock that a device holds for a
+whole transaction so transfers from concurrent readers never interleave.
+The Adafruit drivers (LTR390, DS3231) get a ``busio.I2C``-compatible adapter
+over the same handle. Transaction latency is recorded per device address.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from . import drivers
+
+_buses = {}
+_buses_lock = threading.Lock()
+
+
+def get_bus(port: int) -> "I2CBus":
+    """Return the shared bus for `port`, opening it on first use."""
+    with _buses_lock:
+        bus = _buses.get(port)
+        if bus is None:
+            bus = _buses[port] = I2CBus(port)
+        return bus
+
+
+def bus_stats() -> dict:
+    """Per-device transaction statistics of every open bus, keyed by port."""
+    with _buses_lock:
+        buses = list(_buses.values())
+    return {bus.port: bus.stats() for bus in buses}
+
+
+class DeviceStats:
+    """Transaction count, errors and latency for one device address."""
+
+    def __init__(self):
+        self.transactions = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    def record(self, elapsed: float, failed: bool):
+        self.transactions += 1
+        self.errors += failed
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.last_time = elapsed
+
+    def as_dict(self) -> dict:
+        mean = self.total_time / self.transactions if self.transactions else 0.0
+        return {
+            "transactions": self.transactions,
+            "errors": self.errors,
+            "mean_ms": round(mean * 1000, 3),
+            "max_ms": round(self.max_time * 1000, 3),
+            "last_ms": round(self.last_time * 1000, 3)
+        }
+
+
+class I2CBus:
+    def __init__(self, port: int):
+        self.port = port
+        self.bus = drivers.open_smbus(port)
+        self.msg = drivers.i2c_msg()
+        self.lock = threading.RLock()
+        self._stats = {}
+
+    @contextmanager
+    def transaction(self, address: int):
+        """
+        Hold the bus for a sequence of transfers to `address` and yield the SMBus handle.
+
+        The lock is reentrant, so a driver that nests transactions (or the
+        busio adapter inside a locked section) does not deadlock itself.
+        """
+        with self.lock:
+            start = time.perf_counter()
+            failed = True
+            try:
+                yield self.bus
+                failed = False
+            finally:
+                self._record(address, time.perf_counter() - start, failed)
+
+    def i2c_rdwr(self, address: int, *msgs):
+        """Run the messages as one combined transfer (repeated start between them)."""
+        with self.transaction(address) as bus:
+            bus.i2c_rdwr(*msgs)
+
+    def write(self, address: int, data):
+        self.i2c_rdwr(address, self.msg.write(address, data))
+
+    def write_read(self, address: int, data, length: int) -> bytes:
+        """Write `data`, then read `length` bytes in the same combined transfer."""
+        read = self.msg.read(address, length)
+        if data:
+            self.i2c_rdwr(address, self.msg.write(address, data), read)
+        else:
+            self.i2c_rdwr(address, read)
+        return bytes(read)
+
+    def busio(self) -> "BusioAdapter":
+        return BusioAdapter(self)
+
+    def _record(self, address: int, elapsed: float, failed: bool):
+        stats = self._stats.get(address)
+        if stats is None:
+            stats = self._stats[address] = DeviceStats()
+        stats.record(elapsed, failed)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {f"0x{address:02X}": stats.as_dict() for address, stats in self._stats.items()}
+
+
+class BusioAdapter:
+    """
+    ``busio.I2C`` interface over a shared ``I2CBus`` for the Adafruit drivers.
+
+    adafruit_bus_device spins on try_lock() around every register access;
+    here it blocks on the shared bus lock instead, so the Adafruit drivers
+    wait their turn like everything else on the bus.
+    """
+
+    def __init__(self, bus: I2CBus):
+        self._bus = bus
+
+    def try_lock(self) -> bool:
+        return self._bus.lock.acquire()
+
+    def unlock(self):
+        self._bus.lock.release()
+
+    def scan(self) -> list:
+        found = []
+        for address in range(0x08, 0x78):
+            try:
+                self._bus.write_read(address, b"", 1)
+                found.append(address)
+            except OSError:
+                pass
+        return found
+
+    def writeto(self, address: int, buffer, *, start: int = 0, end: int = None):
+        self._bus.write(address, bytes(buffer[start:end]))
+
+    def readfrom_into(self, address: int, buffer, *, start: int = 0, end: int = None):
+        end = len(buffer) if end is None else end
+        buffer[start:end] = self._bus.write_read(address, b"", end - start)
+
+    def writeto_then_readfrom(self, address: int, buffer_out, buffer_in, *, out_start: int = 0,
+                              out_end: int = None, in_start: int = 0, in_end: int = None):
+        in_end = len(buffer_in) if in_end is None else in_end
+        buffer_in[in_start:in_end] = self._bus.write_read(
+            address, bytes(buffer_out[out_start:out_end]), in_end - in_start)
+
+    def deinit(self):
+        pass
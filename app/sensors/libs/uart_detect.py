@@ -0,0 +1,114 @@
+"""
+Identify the air quality sensor on a UART in one listening pass per baud rate.
+
+A PMS5003 (9600 baud, streams 0x42 0x4D frames) and an SPS30 (115200 baud,
+SHDLC) can be wired to the same port. For every candidate baud rate the port
+is opened once, wake-up and read requests for both protocols are written
+(each device ignores the other's bytes) and the input is watched for either
+a checksummed PMS5003 frame or the SPS30 device-information response. The
+first valid frame classifies the device; a baud rate with no valid frame
+within its window moves on to the next.
+"""
+import time
+
+from . import drivers
+from .PMS5003 import (PMS5003_SOF, PMS5003_FRAME_LENGTH, PMS5003_FRAME_SIZE, PMS5003_CMD_READ,
+                      PMS5003_CMD_SLEEP, command_frame)
+from .SPS30_UART import ShdlcDecoder, make_frame, SPS30
+
+READ_TIMEOUT = 0.05  # Seconds a single read waits, so the window deadline is checked often
+
+# A PMS5003 left asleep or in passive mode answers only to these; a sleeping
+# SPS30 needs a falling edge on RX (0xFF) shortly before its wake-up command
+_REQUESTS = (
+    command_frame(PMS5003_CMD_SLEEP, 1) + command_frame(PMS5003_CMD_READ)
+    + b'\xff' + make_frame(SPS30.WAKE_UP) + make_frame(SPS30.DEVICE_INFORMATION, bytes((0x03,)))
+)
+
+
+def _pms_frame(buf: bytearray) -> bool:
+    """Whether `buf` holds a valid PMS5003 frame; consumes the bytes before any partial frame."""
+    while True:
+        sof = buf.find(PMS5003_SOF)
+        if sof < 0:
+            del buf[:-1]
+            return False
+        del buf[:sof]
+        if len(buf) < 4:
+            return False
+        if int.from_bytes(buf[2:4], "big") != PMS5003_FRAME_LENGTH:
+            del buf[:2]
+            continue
+        if len(buf) < PMS5003_FRAME_SIZE:
+            return False
+        if sum(buf[:PMS5003_FRAME_SIZE - 2]) == int.from_bytes(buf[PMS5003_FRAME_SIZE - 2:PMS5003_FRAME_SIZE], "big"):
+            return True
+        del buf[:2]
+
+
+def _sps30_serial(decoder: ShdlcDecoder):
+    """Serial number from a device-information response in `decoder`, or None."""
+    while True:
+        try:
+            frame = decoder.next_frame()
+        except ValueError:
+            continue  # Invalid stuffing: noise at the wrong baud rate
+        if frame is None:
+            return None
+        if (len(frame) >= 5 and frame[1] == SPS30.DEVICE_INFORMATION and frame[2] == 0
+                and len(frame) == 5 + frame[3] and (~sum(frame[:-1])) & 0xFF == frame[-1]):
+            return frame[4:-1].decode('ascii', 'replace').strip('\x00')
+
+
+def _listen(port: str, baudrate: int, window: float):
+    ser = drivers.open_serial(port, baudrate, READ_TIMEOUT)
+    try:
+        ser.reset_input_buffer()
+        ser.write(_REQUESTS)
+
+        decoder = ShdlcDecoder()
+        pms = bytearray()
+        deadline = time.monotonic() + window
+        while time.monotonic() < deadline:
+            chunk = ser.read(max(1, ser.in_waiting))
+            if not chunk:
+                continue
+            decoder.feed(chunk)
+            pms += chunk
+
+            serial = _sps30_serial(decoder)
+            if serial is not None:
+                return {"device": "sps30", "baudrate": baudrate, "serial": serial}
+            if _pms_frame(pms):
+                return {"device": "pms5003", "baudrate": baudrate, "serial": None}
+        return None
+    finally:
+        ser.close()
+
+
+def detect(port: str, candidates: list):
+    """
+    Identify the device on `port`.
+
+    Args:
+        port: Serial device path.
+        candidates: (baudrate, window seconds) pairs. Baud rates are tried
+            shortest window first; one listed twice is listened to once, for
+            the longer window.
+
+    Returns:
+        {"device": "pms5003" | "sps30", "baudrate": int, "serial": str | None},
+        or None if no candidate produced a valid frame.
+
+    Raises:
+        OSError: If the port cannot be opened.
+    """
+    windows = {}
+    for baudrate, window in candidates:
+        windows[baudrate] = max(window, windows.get(baudrate, 0))
+
+    for baudrate, window in sorted(windows.items(), key=lambda item: item[1]):
+        result = _listen(port, baudrate, window)
+        if result is not None:
+            return result
+    return None
@@ -1,15 +1,50 @@
-from adafruit_ltr390 import LTR390
+import time
+
 from config import SENSORS
-import busio, board
 from logger_config import logging
-import datetime, requests
+from .libs import drivers
+from .libs.i2c_bus import get_bus
+from utils.uv_forecast import UVForecastCache
+
+# Register values of the gain and resolution settings
+GAIN_BITS = {1: 0, 3: 1, 6: 2, 9: 3, 18: 4}
+RESOLUTION_BITS = {20: 0, 19: 1, 18: 2, 17: 3, 16: 4, 13: 5}
+
+# Conversion time of each resolution (LTR390 datasheet)
+CONVERSION_SECONDS = {20: 0.4, 19: 0.2, 18: 0.1, 17: 0.05, 16: 0.025, 13: 0.0125}
+
+# UVS counts per UV index at gain 18x and 20-bit resolution (LTR390 datasheet)
+UV_SENSITIVITY = 2300
+
 
 class LTR390Sensor:
     def __init__(self):
         conf = SENSORS["ltr390"]
         self.working = conf["working"]
         self.sensor = None
+        self.port = conf["port"]
         self.i2c = None
+        self.uv_source = conf["uv_source"]
+        self.gain = conf["gain"]
+        self.resolution = conf["resolution"]
+        self.uv_gain = conf["uv_gain"]
+        self.uv_resolution = conf["uv_resolution"]
+        self.uv_calibration = conf["uv_calibration"]
+        self.uv_forecast = None
+
+        for gain, resolution in ((self.gain, self.resolution), (self.uv_gain, self.uv_resolution)):
+            if gain not in GAIN_BITS or resolution not in RESOLUTION_BITS:
+                raise ValueError(f"[LTR390] Unsupported gain {gain} or resolution {resolution}")
+
+        if self.working and self.uv_source == "api":
+            self.uv_forecast = UVForecastCache(
+                conf["latitude"],
+                conf["longitude"],
+                conf["uv_cache_file"],
+                conf["uv_cache_ttl"]
+            )
+            if self.uv_forecast.is_stale():
+                self.uv_forecast.refresh_async()  # Have a forecast ready before the first reading
 
         if self.working:
             self.setup_sensor()
@@ -18,49 +53,65 @@ class LTR390Sensor:
 
     def setup_sensor(self):
         try:
-            self.i2c = busio.I2C(board.SCL, board.SDA)
-            self.sensor = LTR390(self.i2c)
-            logging.info("[LTR390] Initialized")
-            # self.sensor.resolution = adafruit_ltr390.LTR390.RESOLUTION_20BIT
-            # self.sensor.gain = adafruit_ltr390.LTR390.GAIN_18X
+            self.i2c = get_bus(self.port).busio()
+            self.sensor = drivers.ltr390(self.i2c)
+            self._configure(self.gain, self.resolution)
+            logging.info(f"[LTR390] Initialized (gain {self.gain}x, {self.resolution}-bit, UV from {self.uv_source})")
         except Exception as e:
             logging.error(f"[LTR390] Init failed: {e}")
             self.sensor = None
             return False
 
-    def fetch_uv_from_api(self) -> float or None:
-        try:
-            lat, lon = 40.18, 44.51
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&hourly=uv_index&timezone=auto"
-            response = requests.get(url, timeout=5)
-            response.raise_for_status()
+    def _configure(self, gain: int, resolution: int):
+        self.sensor.gain = GAIN_BITS[gain]
+        self.sensor.resolution = RESOLUTION_BITS[resolution]
 
-            data = response.json()
-            times = data["hourly"]["time"]
-            uvs = data["hourly"]["uv_index"]
+    def _wait_for_conversion(self, resolution: int):
+        """
+        Wait until a conversion at the current settings has completed.
 
-            now = datetime.datetime.now().strftime("%Y-%m-%dT%H:00")
+        Reading the status clears the data ready flag. The first flag after a
+        settings change can still come from a conversion started before it, so
+        the one after that is waited for.
+        """
+        timeout = 2 * CONVERSION_SECONDS[resolution] + 0.5
+        self.sensor.data_ready  # Clears a flag set before the change
+        for _ in range(2):
+            deadline = time.monotonic() + timeout
+            while not self.sensor.data_ready:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"no conversion completed within {timeout:.2f}s")
+                time.sleep(0.01)
 
-            if now in times:
-                idx = times.index(now)
-                return round(uvs[idx])
-            else:
-                logging.warning("Current hour not found in UV API response.")
-
-        except requests.exceptions.ConnectionError:
-            logging.warning("No internet or DNS failure while fetching UV index — using fallback.")
-        except requests.exceptions.Timeout:
-            logging.warning("Open-Meteo API request timed out — using fallback.")
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Request error while fetching UV index from Open-Meteo: {e}")
-        except Exception as e:
-            logging.error(f"Unexpected error fetching UV index: {e}", exc_info=True)
+    def fetch_uv_from_api(self) -> float or None:
+        """UV index for the current hour from the cached Open-Meteo forecast (no network on this path)."""
+        return self.uv_forecast.lookup()
 
+    def uv_index_from_counts(self, uvs: int) -> float:
+        """Convert raw UVS counts to a UV index for the configured UVS gain and resolution."""
+        sensitivity = UV_SENSITIVITY * (self.uv_gain / 18) * 2 ** (self.uv_resolution - 20)
+        return uvs / sensitivity * self.uv_calibration
+
+    def read_uv_from_sensor(self) -> float or None:
+        """Switch the sensor to UVS mode and compute the UV index locally."""
+        try:
+            self._configure(self.uv_gain, self.uv_resolution)
+            try:
+                self.sensor.uvs  # Switches to UVS mode; this sample was converted at the previous settings
+                self._wait_for_conversion(self.uv_resolution)
+                return round(self.uv_index_from_counts(self.sensor.uvs))
+            finally:
+                self._configure(self.gain, self.resolution)
+        except (AttributeError, OSError) as e:
+            logging.error(f"[LTR390] Error while reading LTR390 UVS: {e}")
+        except Exception as e:
+            logging.error(f"[LTR390] Unhandled exception while reading LTR390 UVS: {e}", exc_info=True)
         return None
 
     def read_data(self) -> dict:
         """
-        Reads lux from the LTR390 sensor and UV index from the Open-Meteo API.
+        Reads lux from the LTR390 sensor (ALS mode) and the UV index, either
+        computed from the UVS channel or from the cached Open-Meteo forecast.
 
         Returns:
             dict: Dictionary containing light data (uv and lux).
@@ -76,11 +127,10 @@ class LTR390Sensor:
             except Exception as e:
                 logging.error(f"[LTR390] Unhandled exception while reading LTR390 lux: {e}", exc_info=True)
 
-            uv_from_api = self.fetch_uv_from_api()
-            if uv_from_api is not None:
-                data["uv"] = uv_from_api
+            if self.uv_source == "sensor":
+                data["uv"] = self.read_uv_from_sensor()
             else:
-                data["uv"] = None
+                data["uv"] = self.fetch_uv_from_api()
         return data
 
 if __name__=="__main__":
@@ -1,31 +1,114 @@
-from gpiozero import Button
 from config import SENSORS
 from logger_config import logging
+from .libs import drivers
+import mmap
+import os
+import struct
+import threading
 import time
 
+
 class RainSensor:
+    """
+    Rain gauge — counts bucket tips in a memory-mapped state file.
+
+    The file holds the total and already reported tip counters followed by a
+    ring of tip timestamps, so a restart or crash during a storm keeps every
+    tip since the last transmission. A tip costs two stores into the mapping;
+    the kernel writes the pages back, read_data flushes them once per window.
+    """
+
+    MAGIC = b"RAIN"
+    HEADER = struct.Struct("=4sII")  # magic, version, capacity
+    VERSION = 1
+    COUNTERS_OFFSET = 16             # total tips, reported tips (two uint64)
+    TIMES_OFFSET = 32                # capacity x float64 time.time() of each tip
+
     def __init__(self):
         conf = SENSORS["rain"]
         self.working = conf["working"]
-        self.rain = Button(conf["pin"])
         self.bucket_size = conf["bucket_size"]
+        self.capacity = conf["tip_buffer"]
+        self._lock = threading.Lock()
+        self._open_state(conf["state_file"])
+
+        self.rain = drivers.button(conf["pin"])
         self.rain.when_pressed = self._increment
-        logging.info("[Rain] Initialized")
+        logging.info(f"[Rain] Initialized ({self.count} unreported tips restored)")
 
-        self.count = 0
         self.last_time = time.time()
 
+    def _open_state(self, path):
+        size = self.TIMES_OFFSET + 8 * self.capacity
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            header = os.pread(fd, self.HEADER.size, 0)
+            fresh = header != self.HEADER.pack(self.MAGIC, self.VERSION, self.capacity) or os.fstat(fd).st_size != size
+            if fresh:
+                if header[:4] == self.MAGIC:
+                    logging.warning(f"[Rain] State file {path} has a different layout, starting from zero")
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, self.HEADER.pack(self.MAGIC, self.VERSION, self.capacity), 0)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        view = memoryview(self._map)
+        self._counters = view[self.COUNTERS_OFFSET:self.TIMES_OFFSET].cast("Q")
+        self._times = view[self.TIMES_OFFSET:].cast("d")
+
+    @property
+    def count(self) -> int:
+        """Tips since the last read_data."""
+        return self._counters[0] - self._counters[1]
+
     def _increment(self):
-        self.count += 1
+        now = time.time()
+        with self._lock:
+            total = self._counters[0]
+            self._times[total % self.capacity] = now
+            self._counters[0] = total + 1
 
     def clear_data(self):
-        self.count = 0
+        with self._lock:
+            self._counters[1] = self._counters[0]
+        self._map.flush()
+
+    def cleanup(self):
+        """Release the GPIO pin and write back and unmap the state file."""
+        self.rain.close()
+        with self._lock:
+            self._map.flush()
+            self._counters.release()
+            self._times.release()
+            self._map.close()
+
+    def _peak_intensity(self, timestamps, window: float) -> float:
+        """Highest rain rate in mm/h over any `window` seconds."""
+        most = 0
+        first = 0
+        for last, t in enumerate(timestamps):
+            while t - timestamps[first] >= window:
+                first += 1
+            most = max(most, last - first + 1)
+        return round(most * self.bucket_size * 3600 / window, 2)
 
     def read_data(self):
+        """Return the accumulation in mm and peak 1 and 5 minute intensities in mm/h since the previous call."""
         data = None
         if self.working:
-            result = self.count * self.bucket_size
-            self.clear_data()  # Clear count after reading
-            data = round(result, 2)
+            with self._lock:
+                total, reported = self._counters[0], self._counters[1]
+                first = max(reported, total - self.capacity)  # Older timestamps were overwritten
+                timestamps = sorted(self._times[i % self.capacity] for i in range(first, total))
+                self._counters[1] = total
+            self._map.flush()
+
+            data = {
+                "rain": round((total - reported) * self.bucket_size, 2),
+                "rain_intensity_1m": self._peak_intensity(timestamps, 60),
+                "rain_intensity_5m": self._peak_intensity(timestamps, 300)
+            }
 
         return data
@@ -1,14 +1,88 @@
-from .bme280 import BME280Sensor
-from .ltr390 import LTR390Sensor
-from .air_quality import AirQualitySensor
-from .rain import RainSensor
-from .wind import WindSpeedSensor, WindDirectionSensor
-
-sensors = {
-    "tph": BME280Sensor,
-    "light": LTR390Sensor,
-    "airQuality": AirQualitySensor,
-    "speed": WindSpeedSensor,
-    "rain": RainSensor,
-    "direction": WindDirectionSensor
-}
\ No newline at end of file
+import importlib
+from config import SENSORS
+from logger_config import logging
+
+# Returned by read_data while a sensor is still warming up. Not a failure and
+# not a value, the reading is simply skipped.
+NOT_READY = object()
+
+# Sensor name -> (module, class). Driver modules are imported only when the
+# sensor is enabled in config, so a missing library disables just that sensor.
+SENSOR_REGISTRY = {
+    "tph": (".bme280", "BME280Sensor"),
+    "light": (".ltr390", "LTR390Sensor"),
+    "airQuality": (".air_quality", "AirQualitySensor"),
+    "speed": (".wind", "WindSpeedSensor"),
+    "rain": (".rain", "RainSensor"),
+    "direction": (".wind", "WindDirectionSensor"),
+}
+
+
+# Sensor name -> SENSORS entries its driver reads
+SENSOR_CONFIG_KEYS = {
+    "tph": ("bme280",),
+    "light": ("ltr390",),
+    "airQuality": ("pms5003", "sps30"),
+    "speed": ("speed",),
+    "rain": ("rain",),
+    "direction": ("direction",),
+}
+
+
+def is_enabled(name: str) -> bool:
+    """Check whether the config entry behind a registered sensor is enabled."""
+    if name == "tph":
+        return SENSORS["bme280"]["working"]
+    if name == "light":
+        return SENSORS["ltr390"]["working"]
+    if name == "airQuality":
+        sps = SENSORS["sps30"]
+        return SENSORS["pms5003"]["working"] or sps["uart"]["working"] or sps["i2c"]["working"]
+    return SENSORS[name]["working"]
+
+
+def sensor_bus(name: str) -> str:
+    """
+    Return the bus a registered sensor is attached to.
+
+    Sensors on the same bus are initialized one after another, sensors on
+    different buses can be initialized concurrently. All gpiozero devices share
+    the default pin factory, so they are treated as one bus.
+    """
+    if name == "tph":
+        return f"i2c-{SENSORS['bme280']['port']}"
+    if name == "light":
+        return f"i2c-{SENSORS['ltr390']['port']}"
+    if name == "airQuality":
+        sps = SENSORS["sps30"]
+        if not SENSORS["pms5003"]["working"] and not sps["uart"]["working"]:
+            return f"i2c-{sps['i2c']['port']}"
+        return "uart"
+    return "gpio"
+
+
+def load_sensor_class(name: str):
+    """Import the module of a registered sensor and return its class."""
+    module_name, class_name = SENSOR_REGISTRY[name]
+    module = importlib.import_module(module_name, __package__)
+    return getattr(module, class_name)
+
+
+def load_sensors() -> dict:
+    """
+    Import the classes of all enabled sensors.
+
+    Returns:
+        dict: Sensor name -> sensor class, in registry order. Disabled sensors
+        and sensors whose driver fails to import are left out.
+    """
+    sensors = {}
+    for name in SENSOR_REGISTRY:
+        if not is_enabled(name):
+            logging.info(f"[Sensors] {name} disabled in config, not loading driver")
+            continue
+        try:
+            sensors[name] = load_sensor_class(name)
+        except Exception as e:
+            logging.error(f"[Sensors] Failed to load driver for {name}: {e}")
+    return sensors
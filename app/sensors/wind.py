@@ -1,53 +1,148 @@
 from logger_config import logging
-from gpiozero import Button, MCP3008
 from config import SENSORS
+from .libs import drivers
+from utils.probe_cache import probe_cache
+from array import array
+import math
+import threading
 import time
 
 class WindSpeedSensor:
-    """Wind Speed Sensor — counts pulses from an anemometer and converts to speed."""
+    """
+    Wind Speed Sensor — timestamps pulses from an anemometer and converts them to speed.
+
+    Every pulse stores its time.monotonic() timestamp in a preallocated ring
+    buffer under a lock, so the per-pulse cost stays constant at any wind
+    speed. read_data turns the pulses since the previous call into the mean
+    speed, the WMO-style gust (highest running mean over gust_seconds) and the
+    standard deviation of the 1 s speeds. The standard deviation pools every
+    1 s speed since start(), so the last reading of a measurement period holds
+    the deviation over the whole period.
+    """
 
     def __init__(self):
         conf = SENSORS["speed"]
         self.working = conf["working"]
-        self.speed = Button(conf["pin"])
+        self.speed_coefficient = conf["speed_coefficient"]  # km/h per pulse per second
+        self.gust_seconds = conf["gust_seconds"]
+        self.capacity = conf["pulse_buffer"]
+
+        self._pulses = array("d", bytes(8 * self.capacity))
+        self._head = 0       # Total pulses recorded
+        self._read_head = 0  # Value of _head at the previous read_data
+        self._lock = threading.Lock()
+        self.last_time = time.monotonic()
+        self._bin_moments = [0, 0.0, 0.0]  # 1 s speeds since start(): count, sum, sum of squares
+
+        self.speed = drivers.button(conf["pin"])
         self.speed.when_pressed = self._increment
-        self.count = 0
-        self.last_time = time.time()
         logging.info("[Wind speed] Initialized")
 
+    @property
+    def count(self) -> int:
+        """Pulses recorded since the previous read_data."""
+        return self._head - self._read_head
+
     def _increment(self):
-        self.count += 1
+        now = time.monotonic()
+        with self._lock:
+            self._pulses[self._head % self.capacity] = now
+            self._head += 1
+
+    def start(self):
+        """Begin a measurement period: drop the pulses since the previous read and the pooled 1 s speeds."""
+        with self._lock:
+            self._read_head = self._head
+            self.last_time = time.monotonic()
+        self._bin_moments = [0, 0.0, 0.0]
+
+    def _take_window(self):
+        """Atomically take the pulses since the previous call and start a new window."""
+        with self._lock:
+            now = time.monotonic()
+            count = self._head - self._read_head
+            first = max(self._read_head, self._head - self.capacity)  # Older timestamps were overwritten
+            start, end = first % self.capacity, self._head % self.capacity
+            if self._head == first:
+                timestamps = array("d")
+            elif start < end:
+                timestamps = self._pulses[start:end]
+            else:
+                timestamps = self._pulses[start:] + self._pulses[:end]
+
+            self._read_head = self._head
+            window_start, self.last_time = self.last_time, now
+        return window_start, now, count, timestamps
 
     def read_data(self):
-        """Return wind speed in m/s (None if disabled or error)."""
-        data = {"speed": None}
+        """Return mean wind speed, gust and speed standard deviation in m/s (None if disabled or error)."""
+        data = {"speed": None, "gust": None, "speed_std": None}
         if self.working:
             try:
-                now = time.time()
-                elapsed = now - self.last_time
-                # Capture count atomically
-                current_count = self.count
-                self.count = 0
-                self.last_time = now
-
-                # Calculate speed (example calibration factor)
-                speed_kmh = (current_count / elapsed) * 2.4  # km/h
-                speed_m_s = speed_kmh / 3.6  # convert to m/s
-                data["speed"] = round(speed_m_s, 2)
+                window_start, now, count, timestamps = self._take_window()
+                elapsed = now - window_start
+                to_m_s = self.speed_coefficient / 3.6
+
+                data["speed"] = round(count / elapsed * to_m_s, 2)
+
+                # Pulses per 1 s bin; a trailing partial second joins the last bin
+                bins = [0] * max(1, int(elapsed))
+                last_bin = len(bins) - 1
+                for t in timestamps:
+                    bins[min(int(t - window_start), last_bin)] += 1
+                speeds = [pulses * to_m_s for pulses in bins]
+
+                span = min(self.gust_seconds, len(speeds))
+                running = sum(speeds[:span])
+                gust = running
+                for i in range(span, len(speeds)):
+                    running += speeds[i] - speeds[i - span]
+                    gust = max(gust, running)
+
+                data["gust"] = round(gust / span, 2)
+
+                moments = self._bin_moments
+                moments[0] += len(speeds)
+                moments[1] += sum(speeds)
+                moments[2] += sum(speed * speed for speed in speeds)
+                mean = moments[1] / moments[0]
+                data["speed_std"] = round(math.sqrt(max(0.0, moments[2] / moments[0] - mean * mean)), 2)
             except Exception as e:
                 logging.error(f"Error occured in WindSpeed: {e}")
         return data
 
+    def cleanup(self):
+        """Release the GPIO pin."""
+        self.speed.close()
+
 
 class WindDirectionSensor:
-    """Wind Direction Sensor — reads voltage from MCP3008 and returns 16-point compass direction."""
+    """
+    Wind Direction Sensor — reads voltage from MCP3008 and returns 16-point compass direction.
+
+    Between start() and stop() a background thread samples the ADC at
+    sample_rate_hz, maps each sample through a lookup table indexed by the raw
+    ADC value and counts it per direction. read_data returns the most frequent
+    direction since the previous call.
+    """
+
+    COMPASS = [
+        "N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+        "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"
+    ]
 
     def __init__(self):
         conf = SENSORS["direction"]
         self.working = conf["working"]
-        self.adc = MCP3008(channel=conf["adc_channel"])
+        self.adc = drivers.mcp3008(conf["adc_channel"])
         self.adc_max = conf["adc_max"]  # MCP3008 is 10-bit (0-1023)
         self.vref = conf["adc_vref"]
+        self.sample_rate = conf["sample_rate_hz"]
+
+        self._counts = [0] * len(self.COMPASS)
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop_event = threading.Event()
 
         # Your calibrated voltages for 16 directions
         self.volts = {
@@ -69,6 +164,7 @@ class WindDirectionSensor:
 
         # Calculate dynamic min/max ranges
         self._calculate_adc_ranges()
+        self._lut = self._load_lookup_table()
 
         logging.info("[Wind direction] Initialized")
 
@@ -101,35 +197,104 @@ class WindDirectionSensor:
                 return direction["angle"]
         return None
 
+    @staticmethod
+    def _angle_to_index(angle: float) -> int:
+        return int((angle + 11.25) // 22.5) % 16
+
     def _angle_to_direction(self, angle: float) -> str:
         """Convert angle (0–360) to 16-point compass direction"""
-        directions = [
-            "N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
-            "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"
-        ]
-        ix = int((angle + 11.25) // 22.5) % 16
-        return directions[ix]
+        return self.COMPASS[self._angle_to_index(angle)]
+
+    def _build_lookup_table(self) -> list:
+        """Map every raw ADC value to a compass index (-1 if no direction matches)."""
+        lut = []
+        for raw_adc in range(int(self.adc_max)):
+            angle = self._get_angle_from_adc(raw_adc)
+            lut.append(-1 if angle is None else self._angle_to_index(angle))
+        return lut
+
+    def _load_lookup_table(self) -> list:
+        """Lookup table from the probe cache, built and cached if missing or invalid."""
+        cache_conf = {"conf": SENSORS["direction"], "volts": self.volts}
+        cached = probe_cache.get("direction", cache_conf)
+        if cached is not None:
+            lut = cached.get("lut")
+            if (isinstance(lut, list) and len(lut) == int(self.adc_max)
+                    and all(isinstance(index, int) and -1 <= index < len(self.COMPASS) for index in lut)):
+                return lut
+            probe_cache.invalidate("direction")
+
+        lut = self._build_lookup_table()
+        probe_cache.put("direction", cache_conf, {"lut": lut})
+        return lut
+
+    def _sample_loop(self):
+        interval = 1.0 / self.sample_rate
+        lut = self._lut
+        last = len(lut) - 1
+        next_sample = time.monotonic()
+
+        while not self._stop_event.is_set():
+            try:
+                index = lut[min(int(self.adc.value * self.adc_max), last)]
+                if index >= 0:
+                    with self._lock:
+                        self._counts[index] += 1
+            except Exception as e:
+                logging.error(f"Error sampling Wind direction: {e}")
+
+            next_sample += interval
+            self._stop_event.wait(max(0.0, next_sample - time.monotonic()))
+
+    def start(self):
+        """Start the background sampler with fresh accumulators."""
+        if not self.working or self._sampler is not None:
+            return
+        with self._lock:
+            self._counts = [0] * len(self.COMPASS)
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="wind-direction", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        if self._sampler is None:
+            return
+        self._stop_event.set()
+        self._sampler.join()
+        self._sampler = None
+
+    def cleanup(self):
+        """Stop sampling and release the ADC."""
+        self.stop()
+        self.adc.close()
 
     def read_data(self):
-        """Take one wind direction reading and return compass direction."""
+        """Return the most frequent compass direction since the previous call."""
         data = {"direction": None}
-        if self.working:
-            try:
-                # gpiozero 2.x returns normalized 0.0-1.0
-                # Convert to raw ADC value (0-1023)
-                normalized_value = self.adc.value
-                raw_adc = normalized_value * self.adc_max
-                voltage = normalized_value * self.vref
+        if not self.working:
+            return data
 
-                # Find matching angle using dynamic ranges
-                angle = self._get_angle_from_adc(raw_adc)
+        if self._sampler is not None:
+            with self._lock:
+                counts, self._counts = self._counts, [0] * len(self.COMPASS)
+            if any(counts):
+                data["direction"] = self.COMPASS[counts.index(max(counts))]
+                return data
 
-                if angle is not None:
-                    direction = self._angle_to_direction(angle)
-                    data["direction"] = direction
-                else:
-                    logging.warning(f"[Wind Dir] No match for ADC: {raw_adc:.1f} (V: {voltage:.2f}V)")
+        # Sampler not running or no samples yet: take a single reading
+        try:
+            # gpiozero 2.x returns normalized 0.0-1.0
+            # Convert to raw ADC value (0-1023)
+            normalized_value = self.adc.value
+            raw_adc = normalized_value * self.adc_max
+            index = self._lut[min(int(raw_adc), len(self._lut) - 1)]
 
-            except Exception as e:
-                logging.error(f"Error in Wind direction: {e}", exc_info=True)
+            if index >= 0:
+                data["direction"] = self.COMPASS[index]
+            else:
+                voltage = normalized_value * self.vref
+                logging.warning(f"[Wind Dir] No match for ADC: {raw_adc:.1f} (V: {voltage:.2f}V)")
+
+        except Exception as e:
+            logging.error(f"Error in Wind direction: {e}", exc_info=True)
         return data
@@ -1,7 +1,7 @@
 import os
 import sys
 from prettytable import PrettyTable
-from sensors.read_sensors import sensors
+from sensors.read_sensors import load_sensors, NOT_READY
 from utils.rtc import RTCControl
 from utils.network import check_internet
 import subprocess
@@ -32,7 +32,7 @@ class TestSensors:
         os.system("clear")
         print("Initializing sensors (once)...")
         self.sensor_instances = {}
-        for name, cls in sensors.items():
+        for name, cls in load_sensors().items():
             try:
                 self.sensor_instances[name] = cls()
             except Exception as e:
@@ -156,6 +156,10 @@ class TestSensors:
                 self.results[name][0] = False
                 continue
 
+            if res is NOT_READY:
+                self.results[name] = [False, "warming up"]
+                continue
+
             if res is None:
                 self.results[name][0] = False
             else:
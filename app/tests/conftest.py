@@ -0,0 +1,16 @@
+"""
+Tests run against the simulated devices (CLIMATENET_BACKEND=fake), from a
+scratch directory so the log, caches and state files stay out of the tree.
+
+    cd app && python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["CLIMATENET_BACKEND"] = "fake"
+os.environ.setdefault("CLIMATENET_CONFIG", os.path.join(APP_DIR, "tests", "no-config.json"))
+os.chdir(tempfile.mkdtemp(prefix="climatenet-tests-"))
+sys.path.insert(0, APP_DIR)
@@ -0,0 +1,45 @@
+from config import SENSORS
+from sensors.air_quality import AirQualitySensor
+
+
+def test_cached_pms5003_is_validated(monkeypatch):
+    # The fake UART has an SPS30 attached, the cache claims a PMS5003
+    monkeypatch.setitem(SENSORS["pms5003"], "working", True)
+    monkeypatch.setitem(SENSORS["pms5003"], "detect_timeout", 0.3)
+    invalidated = []
+    monkeypatch.setattr("sensors.air_quality.probe_cache.get",
+                        lambda name, conf: {"mode": "pms5003", "serial": None, "article_code": None})
+    monkeypatch.setattr("sensors.air_quality.probe_cache.invalidate", invalidated.append)
+    monkeypatch.setattr("sensors.air_quality.probe_cache.put", lambda name, conf, result: None)
+
+    sensor = AirQualitySensor()
+    try:
+        assert invalidated == ["airQuality"]
+        assert sensor.mode == "sps30_uart"
+    finally:
+        sensor.cleanup()
+
+
+def test_silent_pms5003_is_woken_and_used_as_configured(monkeypatch):
+    from sensors.libs import drivers, uart_detect
+
+    GPIO = drivers.gpio()
+    conf = SENSORS["pms5003"]
+    monkeypatch.setitem(conf, "working", True)
+    monkeypatch.setitem(conf, "pin_enable_working", True)
+    monkeypatch.setitem(SENSORS["sps30"]["uart"], "working", False)
+    GPIO.setup(conf["pin_enable"], GPIO.OUT, initial=GPIO.LOW)  # Left asleep by a previous run
+    enable_levels = []
+    monkeypatch.setattr(uart_detect, "detect",
+                        lambda port, candidates: enable_levels.append(GPIO.input(conf["pin_enable"])))
+    cached = []
+    monkeypatch.setattr("sensors.air_quality.probe_cache.get", lambda name, conf: None)
+    monkeypatch.setattr("sensors.air_quality.probe_cache.put", lambda name, conf, result: cached.append(result))
+
+    sensor = AirQualitySensor()
+    try:
+        assert enable_levels == [GPIO.HIGH]
+        assert sensor.mode == "pms5003"
+        assert cached == []
+    finally:
+        sensor.cleanup()
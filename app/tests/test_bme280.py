@@ -0,0 +1,24 @@
+from sensors.bme280 import BME280Sensor
+from sensors.libs.fake_devices import FakeBME280
+from sensors.libs.i2c_bus import I2CBus
+from utils.sensor_manager import SensorManager
+
+
+def test_reprobe_after_failed_init(monkeypatch):
+    def fail(bus, address=0x76):
+        raise OSError("calibration read failed")
+
+    monkeypatch.setattr(FakeBME280, "load_calibration_params", fail)
+    monkeypatch.setattr("sensors.bme280.probe_cache.get", lambda name, conf: None)
+    sensor = BME280Sensor()
+    assert sensor.sensor is None
+    first_bus = sensor.bus
+    assert isinstance(first_bus, I2CBus)
+
+    monkeypatch.undo()
+    monkeypatch.setattr("sensors.bme280.probe_cache.get", lambda name, conf: None)
+    manager = SensorManager.__new__(SensorManager)
+    assert manager._probe_sensor("tph", sensor)
+    assert sensor.sensor is True
+    assert sensor.bus is first_bus
+    assert sensor.read_data()["temperature"] is not None
@@ -0,0 +1,61 @@
+import datetime
+import time
+
+import pytest
+
+from utils import data_storage
+from utils.data_storage import DataStorage, TIME_FORMAT
+
+OFFSET = 3600.0  # How far the system clock is behind before NTP steps it
+
+
+class SystemClock:
+    """time.time() that is OFFSET behind until synchronized."""
+
+    def __init__(self):
+        self.offset = -OFFSET
+
+    def __call__(self):
+        return real_time() + self.offset
+
+
+real_time = time.time
+
+
+@pytest.fixture
+def system_clock(monkeypatch):
+    clock = SystemClock()
+    monkeypatch.setattr(data_storage.time, "time", clock)
+    return clock
+
+
+def make_storage(tmp_path, clock):
+    storage = DataStorage(clock=clock)
+    storage.local_db_path = tmp_path / "local_data.json"
+    return storage
+
+
+def save_and_sync(storage, system_clock):
+    stamped = storage.clock().replace(microsecond=0)
+    storage.save_locally({"time": stamped.strftime(TIME_FORMAT)})
+    system_clock.offset = 0.0  # NTP steps the system clock
+    storage.correct_timestamps()
+    stored = datetime.datetime.strptime(storage.load_stored_data()[0]["time"], TIME_FORMAT)
+    return stamped, stored
+
+
+def test_record_stamped_by_the_rtc_is_not_shifted(tmp_path, system_clock):
+    # The RTC corrected clock is right while the system clock is behind
+    storage = make_storage(tmp_path, lambda: datetime.datetime.fromtimestamp(system_clock() + OFFSET))
+
+    stamped, stored = save_and_sync(storage, system_clock)
+
+    assert abs((stored - stamped).total_seconds()) <= 1
+
+
+def test_record_stamped_by_the_system_clock_is_shifted(tmp_path, system_clock):
+    storage = make_storage(tmp_path, lambda: datetime.datetime.fromtimestamp(system_clock()))
+
+    stamped, stored = save_and_sync(storage, system_clock)
+
+    assert abs((stored - stamped).total_seconds() - OFFSET) <= 1
@@ -0,0 +1,33 @@
+import logging
+import sys
+
+from utils.log_handlers import RateLimitFilter
+
+
+def record(level, msg="Sensor failed", exc_info=None, lineno=10, created=1000.0):
+    return logging.makeLogRecord({"name": "climatenet", "levelno": level, "levelname": logging.getLevelName(level),
+                                  "msg": msg, "exc_info": exc_info, "pathname": "main.py", "lineno": lineno,
+                                  "created": created})
+
+
+def test_repeated_warnings_are_dropped_until_the_interval_passes():
+    limit = RateLimitFilter(interval=600)
+
+    assert limit.filter(record(logging.WARNING))
+    assert not limit.filter(record(logging.WARNING, created=1300.0))
+    assert limit.filter(record(logging.WARNING, lineno=20, created=1300.0))  # Another call site
+    passed = record(logging.WARNING, created=1601.0)
+    assert limit.filter(passed)
+    assert passed.msg.endswith("(repeated 1 times)")
+
+
+def test_errors_tracebacks_and_info_always_pass():
+    limit = RateLimitFilter(interval=600)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        exc_info = sys.exc_info()
+
+    for level, exc in ((logging.ERROR, None), (logging.CRITICAL, None), (logging.INFO, None),
+                       (logging.WARNING, exc_info)):
+        assert all(limit.filter(record(level, exc_info=exc, created=1000.0 + i)) for i in range(3))
@@ -0,0 +1,41 @@
+from config import SENSORS
+from sensors import ltr390
+from sensors.ltr390 import LTR390Sensor, GAIN_BITS, RESOLUTION_BITS
+
+
+class SwitchingLTR390:
+    """UVS data register that holds a sample of the previous settings until a new conversion completes."""
+
+    def __init__(self):
+        self.gain = GAIN_BITS[3]
+        self.resolution = RESOLUTION_BITS[16]
+        self.ready_flags = [True, True, False, True]  # Stale flag, then an old and a new conversion
+        self.stale = True
+
+    @property
+    def data_ready(self):
+        ready = self.ready_flags.pop(0) if self.ready_flags else True
+        if not self.ready_flags:
+            self.stale = False
+        return ready
+
+    @property
+    def uvs(self):
+        return 1 if self.stale else 2300 * 4
+
+
+def test_uv_is_read_from_a_conversion_at_the_uvs_settings(monkeypatch):
+    monkeypatch.setitem(SENSORS["ltr390"], "uv_source", "sensor")
+    monkeypatch.setattr(ltr390.time, "sleep", lambda seconds: None)
+    sensor = LTR390Sensor()
+    sensor.sensor = SwitchingLTR390()
+
+    assert sensor.read_uv_from_sensor() == 4
+    assert (sensor.sensor.gain, sensor.sensor.resolution) == (GAIN_BITS[3], RESOLUTION_BITS[16])
+
+
+def test_disabled_sensor_does_not_fetch_a_forecast(monkeypatch):
+    monkeypatch.setitem(SENSORS["ltr390"], "working", False)
+    monkeypatch.setitem(SENSORS["ltr390"], "uv_source", "api")
+
+    assert LTR390Sensor().uv_forecast is None
@@ -0,0 +1,43 @@
+import main
+
+
+class Rtc:
+    def __init__(self, trusted):
+        self.trusted = trusted
+        self.calls = []
+
+    def check(self):
+        self.calls.append("check")
+
+    def check_async(self):
+        self.calls.append("check_async")
+
+
+class Storage:
+    def __init__(self):
+        self.calls = []
+
+    def correct_timestamps(self):
+        self.calls.append("correct")
+
+    def send_stored_data(self, mqtt_client):
+        self.calls.append("send")
+        return 0
+
+
+def test_backlog_send_does_not_wait_for_an_untrusted_clock():
+    rtc, storage = Rtc(trusted=False), Storage()
+
+    main.send_stored_data(storage, None, rtc)
+
+    assert rtc.calls == ["check_async"]
+    assert storage.calls == ["send"]
+
+
+def test_backlog_is_corrected_before_sending_once_trusted():
+    rtc, storage = Rtc(trusted=True), Storage()
+
+    main.send_stored_data(storage, None, rtc)
+
+    assert rtc.calls == []
+    assert storage.calls == ["correct", "send"]
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import config
+from utils.sensor_manager import SensorManager
+
+
+class SlowSensor:
+    released = threading.Event()
+
+    def __init__(self):
+        time.sleep(0.3)
+
+    def cleanup(self):
+        SlowSensor.released.set()
+
+
+class NextSensor:
+    constructed = False
+
+    def __init__(self):
+        NextSensor.constructed = True
+
+
+def test_timed_out_init_holds_the_bus_and_is_released(monkeypatch):
+    monkeypatch.setattr(config, "SENSOR_INIT_TIMEOUT", 0.05)
+    manager = SensorManager.__new__(SensorManager)
+    manager.startup_timeline = []
+    results = {}
+
+    manager._initialize_bus_group("i2c-1", [("slow", SlowSensor), ("next", NextSensor)], time.monotonic(), results)
+
+    assert results == {}
+    assert [entry[4] for entry in manager.startup_timeline] == ["timeout", "skipped"]
+    assert not NextSensor.constructed
+    assert SlowSensor.released.wait(2)
+
+
+class ProbedSensor:
+    def __init__(self):
+        self.released = False
+
+    def cleanup(self):
+        self.released = True
+
+
+def test_config_reload_waits_for_a_running_probe():
+    manager = SensorManager.__new__(SensorManager)
+    old = ProbedSensor()
+    manager.sensors = {"rain": old}
+    manager.health = {}
+    manager._sensor_keys = {}
+    manager._sensor_locks = {"rain": threading.Lock()}
+    manager.schedule = type("Schedule", (), {})()
+
+    with manager._sensor_locks["rain"]:  # As the prober holds it during a probe
+        reload = threading.Thread(target=manager.apply_config_changes, args=(["SENSORS.rain.bucket_size"],))
+        reload.start()
+        reload.join(0.2)
+        assert reload.is_alive() and not old.released
+
+    reload.join(5)
+    assert old.released
+    assert manager.sensors["rain"] is not old
+    manager.sensors["rain"].cleanup()
+
+
+class WarmupSensor:
+    warmup_seconds = 30
+
+    def __init__(self):
+        self.is_started = False
+        self.reads = 0
+
+    def read_data(self):
+        self.reads += 1
+        return {"pm2_5": 4.0}
+
+
+def test_sensor_with_a_warmup_is_probed_only_once_started():
+    from utils.sensor_health import SensorHealth
+
+    manager = SensorManager.__new__(SensorManager)
+    sensor = WarmupSensor()
+    health = SensorHealth("airQuality")
+    health.state, health.next_probe = SensorHealth.OPEN, 0.0
+    manager.sensors = {"airQuality": sensor}
+    manager.health = {"airQuality": health}
+    manager._sensor_locks = {"airQuality": threading.Lock()}
+
+    manager._probe_due()
+    assert (sensor.reads, health.state, health.backoff) == (0, SensorHealth.OPEN, health.backoff_min)
+
+    sensor.is_started = True
+    manager._probe_due()
+    assert (sensor.reads, health.state) == (1, SensorHealth.CLOSED)
@@ -0,0 +1,34 @@
+import struct
+
+from sensors.libs import SPS30_I2C
+from sensors.libs.fake_devices import sensirion_crc8, sensirion_words
+
+VALUES = (8.5, 11.9, 13.1, 15.4, 52.6, 63.1, 65.8, 66.3, 66.8, 0.55)
+
+
+def test_crc_datasheet_example():
+    assert SPS30_I2C.calculateCRC(b'\xbe\xef') == 0x92
+
+
+def test_crc_table_matches_bitwise_reference():
+    for word in range(0x10000):
+        data = word.to_bytes(2, 'big')
+        assert SPS30_I2C.calculateCRC(data) == sensirion_crc8(data), f"CRC mismatch for 0x{word:04X}"
+
+
+def test_check_crc_covers_every_word():
+    response = sensirion_words(struct.pack('>10f', *VALUES))
+    assert SPS30_I2C.checkCRC(response)
+
+    corrupted = bytearray(response)
+    corrupted[1] ^= 0x01  # First word
+    assert not SPS30_I2C.checkCRC(bytes(corrupted))
+
+
+def test_parse_measured_values():
+    sensor = SPS30_I2C.SPS30.__new__(SPS30_I2C.SPS30)
+    sensor.dict_values = dict.fromkeys(SPS30_I2C.SPS30.VALUE_KEYS)
+    sensor.parse_sensor_values(SPS30_I2C.strip_crc(sensirion_words(struct.pack('>10f', *VALUES))))
+
+    assert list(sensor.dict_values) == list(SPS30_I2C.SPS30.VALUE_KEYS)
+    assert all(abs(a - b) < 1e-5 for a, b in zip(sensor.dict_values.values(), VALUES))
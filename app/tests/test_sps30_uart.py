@@ -0,0 +1,16 @@
+from sensors.libs.SPS30_UART import SPS30
+
+
+def device_info(response):
+    sensor = SPS30.__new__(SPS30)
+    sensor.sendCommand = lambda command, data=None, responseLen=0: response
+    return sensor.readDeviceInfo()
+
+
+def test_device_info_reports_the_serial_without_printing(capsys):
+    assert device_info(b"FAKE00000000000000030\x00\x00")["Serial"] == "FAKE00000000000000030"
+    assert capsys.readouterr().out == ""
+
+
+def test_device_info_with_a_garbled_serial_has_none():
+    assert device_info(b"\xff\xfe\x00")["Serial"] is None
@@ -0,0 +1,35 @@
+import pytest
+
+from sensors import wind
+from sensors.wind import WindSpeedSensor
+from utils.sensor_manager import SensorManager
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_speed_std_covers_the_whole_measurement_period(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(wind.time, "monotonic", clock)
+    sensor = WindSpeedSensor()
+    manager = SensorManager.__new__(SensorManager)
+    manager.measurement_buffer = {"speed_std": []}
+
+    sensor.start()
+    for pulses_per_second in (1, 3):  # Steady within each reading, different between them
+        for second in range(2):
+            for pulse in range(pulses_per_second):
+                clock.now += 1 / (pulses_per_second + 1)
+                sensor._increment()
+            clock.now = clock.now - clock.now % 1 + 1
+        manager.measurement_buffer["speed_std"].append(sensor.read_data()["speed_std"])
+    sensor.cleanup()
+
+    to_m_s = sensor.speed_coefficient / 3.6
+    assert manager.measurement_buffer["speed_std"][0] == 0
+    assert manager.calculate_averages()["speed_std"] == pytest.approx(to_m_s, abs=0.01)
@@ -0,0 +1,193 @@
+"""
+Config file overrides, validation and hot reload.
+
+config.py holds the defaults (with environment variable overrides) and at
+the end of its import applies the JSON file named by CLIMATENET_CONFIG on
+top of them. Every value in the file must have the type of the default it
+replaces, and unknown names are rejected, so a typo fails loudly instead of
+being ignored.
+
+On SIGHUP, ConfigReloader re-evaluates config.py and the file into a fresh
+namespace. Only if that validates are the differences applied, in place, to
+the live config module: dicts are updated in place so modules holding a
+reference (``from config import SENSORS``) see the new values, and scalars
+are replaced on the module, so code reads them as ``config.READING_TIME``.
+Environment variables are fixed for the life of the process.
+
+This module is imported by config.py, so it must not import config or
+logger_config at module level.
+"""
+import copy
+import json
+import os
+import runpy
+
+# Top-level settings that are only read at startup
+RESTART_REQUIRED = ("BACKEND", "FAKE_BACKEND", "LOCAL_DB", "METRICS", "PROFILING", "RTC", "CONFIG_FILE",
+                    "PROBE_CACHE")
+# Settings inside those groups that do apply on reload
+RELOADABLE = ("LOGGING.level",)
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def settings(namespace: dict) -> dict:
+    """The settings in a module namespace: its upper-case names."""
+    return {name: value for name, value in namespace.items() if name.isupper()}
+
+
+def read_config_file(path: str) -> dict:
+    """Load the override file; a missing file means no overrides."""
+    try:
+        with open(path, "r") as f:
+            overrides = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Cannot read config file {path}: {e}")
+
+    if not isinstance(overrides, dict):
+        raise ConfigError(f"Config file {path} must contain a JSON object")
+    return overrides
+
+
+def _check_type(path: str, default, value):
+    if default is None:
+        return
+    if isinstance(default, bool):
+        valid = isinstance(value, bool)
+    elif isinstance(default, int):
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    elif isinstance(default, float):
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, type(default))
+    if not valid:
+        raise ConfigError(f"{path} must be {type(default).__name__}, got {value!r}")
+
+
+def merge(defaults: dict, overrides: dict, path: str = "") -> dict:
+    """Return a copy of `defaults` with `overrides` applied, checking names and types."""
+    merged = copy.deepcopy(defaults)
+    for name, value in overrides.items():
+        key_path = f"{path}.{name}" if path else name
+        if name not in defaults:
+            raise ConfigError(f"Unknown setting {key_path}")
+
+        default = defaults[name]
+        if isinstance(default, dict):
+            if not isinstance(value, dict):
+                raise ConfigError(f"{key_path} must be an object, got {value!r}")
+            merged[name] = merge(default, value, key_path)
+        else:
+            _check_type(key_path, default, value)
+            merged[name] = float(value) if isinstance(default, float) else value
+    return merged
+
+
+def _require(condition: bool, message: str):
+    if not condition:
+        raise ConfigError(message)
+
+
+def validate(values: dict):
+    """Cross-field checks that types alone cannot express."""
+    _require(values["READING_TIME"] > 0, "READING_TIME must be positive")
+    _require(values["MEASURING_TIME"] >= values["READING_TIME"], "MEASURING_TIME must be at least READING_TIME")
+    _require(values["TRANSMISSION_INTERVAL"] > values["MEASURING_TIME"],
+             "TRANSMISSION_INTERVAL must be longer than MEASURING_TIME")
+    _require(values["TRANSMISSION_INTERVAL"] % 60 == 0, "TRANSMISSION_INTERVAL must be whole minutes")
+    _require(values["SENSOR_INIT_TIMEOUT"] > 0, "SENSOR_INIT_TIMEOUT must be positive")
+
+    logging_conf = values["LOGGING"]
+    for key in ("level", "flush_level"):
+        _require(logging_conf[key] in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
+                 f"LOGGING.{key} must be a logging level name")
+
+    sensors = values["SENSORS"]
+    _require(sensors["ltr390"]["uv_source"] in ("api", "sensor"), "SENSORS.ltr390.uv_source must be api or sensor")
+    _require(sensors["pms5003"]["mode"] in ("active", "passive"), "SENSORS.pms5003.mode must be active or passive")
+    _require(sensors["pms5003"]["window"] in ("mean", "latest"), "SENSORS.pms5003.window must be mean or latest")
+    _require(sensors["pms5003"]["detect_timeout"] > 0, "SENSORS.pms5003.detect_timeout must be positive")
+    _require(sensors["direction"]["sample_rate_hz"] > 0, "SENSORS.direction.sample_rate_hz must be positive")
+
+
+def apply_config_file(namespace: dict, path: str):
+    """Apply and validate the override file on a config namespace (called at the end of config.py)."""
+    values = merge(settings(namespace), read_config_file(path))
+    validate(values)
+    namespace.update(values)
+
+
+def diff(old, new, path: str = "") -> list:
+    """Dotted paths of the settings that differ between two setting trees."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for name in old.keys() | new.keys():
+            key_path = f"{path}.{name}" if path else name
+            if name not in old or name not in new:
+                changes.append(key_path)
+            else:
+                changes.extend(diff(old[name], new[name], key_path))
+        return sorted(changes)
+    return [] if old == new else [path]
+
+
+def _update_dict(target: dict, source: dict):
+    for name, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(name), dict):
+            _update_dict(target[name], value)
+        else:
+            target[name] = value
+
+
+class ConfigReloader:
+    """
+    Reloads the config on request (SIGHUP) at a point the main loop chooses.
+
+    The signal handler only sets a flag; apply_pending() does the work.
+    """
+
+    def __init__(self):
+        self._requested = False
+
+    def signal_handler(self, signum, frame):
+        self._requested = True
+
+    def apply_pending(self) -> list:
+        """Reload if requested; returns the dotted paths of the changed settings."""
+        if not self._requested:
+            return []
+        self._requested = False
+        return self.reload()
+
+    def reload(self) -> list:
+        import config
+        from logger_config import logging
+
+        try:
+            fresh = settings(runpy.run_path(config.__file__))
+        except Exception as e:
+            logging.error(f"[Config] Reload rejected, keeping the current config: {e}")
+            return []
+
+        live = settings(vars(config))
+        changes = diff(live, fresh)
+        if not changes:
+            logging.info("[Config] Reloaded, nothing changed")
+            return []
+
+        for name, value in fresh.items():
+            if isinstance(value, dict) and isinstance(live.get(name), dict):
+                _update_dict(live[name], value)
+            elif live.get(name) != value:
+                setattr(config, name, value)
+
+        logging.info(f"[Config] Reloaded from {os.path.abspath(fresh['CONFIG_FILE'])}: {', '.join(changes)}")
+        restart = [change for change in changes
+                   if change not in RELOADABLE and change.split(".")[0] in RESTART_REQUIRED + ("LOGGING",)]
+        if restart:
+            logging.warning(f"[Config] Changes to {', '.join(restart)} take effect after a restart")
+        return changes
@@ -1,13 +1,43 @@
+import datetime
 import json
+import os
+import threading
+import time
 from pathlib import Path
 from typing import Dict, List
 
 from config import LOCAL_DB
 from logger_config import logging
+from utils.metrics import timed
+
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def boot_id() -> str:
+    """Kernel boot ID; time.monotonic() readings are only comparable within one boot."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def clock_base(clock=datetime.datetime.now) -> float:
+    """Wall clock time at which time.monotonic() was zero, as `clock` sees it now."""
+    return clock().timestamp() - time.monotonic()
 
 
 class DataStorage:
-    """Handles local storage and retrieval of sensor data"""
+    """
+    Handles local storage and retrieval of sensor data.
+
+    Each stored record carries a "_clock" reference (boot ID and wall clock
+    minus monotonic time at save, on `clock`, the clock that stamps the
+    packets). If that clock was wrong when the record was saved,
+    correct_timestamps() shifts its "time" by however much it differs from the
+    system clock once NTP has synchronized it.
+    """
 
     # Define the exact order for measurements
     MEASUREMENT_ORDER = [
@@ -21,13 +51,20 @@ class DataStorage:
         "pm2_5",
         "pm10",
         "speed",
+        "gust",
+        "speed_std",
         "rain",
+        "rain_intensity_1m",
+        "rain_intensity_5m",
         "direction"
     ]
 
-    def __init__(self):
+    def __init__(self, clock=datetime.datetime.now):
+        self.clock = clock
         self.local_db_path = Path(LOCAL_DB) if LOCAL_DB else Path("local_data.json")
         self.local_db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.boot_id = boot_id()
+        self._lock = threading.Lock()  # Clock sync listeners run outside the main thread
 
     def _order_data(self, data: Dict) -> Dict:
         """Ensure data is in the correct order and includes all fields"""
@@ -44,28 +81,79 @@ class DataStorage:
 
         return ordered_data
 
+    @timed("storage_save_seconds", "DataStorage.save_locally duration")
     def save_locally(self, data: Dict):
         """Save data to local JSON file in specific order"""
         try:
-            # Load existing data
-            if self.local_db_path.exists():
-                with open(self.local_db_path, 'r') as f:
-                    local_data = json.load(f)
-            else:
-                local_data = []
+            with self._lock:
+                # Load existing data
+                if self.local_db_path.exists():
+                    with open(self.local_db_path, 'r') as f:
+                        local_data = json.load(f)
+                else:
+                    local_data = []
 
-            # Order the data before appending
-            ordered_data = self._order_data(data)
-            local_data.append(ordered_data)
+                # Order the data before appending
+                ordered_data = self._order_data(data)
+                ordered_data["_clock"] = {"boot": self.boot_id, "base": clock_base(self.clock)}
+                local_data.append(ordered_data)
 
-            # Save back to file
-            with open(self.local_db_path, 'w') as f:
-                json.dump(local_data, f, indent=2)
+                self._write(local_data)
 
             logging.info(f"Data saved locally ({len(local_data)} total records)")
         except Exception as e:
             logging.error(f"Error saving data locally: {e}")
 
+    def _write(self, records: List[Dict]):
+        """Replace the local file atomically so a crash never leaves a truncated file."""
+        tmp_path = self.local_db_path.with_name(self.local_db_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(records, f, indent=2)
+        os.replace(tmp_path, self.local_db_path)
+
+    def correct_timestamps(self, min_shift: float = 1.0) -> int:
+        """
+        Shift the "time" of stored records by how far the clock that stamped them
+        was off from the system clock as it is now.
+
+        Meant to run right after the system clock has been synchronized. Records
+        from earlier boots cannot be related to the current clock and are left as
+        they are. Each corrected record gets the current clock reference, so running
+        this again does not shift it twice. Returns the number of corrected records.
+        """
+        base = clock_base()
+        corrected = 0
+
+        with self._lock:
+            records = self.load_stored_data()
+            for record in records:
+                clock = record.get("_clock")
+                if not clock or clock.get("boot") != self.boot_id or not record.get("time"):
+                    continue
+
+                shift = base - clock["base"]
+                if abs(shift) < min_shift:
+                    continue
+
+                try:
+                    stamped = datetime.datetime.strptime(record["time"], TIME_FORMAT)
+                except ValueError:
+                    continue
+                record["time"] = (stamped + datetime.timedelta(seconds=shift)).strftime(TIME_FORMAT)
+                clock["base"] = base
+                corrected += 1
+
+            if corrected:
+                try:
+                    self._write(records)
+                except Exception as e:
+                    logging.error(f"Error saving corrected timestamps: {e}")
+                    return 0
+
+        if corrected:
+            logging.info(f"Corrected timestamps of {corrected} stored records")
+        return corrected
+
     def load_stored_data(self) -> List[Dict]:
         """Load all stored data from local file"""
         if not self.local_db_path.exists():
@@ -87,21 +175,27 @@ class DataStorage:
         except Exception as e:
             logging.error(f"Error clearing stored data: {e}")
 
+    @timed("storage_send_seconds", "DataStorage.send_stored_data duration")
     def send_stored_data(self, mqtt_client) -> int:
         """Send all stored data via MQTT and clear on success"""
-        stored_data = self.load_stored_data()
-
-        if not stored_data:
-            return 0
+        with self._lock:
+            stored_data = self.load_stored_data()
 
-        try:
-            success = mqtt_client.send_data(stored_data)
-            if success:
-                self.clear_stored_data()
-                return len(stored_data)
-            else:
-                logging.warning("✗ Failed to send stored data")
+            if not stored_data:
                 return 0
-        except Exception as e:
-            logging.error(f"Error sending stored data: {e}")
-            return 0
\ No newline at end of file
+
+            # The clock reference is only needed locally
+            for record in stored_data:
+                record.pop("_clock", None)
+
+            try:
+                success = mqtt_client.send_data(stored_data)
+                if success:
+                    self.clear_stored_data()
+                    return len(stored_data)
+                else:
+                    logging.warning("✗ Failed to send stored data")
+                    return 0
+            except Exception as e:
+                logging.error(f"Error sending stored data: {e}")
+                return 0
\ No newline at end of file
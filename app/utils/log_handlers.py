@@ -0,0 +1,203 @@
+"""
+Logging handlers for the asynchronous logging pipeline set up in logger_config.
+
+Callers only put records on a queue; a QueueListener thread filters, formats
+and writes them. This module must not import logger_config.
+"""
+import datetime
+import gzip
+import logging
+import os
+import shutil
+import threading
+from logging.handlers import QueueHandler
+from pathlib import Path
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The standard QueueHandler formats the message (and traceback) in the
+    logging thread before queueing. Here the record is queued as is, so a
+    call like ``logging.debug("Packet: %s", packet)`` costs only the record
+    creation, and the arguments must not be modified after logging them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drops repeats of the same message within `interval` seconds.
+
+    Only records at one of `levels` are limited, and never ones carrying a
+    traceback. Messages are identified by logger, call site, level and
+    formatted message text. When a suppressed message gets through again after
+    the interval, it is annotated with how many times it was dropped. Runs in
+    the listener thread only, so no locking is needed.
+    """
+
+    def __init__(self, interval: float = 600, max_messages: int = 1024, levels=(logging.WARNING,)):
+        super().__init__()
+        self.interval = interval
+        self.max_messages = max_messages
+        self.levels = frozenset(levels)
+        self._seen = {}  # (logger, path, line, level, message) -> [time last let through, times dropped since]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno not in self.levels or record.exc_info:
+            return True
+
+        key = (record.name, record.pathname, record.lineno, record.levelno, record.getMessage())
+        seen = self._seen.get(key)
+
+        if seen is not None and record.created - seen[0] < self.interval:
+            seen[1] += 1
+            return False
+
+        if seen is not None and seen[1]:
+            record.msg = f"{record.msg} (repeated {seen[1]} times)"
+            del self._seen[key]
+        elif len(self._seen) >= self.max_messages:
+            del self._seen[next(iter(self._seen))]  # Oldest message
+
+        self._seen[key] = [record.created, 0]
+        return True
+
+
+class BufferedRotatingFileHandler(logging.Handler):
+    """
+    File handler that keeps formatted records in memory and writes them in batches.
+
+    The buffer is written in one append when it reaches `buffer_bytes`, when a
+    record at `flush_level` or above arrives, every `flush_interval` seconds, and
+    on close. Once the file exceeds `max_bytes` it is renamed with a timestamp
+    suffix and gzipped in a background thread; the oldest rotated files are
+    deleted to keep the log and its rotations within `disk_budget` bytes.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, disk_budget: int, buffer_bytes: int = 64 * 1024,
+                 flush_interval: float = 60, flush_level: int = logging.ERROR):
+        super().__init__()
+        self.path = Path(filename).absolute()
+        self.max_bytes = max_bytes
+        self.disk_budget = disk_budget
+        self.buffer_bytes = buffer_bytes
+        self.flush_level = flush_level
+
+        self._buffer = []
+        self._buffered = 0
+        self._compressing = None
+        self._stopping = threading.Event()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        leftovers = [p for p in self._rotated_files() if p.suffix != ".gz"]
+        if leftovers:
+            # Rotations whose compression was interrupted by a restart
+            self._compress_async(leftovers)
+
+        self._timer = threading.Thread(target=self._flush_loop, args=(flush_interval,), name="log-flush", daemon=True)
+        self._timer.start()
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            line = self.format(record) + "\n"
+        except Exception:
+            self.handleError(record)
+            return
+
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if record.levelno >= self.flush_level or self._buffered >= self.buffer_bytes:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self._buffer:
+                return
+            data = "".join(self._buffer)
+            self._buffer.clear()
+            self._buffered = 0
+
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+                size = f.tell()
+            if size >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            self._report(f"Failed to write log file {self.path}: {e}")
+        finally:
+            self.release()
+
+    def _report(self, message: str):
+        """Report a failure of this handler through logging.lastResort; this handler is the pipeline that would log it."""
+        if logging.lastResort is not None:
+            logging.lastResort.handle(logging.makeLogRecord({
+                "name": __name__, "levelno": logging.ERROR, "levelname": "ERROR", "msg": message
+            }))
+
+    def _flush_loop(self, interval: float):
+        while not self._stopping.wait(interval):
+            self.flush()
+
+    def _rotate(self):
+        # Fixed-width microsecond timestamp: unique and sorts chronologically
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        target = self.path.with_name(f"{self.path.name}.{stamp}")
+        os.replace(self.path, target)
+        self._compress_async([target])
+
+    def _rotated_files(self) -> list:
+        """Rotated logs, oldest first (the timestamp suffix sorts chronologically)."""
+        return sorted(p for p in self.path.parent.glob(self.path.name + ".*") if not p.name.endswith(".tmp"))
+
+    def _compress_async(self, paths: list):
+        previous = self._compressing
+
+        def run():
+            if previous is not None:
+                previous.join()  # Keep compressions in order, one at a time
+            for path in paths:
+                self._compress(path)
+            # Rotations still waiting for compression would count at full size
+            if self._compressing is threading.current_thread():
+                self._enforce_budget()
+
+        self._compressing = threading.Thread(target=run, name="log-compress", daemon=True)
+        self._compressing.start()
+
+    def _compress(self, path: Path):
+        target = path.with_name(path.name + ".gz")
+        tmp = path.with_name(target.name + ".tmp")
+        try:
+            with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp, target)
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self._report(f"Failed to compress {path}: {e}")
+
+    def _enforce_budget(self):
+        try:
+            used = self.path.stat().st_size if self.path.exists() else 0
+            rotated = [(p, p.stat().st_size) for p in self._rotated_files()]
+            used += sum(size for _, size in rotated)
+            for path, size in rotated:
+                if used <= self.disk_budget:
+                    break
+                path.unlink()
+                used -= size
+        except OSError as e:
+            self._report(f"Failed to enforce log disk budget: {e}")
+
+    def close(self):
+        self._stopping.set()
+        self.flush()
+        if self._compressing is not None:
+            self._compressing.join(timeout=10)
+        super().close()
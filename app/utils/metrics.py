@@ -0,0 +1,274 @@
+"""
+Lightweight in-process metrics: counters, gauges and fixed-bucket histograms.
+
+Metrics live in the module-level REGISTRY. The exporter serves them in the
+Prometheus text format over a local HTTP port or a Unix socket, and
+REGISTRY.summary() gives a compact dict for attaching to MQTT packets.
+"""
+import bisect
+import functools
+import os
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS
+from logger_config import logging
+
+# Seconds; covers sub-millisecond I2C reads up to multi-second network calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class _Metric:
+    """A metric family; children hold the values for each combination of label values."""
+
+    kind = None
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    def _label_text(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    _new_child = _Value
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{self._label_text(key)} {child.value}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: tuple):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), child.counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {child.sum}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _get(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str = "", labelnames: tuple = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str = "", labelnames: tuple = ()) -> Gauge:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str = "", labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """
+        Compact view for MQTT packets: counter and gauge values, and
+        [count, mean ms] for histograms, keyed by name and label values.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        result = {}
+        for metric in metrics:
+            for key, child in list(metric._children.items()):
+                name = ".".join((metric.name,) + key)
+                if isinstance(metric, Histogram):
+                    mean_ms = child.sum / child.count * 1000 if child.count else 0.0
+                    result[name] = [child.count, round(mean_ms, 1)]
+                else:
+                    result[name] = round(child.value, 3)
+        return result
+
+
+REGISTRY = Registry()
+
+
+def timed(name: str, help: str = ""):
+    """
+    Decorator recording the call duration in histogram `name` (seconds) and
+    exceptions in counter `<name>_errors_total`.
+    """
+    histogram = REGISTRY.histogram(name, help)
+    errors = REGISTRY.counter(f"{name}_errors_total", f"Exceptions raised ({help})" if help else "")
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        return "local"  # Unix socket peers have no host/port
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the log
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def start_exporter():
+    """
+    Start serving REGISTRY in a daemon thread, on METRICS["unix_socket"] if set,
+    otherwise on METRICS["bind"]:METRICS["port"]. Does nothing if neither is configured.
+
+    Returns:
+        The server, or None if the exporter is disabled or failed to start.
+    """
+    try:
+        if METRICS["unix_socket"]:
+            path = METRICS["unix_socket"]
+            if os.path.exists(path):
+                os.unlink(path)  # Left over from a previous run
+            server = _UnixHTTPServer(path, _MetricsRequestHandler)
+            where = path
+        elif METRICS["port"]:
+            server = ThreadingHTTPServer((METRICS["bind"], METRICS["port"]), _MetricsRequestHandler)
+            server.daemon_threads = True
+            where = f"{METRICS['bind']}:{METRICS['port']}"
+        else:
+            return None
+    except OSError as e:
+        logging.error(f"[Metrics] Failed to start exporter: {e}")
+        return None
+
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    logging.info(f"[Metrics] Serving Prometheus metrics on {where}")
+    return server
@@ -4,8 +4,9 @@ import ssl
 import time
 
 import paho.mqtt.client as mqtt
-from config import MQTT_BROKER_ENDPOINT, MQTT_TOPIC, DEVICE_ID
+import config
 from logger_config import logging
+from utils.metrics import timed
 
 
 class MQTTClient:
@@ -22,13 +23,15 @@ class MQTTClient:
 
         # Try to connect, but don't block if it fails
         try:
-            self.client.connect_async(MQTT_BROKER_ENDPOINT, 8883, 60)
+            self.client.connect_async(config.MQTT_BROKER_ENDPOINT, 8883, 60)
             self.client.loop_start()
         except Exception as e:
             logging.error(f"Failed to connect to MQTT broker: {str(e)}")
 
-        self.deviceID = f"device{DEVICE_ID}"
+        self.deviceID = f"device{config.DEVICE_ID}"
+        self.topic = config.MQTT_TOPIC
 
+    @timed("mqtt_send_seconds", "MQTTClient.send_data duration")
     def send_data(self, data: list) -> bool:
         """
         Sends data to the MQTT broker - ONLY TRIES ONCE
@@ -60,9 +63,17 @@ class MQTTClient:
         }
 
         message_json = json.dumps(message)
-        logging.info(f"MQTT Data: {message_json}")
+        logging.debug("MQTT Data: %s", message_json)
 
         # Publish with QoS 0 (fire and forget)
-        self.client.publish(MQTT_TOPIC, message_json, qos=0)
+        self.client.publish(self.topic, message_json, qos=0)
 
-        return True
\ No newline at end of file
+        return True
+
+    def close(self) -> None:
+        """Stop the network loop and disconnect."""
+        try:
+            self.client.loop_stop()
+            self.client.disconnect()
+        except Exception as e:
+            logging.error(f"Error closing MQTT client: {e}")
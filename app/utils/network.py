@@ -2,8 +2,10 @@ import socket
 import subprocess
 import time
 from logger_config import logging
-from config import SSID, PASSWORD
+import config
+from utils.metrics import timed
 
+@timed("network_check_internet_seconds", "Internet connectivity check duration")
 def check_internet(host="8.8.8.8", port=53, timeout=5):
     """Check if the internet connection is available."""
     try:
@@ -14,8 +16,11 @@ def check_internet(host="8.8.8.8", port=53, timeout=5):
         return False
 
 
-def reconnect(ssid=SSID, password=PASSWORD):
-    """Try to reconnect to the internet via LAN or Wi-Fi."""
+@timed("network_reconnect_seconds", "Wi-Fi/Ethernet reconnect duration")
+def reconnect(ssid=None, password=None):
+    """Try to reconnect to the internet via LAN or Wi-Fi (default: the configured SSID)."""
+    ssid = config.SSID if ssid is None else ssid
+    password = config.PASSWORD if password is None else password
     logging.info("[Network] Checking connection...")
 
     if check_internet():
@@ -0,0 +1,124 @@
+"""
+Sensor probe results cached across boots.
+
+Probing at startup costs serial timeouts, device resets and calibration
+reads. What a probe found (air quality mode and serial, BME280 compensation
+parameters, the wind direction lookup table) is stored in PROBE_CACHE["file"]
+under a fingerprint of the board and of the sensor's config. A sensor uses
+its entry only while the fingerprint matches and a cheap check against the
+device passes; otherwise it probes in full and stores the new result.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from config import BACKEND, PROBE_CACHE
+from logger_config import logging
+from utils.metrics import REGISTRY
+
+# Raspberry Pi serial number first, then the OS install
+BOARD_ID_FILES = ("/proc/device-tree/serial-number", "/sys/firmware/devicetree/base/serial-number", "/etc/machine-id")
+
+PROBE_CACHE_LOOKUPS = REGISTRY.counter("probe_cache_lookups_total", "Probe cache lookups by result",
+                                       ("sensor", "result"))
+
+_board_id = None
+
+
+def board_id() -> str:
+    """Identifier of the board the station runs on ('' if none is readable)."""
+    global _board_id
+    if _board_id is None:
+        _board_id = ""
+        for path in BOARD_ID_FILES:
+            try:
+                with open(path, "rb") as f:
+                    _board_id = f.read().strip(b"\x00\n ").decode("ascii", "replace")
+            except OSError:
+                continue
+            if _board_id:
+                break
+    return _board_id
+
+
+def fingerprint(conf) -> str:
+    """Hash of the board, the driver backend and `conf` (any JSON-serializable config)."""
+    key = json.dumps({"board": board_id(), "backend": BACKEND, "conf": conf}, sort_keys=True, default=str)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class ProbeCache:
+    """
+    JSON file of {sensor: {"fingerprint": ..., "result": ...}}.
+
+    Sensors initialize in parallel, so access is locked and every change
+    is written atomically.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def get(self, name: str, conf) -> Optional[dict]:
+        """The cached probe result of `name`, or None if there is none for this hardware and config."""
+        if not PROBE_CACHE["enabled"]:
+            return None
+
+        with self._lock:
+            entry = self._load().get(name)
+        if entry is None or entry.get("fingerprint") != fingerprint(conf):
+            PROBE_CACHE_LOOKUPS.labels(name, "miss").inc()
+            return None
+
+        PROBE_CACHE_LOOKUPS.labels(name, "hit").inc()
+        return entry["result"]
+
+    def put(self, name: str, conf, result: dict):
+        if not PROBE_CACHE["enabled"]:
+            return
+
+        entry = {"fingerprint": fingerprint(conf), "result": result}
+        with self._lock:
+            entries = self._load()
+            if entries.get(name) != entry:
+                entries[name] = entry
+                self._save(entries)
+
+    def invalidate(self, name: str):
+        """Drop the entry of `name` after the device failed to match it."""
+        PROBE_CACHE_LOOKUPS.labels(name, "invalid").inc()
+        with self._lock:
+            entries = self._load()
+            if entries.pop(name, None) is not None:
+                self._save(entries)
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, "r") as f:
+                    entries = json.load(f)
+                if isinstance(entries, dict):
+                    self._entries = entries
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"[ProbeCache] Ignoring unreadable cache {self.path}: {e}")
+        return self._entries
+
+    def _save(self, entries: dict):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error(f"[ProbeCache] Failed to save {self.path}: {e}")
+
+
+probe_cache = ProbeCache(PROBE_CACHE["file"])
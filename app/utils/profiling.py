@@ -0,0 +1,116 @@
+"""
+On-demand profiling of the main loop.
+
+A CycleProfiler wraps a requested number of measurement cycles in cProfile
+and takes tracemalloc snapshots at the cycle boundaries. Each cycle leaves a
+``.prof`` file (open with ``python -m pstats`` or snakeviz) and a text file
+with the top allocation growth since the previous boundary.
+"""
+import cProfile
+import datetime
+import os
+import tracemalloc
+
+from logger_config import logging
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+class CycleProfiler:
+    """
+    Profiles the next N main loop cycles when requested.
+
+    request() only sets a counter, so it is safe to call from a signal
+    handler; the work happens in next_cycle(), which the main loop calls at
+    the top of every cycle. cProfile only sees the main thread; sensor and
+    background threads show up in the allocation diffs only.
+    """
+
+    def __init__(self, directory: str, top: int = 25, frames: int = 10):
+        self.directory = directory
+        self.top = top
+        self.frames = frames
+
+        self._pending = 0
+        self._profile = None
+        self._snapshot = None
+        self._started_tracemalloc = False
+        self._cycle = 0
+        self._session = None
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def request(self, cycles: int) -> None:
+        """Profile the next `cycles` cycles (extends a session already running)."""
+        self._pending = max(self._pending, cycles)
+
+    def signal_handler(self, cycles: int):
+        """Return a signal handler that requests `cycles` cycles."""
+        def handler(signum, frame):
+            self.request(cycles)
+        return handler
+
+    def next_cycle(self) -> None:
+        """Close the cycle being profiled, if any, and start the next one if requested."""
+        try:
+            if self.active:
+                self._finish_cycle()
+            if self._pending > 0:
+                self._pending -= 1
+                self._start_cycle()
+            elif self._session is not None:
+                self._end_session()
+        except Exception as e:
+            logging.error(f"[Profiling] Failed: {e}", exc_info=True)
+            self._pending = 0
+            self._profile = None
+            self._end_session()
+
+    def _start_cycle(self) -> None:
+        if self._session is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._session = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            self._cycle = 0
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._started_tracemalloc = True
+            self._snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            logging.info(f"[Profiling] Profiling {self._pending + 1} cycles into {self.directory}")
+
+        self._cycle += 1
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _finish_cycle(self) -> None:
+        self._profile.disable()
+        prefix = os.path.join(self.directory, f"cycle-{self._session}-{self._cycle:03d}")
+        self._profile.dump_stats(prefix + ".prof")
+        self._profile = None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        diff = snapshot.compare_to(self._snapshot, "lineno")
+        self._snapshot = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        with open(prefix + "-alloc.txt", "w") as f:
+            f.write(f"Traced memory: {current / 1024:.1f} KiB (peak {peak / 1024:.1f} KiB)\n")
+            f.write(f"Top {self.top} allocation changes since the previous cycle boundary:\n")
+            for stat in diff[:self.top]:
+                f.write(f"{stat}\n")
+
+        growth = sum(stat.size_diff for stat in diff)
+        logging.info(f"[Profiling] Cycle {self._cycle} written to {prefix}.prof (memory {growth / 1024:+.1f} KiB)")
+
+    def _end_session(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._snapshot = None
+        self._session = None
+        logging.info(f"[Profiling] Session finished, results in {self.directory}")
@@ -1,27 +1,178 @@
 import datetime
+import threading
 import time
 import subprocess
 from .network import check_internet
 from logger_config import logging
-import adafruit_ds3231
-import board
+from config import RTC
+from sensors.libs import drivers
+from sensors.libs.i2c_bus import get_bus
 
 
 class RTCControl:
     """
-    Controls a DS3231 Real-Time Clock (RTC) module with internet-aware time retrieval.
+    Controls a DS3231 Real-Time Clock (RTC) module and serves timestamps from a cached clock.
+
+    Timestamps come from the system clock, plus a cached correction when the
+    system clock is not trusted. The RTC-to-system offset and whether the system
+    clock is trusted (NTP synchronized) are re-evaluated in the background every
+    `check_interval` seconds, so get_time() does not touch I2C or the network.
 
     Attributes:
-        i2c (board.I2C): The I2C bus used to communicate with the RTC.
+        i2c (BusioAdapter): The shared I2C bus used to communicate with the RTC.
         rtc (adafruit_ds3231.DS3231): The DS3231 RTC object.
+        offset (float): RTC time minus system time in seconds at the last measurement.
+        drift (float): Change of the offset in seconds per second.
+        trusted (bool): Whether the system clock is NTP synchronized.
     """
 
+    MIN_DRIFT_BASELINE = 3600  # Seconds between offset measurements before drift is estimated
+
     def __init__(self) -> None:
         """
         Initializes the RTCControl instance.
         """
-        self.i2c = board.I2C()
-        self.rtc = adafruit_ds3231.DS3231(self.i2c)
+        self.i2c = get_bus(RTC["port"]).busio()
+        self.rtc = drivers.ds3231(self.i2c)
+        self.check_interval = RTC["check_interval"]
+        self.ntp_timeout = RTC["ntp_timeout"]
+
+        self.offset = 0.0
+        self.drift = 0.0
+        self.trusted = False
+        self._measured_at = None   # time.monotonic() of the last offset measurement
+        self._drift_base = None    # (monotonic, offset) the drift is estimated from
+        self._checked_at = None    # time.monotonic() of the last background check
+        self._checking = threading.Lock()
+        self._sync_listeners = []
+
+    def add_sync_listener(self, callback) -> None:
+        """
+        Registers a callback run (without arguments) whenever the system clock
+        becomes trusted: after a successful NTP sync, or when a check finds that
+        the system synchronized it on its own.
+
+        Args:
+            callback (callable): Called from the thread that performed the sync.
+        """
+        self._sync_listeners.append(callback)
+
+    def measure_offset(self) -> float:
+        """
+        Measures the RTC-to-system offset at the edge of an RTC second.
+
+        The DS3231 only reports whole seconds, so the RTC is polled until its
+        seconds register changes (at most about one second) and the offset is
+        taken at that instant.
+
+        Returns:
+            float: RTC time minus system time in seconds.
+        Raises:
+            RuntimeError: If the RTC cannot be read.
+        """
+        try:
+            first = self.rtc.datetime
+            deadline = time.monotonic() + 1.1
+            while True:
+                current = self.rtc.datetime
+                now = time.time()
+                if current.tm_sec != first.tm_sec or time.monotonic() > deadline:
+                    break
+                time.sleep(0.01)
+        except Exception as e:
+            raise RuntimeError(f"Error while measuring RTC offset: {e}")
+
+        self._set_offset(time.mktime(current) - now)
+        return self.offset
+
+    def _set_offset(self, offset: float, clock_step: bool = False) -> None:
+        measured_at = time.monotonic()
+        if clock_step or self._drift_base is None:
+            self._drift_base = (measured_at, offset)
+            self.drift = 0.0
+        elif measured_at - self._drift_base[0] >= self.MIN_DRIFT_BASELINE:
+            base_at, base_offset = self._drift_base
+            self.drift = (offset - base_offset) / (measured_at - base_at)
+        self.offset = offset
+        self._measured_at = measured_at
+
+    def correction(self) -> float:
+        """Seconds to add to the system clock to get RTC time, extrapolated with the tracked drift."""
+        if self._measured_at is None:
+            return 0.0
+        return self.offset + self.drift * (time.monotonic() - self._measured_at)
+
+    def is_system_clock_synchronized(self):
+        """
+        Asks systemd whether the system clock is NTP synchronized.
+
+        Returns:
+            bool or None: The synchronization state, or None if timedatectl is unavailable.
+        """
+        try:
+            result = subprocess.run(
+                ["timedatectl", "show", "-p", "NTPSynchronized", "--value"],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip() == "yes"
+
+    def _check_trusted(self) -> bool:
+        synchronized = self.is_system_clock_synchronized()
+        if synchronized is None:
+            synchronized = check_internet() and datetime.datetime.now().year > 2020
+        self.trusted = synchronized
+        return synchronized
+
+    def check(self) -> None:
+        """
+        Re-evaluates the clocks: trust in the system clock and the RTC offset.
+
+        While the system clock is untrusted and the internet is back, NTP sync is
+        retried. A trusted system clock is written to the RTC when they disagree by
+        more than a second.
+        """
+        self._checked_at = time.monotonic()
+        try:
+            was_trusted = self.trusted
+            if not self._check_trusted() and check_internet():
+                self.sync_from_ntp()
+            elif self.trusted and not was_trusted:
+                logging.info("System clock is NTP synchronized")
+                self._notify_sync_listeners()
+
+            self.measure_offset()
+            if self.trusted and abs(self.offset) > 1:
+                logging.info(f"RTC off by {self.offset:+.1f} s, updating from system time")
+                self.sync_from_system()
+        except Exception as e:
+            logging.error(f"Clock check failed: {e}")
+
+    def _notify_sync_listeners(self) -> None:
+        for callback in self._sync_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Clock sync listener failed: {e}")
+
+    def check_async(self) -> None:
+        """Runs check() in a background thread unless one is already running."""
+        if not self._checking.acquire(blocking=False):
+            return
+        self._checked_at = time.monotonic()
+
+        def run():
+            try:
+                self.check()
+            finally:
+                self._checking.release()
+
+        threading.Thread(target=run, name="clock-check", daemon=True).start()
 
     def change_time(self, new_time: datetime.datetime) -> None:
         """
@@ -47,6 +198,7 @@ class RTCControl:
         try:
             system_time = datetime.datetime.now()
             self.change_time(system_time)
+            self._set_offset(0.0, clock_step=True)
         except Exception as e:
             raise RuntimeError(f"Error while syncing RTC from system: {e}")
 
@@ -63,6 +215,7 @@ class RTCControl:
                 ["sudo", "date", "-s", formatted],
                 check=True
             )
+            self._set_offset(0.0, clock_step=True)
 
             logging.info(f"System synced from RTC: {formatted}")
 
@@ -73,6 +226,9 @@ class RTCControl:
         """
         Synchronizes system time with NTP and updates RTC.
 
+        Waits up to `ntp_timeout` seconds for systemd to report the clock as
+        synchronized instead of sleeping a fixed time.
+
         Returns:
             bool: True if synchronization was successful, False otherwise.
         """
@@ -87,9 +243,18 @@ class RTCControl:
             if result.returncode != 0:
                 return False
 
-            time.sleep(2)
+            deadline = time.monotonic() + self.ntp_timeout
+            while not self.is_system_clock_synchronized():
+                if time.monotonic() > deadline:
+                    logging.warning(f"NTP not synchronized after {self.ntp_timeout} s")
+                    return False
+                time.sleep(0.5)
+
+            self.trusted = True
             self.sync_from_system()
             logging.info("Time synced: NTP → System → RTC")
+
+            self._notify_sync_listeners()
             return True
 
         except subprocess.TimeoutExpired:
@@ -98,11 +263,33 @@ class RTCControl:
             logging.error(f"NTP sync error: {e}")
             return False
 
+    def timestamp(self) -> float:
+        """
+        Returns the current time as a Unix timestamp.
+
+        NTP synchronized system time if trusted, otherwise system time corrected by
+        the cached RTC offset. The first call measures the offset; afterwards the
+        clocks are re-checked in the background every `check_interval` seconds.
+
+        Raises:
+            RuntimeError: If the first offset measurement fails.
+        """
+        if self._measured_at is None:
+            self._check_trusted()
+            self.measure_offset()
+            self._checked_at = time.monotonic()
+        elif time.monotonic() - self._checked_at > self.check_interval:
+            self.check_async()
+
+        if self.trusted:
+            return time.time()
+        return time.time() + self.correction()
+
     def get_time(self) -> datetime.datetime:
         """
         Retrieves the current date and time.
 
-        Priority: Internet NTP > System time > RTC hardware
+        Priority: NTP synchronized system time > system time corrected to the RTC
 
         Returns:
             datetime.datetime: The current date and time.
@@ -110,14 +297,7 @@ class RTCControl:
             RuntimeError: If an error occurs while getting time from all sources.
         """
         try:
-            if check_internet():
-                system_time = datetime.datetime.now()
-                if system_time.year > 2020:
-                    return system_time
-
-            rtc_datetime = time.mktime(self.rtc.datetime)
-            return datetime.datetime.fromtimestamp(rtc_datetime)
-
+            return datetime.datetime.fromtimestamp(self.timestamp())
         except Exception as e:
             raise RuntimeError(f"Error while getting time from all sources: {e}")
 
@@ -0,0 +1,116 @@
+"""
+Schedule accuracy of a measurement window.
+
+Records when every sample and every sensor read was planned versus when it
+actually started and ended, and when the packet went out relative to the
+planned transmission time. Times are time.time() seconds.
+"""
+import math
+import time
+
+from logger_config import logging
+from utils.metrics import REGISTRY
+
+LATENESS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+SAMPLE_LATENESS = REGISTRY.histogram("schedule_sample_lateness_seconds", "Sample start after its planned time",
+                                     buckets=LATENESS_BUCKETS)
+MISSED_SAMPLES = REGISTRY.counter("schedule_missed_samples_total", "Samples not taken within a reading interval")
+TRANSMISSION_DELAY = REGISTRY.histogram("transmission_delay_seconds", "Transmission start after next_transmission",
+                                        buckets=LATENESS_BUCKETS)
+
+
+def percentile(sorted_values: list, q: float):
+    """Nearest-rank percentile (0-100) of an already sorted list, or None if empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _ms_stats(values: list) -> dict:
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "p50": round(percentile(values, 50) * 1000, 1),
+        "p90": round(percentile(values, 90) * 1000, 1),
+        "p99": round(percentile(values, 99) * 1000, 1),
+        "max": round(values[-1] * 1000, 1)
+    }
+
+
+class ScheduleRecorder:
+    """
+    Planned versus actual timing of one measurement window.
+
+    A sample is missed when it was never taken before the window ended or
+    started a whole reading interval or more after its planned time.
+    """
+
+    def __init__(self, reading_time: float):
+        self.reading_time = reading_time
+        self.start_window(time.time(), time.time())
+
+    def start_window(self, first_sample: float, end: float):
+        """Begin a window whose samples are planned every reading_time from first_sample until end."""
+        self.first_sample = first_sample
+        self.end = end
+        self.samples = []       # (planned, started, finished)
+        self.reads = {}         # sensor -> [(planned, started, finished)]
+        self.transmission = None
+
+    @property
+    def expected_samples(self) -> int:
+        return max(0, math.ceil((self.end - self.first_sample) / self.reading_time))
+
+    def record_sample(self, planned: float, started: float, finished: float, reads: dict):
+        """Record one sample and its sensor reads ({sensor: (started, finished)})."""
+        self.samples.append((planned, started, finished))
+        SAMPLE_LATENESS.observe(max(0.0, started - planned))
+        for sensor, (read_started, read_finished) in reads.items():
+            self.reads.setdefault(sensor, []).append((planned, read_started, read_finished))
+
+    def record_transmission(self, planned: float, started: float, finished: float):
+        self.transmission = (planned, started, finished)
+        TRANSMISSION_DELAY.observe(max(0.0, started - planned))
+
+    def missed_samples(self) -> int:
+        on_time = sum(1 for planned, started, _ in self.samples if started - planned < self.reading_time)
+        return max(0, self.expected_samples - on_time)
+
+    def report(self) -> dict:
+        """Jitter percentiles (ms), missed samples and transmission delay of the window."""
+        report = {
+            "samples": len(self.samples),
+            "expected": self.expected_samples,
+            "missed": self.missed_samples(),
+            "lateness_ms": _ms_stats([started - planned for planned, started, _ in self.samples]),
+            "sample_duration_ms": _ms_stats([finished - started for _, started, finished in self.samples]),
+            "sensors": {
+                sensor: {
+                    "start_lateness_ms": _ms_stats([started - planned for planned, started, _ in reads]),
+                    "duration_ms": _ms_stats([finished - started for _, started, finished in reads])
+                }
+                for sensor, reads in self.reads.items()
+            }
+        }
+        if self.transmission:
+            planned, started, finished = self.transmission
+            report["transmission_delay_ms"] = round((started - planned) * 1000, 1)
+            report["transmission_duration_ms"] = round((finished - started) * 1000, 1)
+        return report
+
+    def log_report(self) -> dict:
+        report = self.report()
+        MISSED_SAMPLES.inc(report["missed"])
+
+        lateness = report["lateness_ms"]
+        message = f"[Schedule] {report['samples']}/{report['expected']} samples, {report['missed']} missed"
+        if lateness:
+            message += f", lateness p50 {lateness['p50']} ms p90 {lateness['p90']} ms max {lateness['max']} ms"
+        if "transmission_delay_ms" in report:
+            message += f", transmission +{report['transmission_delay_ms']} ms"
+        logging.info(message)
+        logging.debug("[Schedule] Per-sensor timing: %s", report["sensors"])
+        return report
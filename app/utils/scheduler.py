@@ -1,7 +1,7 @@
 import datetime
 
 
-def calculate_next_transmission(interval: int) -> datetime.datetime:
+def calculate_next_transmission(interval: int, now: datetime.datetime = None) -> datetime.datetime:
     """
     Calculate the next transmission time aligned to human-readable intervals.
 
@@ -12,11 +12,13 @@ def calculate_next_transmission(interval: int) -> datetime.datetime:
 
     Args:
         interval: Transmission interval in seconds
+        now: Current time (default: system clock)
 
     Returns:
         Next aligned transmission time
     """
-    now = datetime.datetime.now()
+    if now is None:
+        now = datetime.datetime.now()
 
     # Calculate minutes in interval
     minutes_in_interval = interval // 60
@@ -34,7 +36,8 @@ def calculate_next_transmission(interval: int) -> datetime.datetime:
     return next_time
 
 
-def calculate_measurement_start(transmission_time: datetime.datetime, measuring_time: int) -> datetime.datetime:
+def calculate_measurement_start(transmission_time: datetime.datetime, measuring_time: int,
+                                now: datetime.datetime = None) -> datetime.datetime:
     """
     Calculate when to start measurements before transmission.
     If the calculated start time is in the past, skip to next transmission cycle.
@@ -42,6 +45,7 @@ def calculate_measurement_start(transmission_time: datetime.datetime, measuring_
     Args:
         transmission_time: When data should be transmitted
         measuring_time: How many seconds before transmission to start measuring
+        now: Current time (default: system clock)
 
     Returns:
         Measurement start time
@@ -49,7 +53,8 @@ def calculate_measurement_start(transmission_time: datetime.datetime, measuring_
     measurement_start = transmission_time - datetime.timedelta(seconds=measuring_time)
 
     # If measurement start is in the past, we can't use this cycle
-    now = datetime.datetime.now()
+    if now is None:
+        now = datetime.datetime.now()
     if measurement_start < now:
         # Return the transmission time itself to signal we should skip to next cycle
         return transmission_time
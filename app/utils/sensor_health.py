@@ -0,0 +1,78 @@
+import threading
+import time
+
+
+class SensorHealth:
+    """
+    Circuit breaker tracking the health of one sensor.
+
+    After ``failure_threshold`` consecutive failed readings the circuit opens and
+    the sensor is skipped by the sampling loop. An open circuit is re-probed in
+    the background; every failed probe doubles the delay up to ``backoff_max``.
+    A successful probe closes the circuit again.
+    """
+
+    CLOSED = "ok"
+    OPEN = "open"
+    HALF_OPEN = "probing"
+
+    def __init__(self, name: str, failure_threshold: int = 3, backoff_min: float = 60, backoff_max: float = 1800):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.backoff = backoff_min
+        self.next_probe = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if the sampling loop should read this sensor."""
+        return self.state == self.CLOSED
+
+    def record_success(self) -> bool:
+        """
+        Record a good reading.
+
+        Returns:
+            bool: True if this closed a previously open circuit.
+        """
+        with self._lock:
+            reopened = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.backoff = self.backoff_min
+            return reopened
+
+    def record_failure(self) -> bool:
+        """
+        Record a failed reading or probe.
+
+        Returns:
+            bool: True if this opened the circuit.
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+
+            if self.state == self.HALF_OPEN:
+                self.backoff = min(self.backoff * 2, self.backoff_max)
+                self.state = self.OPEN
+                self.next_probe = time.monotonic() + self.backoff
+                return False
+
+            if self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.next_probe = time.monotonic() + self.backoff
+                return True
+
+            return False
+
+    def begin_probe(self) -> bool:
+        """Move an open circuit whose backoff expired to half-open. Returns True if a probe is due."""
+        with self._lock:
+            if self.state != self.OPEN or time.monotonic() < self.next_probe:
+                return False
+            self.state = self.HALF_OPEN
+            return True
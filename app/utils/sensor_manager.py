@@ -1,26 +1,225 @@
 import datetime
+import threading
 import time
 from collections import defaultdict
-from config import READING_TIME
+import config
+from config import SENSOR_HEALTH, METRICS
 from logger_config import logging
-from sensors.read_sensors import sensors
+from sensors.libs.i2c_bus import bus_stats
+from sensors.read_sensors import (
+    SENSOR_CONFIG_KEYS, SENSOR_REGISTRY, NOT_READY, is_enabled, load_sensor_class, load_sensors, sensor_bus
+)
+from utils.metrics import REGISTRY
+from utils.schedule_stats import ScheduleRecorder
+from utils.sensor_health import SensorHealth
+
+SENSOR_READ_SECONDS = REGISTRY.histogram("sensor_read_seconds", "Sensor read_data duration", ("sensor",))
+SENSOR_READ_FAILURES = REGISTRY.counter("sensor_read_failures_total", "Failed sensor readings", ("sensor",))
 
 
 class SensorManager:
     """Manages sensor initialization, data collection, and averaging"""
 
-    def __init__(self):
+    def __init__(self, clock=datetime.datetime.now):
+        """
+        Args:
+            clock: Returns the current datetime; the measurement window is scheduled on it.
+        """
+        self.clock = clock
         self.sensors = {}
         self.measurement_buffer = defaultdict(list)
+        self.startup_timeline = []
+        self.health = {}
+        self._sensor_keys = {}
+        self._stop_event = threading.Event()
+        # Held while a sensor instance is probed or replaced, so the prober never
+        # works on devices a config reload is closing
+        self._sensor_locks = {sensor_name: threading.Lock() for sensor_name in SENSOR_REGISTRY}
+        self.schedule = ScheduleRecorder(config.READING_TIME)
         self._initialize_sensors()
 
+        self._prober = threading.Thread(target=self._probe_loop, name="sensor-prober", daemon=True)
+        self._prober.start()
+
     def _initialize_sensors(self):
-        """Initialize all sensors from read_sensors.py"""
-        for sensor_name, sensor_class in sensors.items():
+        """
+        Initialize all enabled sensors from the registry in read_sensors.py.
+
+        Sensors on different buses are initialized concurrently, sensors sharing
+        a bus one after another. Each sensor gets SENSOR_INIT_TIMEOUT seconds;
+        a sensor that takes longer is left out, and so are the sensors after it
+        on the same bus, which its still running initialization may be using.
+        """
+        origin = time.monotonic()
+        sensor_classes = load_sensors()
+        self.startup_timeline = [("load drivers", "-", 0.0, (time.monotonic() - origin) * 1000, "ok")]
+
+        groups = defaultdict(list)
+        for sensor_name, sensor_class in sensor_classes.items():
+            groups[sensor_bus(sensor_name)].append((sensor_name, sensor_class))
+
+        results = {}
+        threads = []
+        for bus, members in groups.items():
+            thread = threading.Thread(
+                target=self._initialize_bus_group,
+                args=(bus, members, origin, results),
+                name=f"init-{bus}",
+                daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        # Keep registry order regardless of which bus finished first
+        for sensor_name in sensor_classes:
+            if sensor_name in results:
+                self.sensors[sensor_name] = results[sensor_name]
+                self.health[sensor_name] = self._new_health(sensor_name)
+
+        self.startup_timeline.sort(key=lambda entry: entry[2])
+        self._log_startup_timeline((time.monotonic() - origin) * 1000)
+
+    @staticmethod
+    def _new_health(sensor_name) -> SensorHealth:
+        return SensorHealth(
+            sensor_name,
+            failure_threshold=SENSOR_HEALTH["failure_threshold"],
+            backoff_min=SENSOR_HEALTH["probe_backoff_min"],
+            backoff_max=SENSOR_HEALTH["probe_backoff_max"]
+        )
+
+    def apply_config_changes(self, changes: list):
+        """
+        Apply a config reload: re-initialize only the sensors whose SENSORS entries
+        changed, update circuit breaker settings and the reading interval.
+
+        Args:
+            changes (list): Dotted paths of the changed settings (ConfigReloader.reload).
+        """
+        changed = {change.split(".")[1] for change in changes if change.startswith("SENSORS.")}
+        affected = [name for name in SENSOR_REGISTRY if changed & set(SENSOR_CONFIG_KEYS[name])]
+
+        for sensor_name in affected:
+            with self._sensor_locks[sensor_name]:
+                self._reinitialize_sensor(sensor_name)
+
+        if affected:
+            # Keep registry order for the sampling loop
+            self.sensors = {name: self.sensors[name] for name in SENSOR_REGISTRY if name in self.sensors}
+
+        if any(change.startswith("SENSOR_HEALTH.") for change in changes):
+            for health in self.health.values():
+                health.failure_threshold = SENSOR_HEALTH["failure_threshold"]
+                health.backoff_min = SENSOR_HEALTH["probe_backoff_min"]
+                health.backoff_max = SENSOR_HEALTH["probe_backoff_max"]
+
+        self.schedule.reading_time = config.READING_TIME
+
+    def _reinitialize_sensor(self, sensor_name):
+        """Replace a sensor with a fresh instance built from the current config (caller holds its lock)."""
+        old = self.sensors.pop(sensor_name, None)
+        self.health.pop(sensor_name, None)
+        self._sensor_keys.pop(sensor_name, None)
+        if old is not None:
+            self._release_sensor(sensor_name, old)
+
+        if not is_enabled(sensor_name):
+            logging.info(f"[SensorManager] {sensor_name} disabled by config reload")
+            return
+        try:
+            sensor_class = load_sensor_class(sensor_name)
+        except Exception as e:
+            logging.error(f"[SensorManager] Failed to load driver for {sensor_name}: {e}")
+            return
+        instance, status = self._initialize_with_timeout(sensor_name, sensor_class)
+        if instance is not None:
+            self.sensors[sensor_name] = instance
+            self.health[sensor_name] = self._new_health(sensor_name)
+        logging.info(f"[SensorManager] {sensor_name} re-initialized after config reload: {status}")
+
+    @staticmethod
+    def _release_sensor(sensor_name, instance):
+        """Stop a sensor and free its devices so a new instance can open them."""
+        for method in ("stop", "cleanup"):
+            if hasattr(instance, method):
+                try:
+                    getattr(instance, method)()
+                except Exception as e:
+                    logging.error(f"Error releasing {sensor_name}: {e}")
+
+    def _initialize_bus_group(self, bus, members, origin, results):
+        """Initialize the sensors sharing one bus sequentially."""
+        busy = None  # Sensor whose timed out initialization may still be using the bus
+        for sensor_name, sensor_class in members:
+            start = (time.monotonic() - origin) * 1000
+            if busy is not None:
+                logging.error(f"✗ {sensor_name} skipped, {bus} is still held by {busy}")
+                self.startup_timeline.append((sensor_name, bus, start, start, "skipped"))
+                continue
+
+            instance, status = self._initialize_with_timeout(sensor_name, sensor_class)
+            end = (time.monotonic() - origin) * 1000
+
+            self.startup_timeline.append((sensor_name, bus, start, end, status))
+            if instance is not None:
+                results[sensor_name] = instance
+            elif status == "timeout":
+                busy = sensor_name
+
+    @staticmethod
+    def _initialize_with_timeout(sensor_name, sensor_class):
+        """
+        Construct a sensor in a helper thread and wait at most SENSOR_INIT_TIMEOUT.
+
+        An instance that only finishes after the timeout is released right
+        away, so its pins, port or bus are not held by an unused sensor.
+
+        Returns:
+            tuple: (instance or None, status string for the startup timeline)
+        """
+        outcome = {}
+        lock = threading.Lock()
+
+        def construct():
             try:
-                self.sensors[sensor_name] = sensor_class()
+                instance = sensor_class()
             except Exception as e:
-                logging.error(f"✗ Failed to initialize {sensor_name}: {e}")
+                with lock:
+                    outcome["error"] = e
+                return
+
+            with lock:
+                abandoned = outcome.get("abandoned", False)
+                if not abandoned:
+                    outcome["instance"] = instance
+            if abandoned:
+                logging.warning(f"{sensor_name} finished initializing after its timeout, releasing it")
+                SensorManager._release_sensor(sensor_name, instance)
+
+        worker = threading.Thread(target=construct, name=f"init-{sensor_name}", daemon=True)
+        worker.start()
+        worker.join(config.SENSOR_INIT_TIMEOUT)
+
+        with lock:
+            if "instance" not in outcome and "error" not in outcome:
+                outcome["abandoned"] = True
+        if outcome.get("abandoned"):
+            logging.error(f"✗ {sensor_name} initialization timed out after {config.SENSOR_INIT_TIMEOUT}s")
+            return None, "timeout"
+        if "error" in outcome:
+            logging.error(f"✗ Failed to initialize {sensor_name}: {outcome['error']}")
+            return None, "failed"
+        return outcome["instance"], "ok"
+
+    def _log_startup_timeline(self, total_ms):
+        """Log where the sensor startup time went."""
+        lines = [f"Sensor startup finished in {total_ms:.0f} ms"]
+        for name, bus, start, end, status in self.startup_timeline:
+            lines.append(f"  {name:<12} {bus:<8} {start:8.0f} -> {end:8.0f} ms ({end - start:7.0f} ms) {status}")
+        logging.info("\n".join(lines))
 
     def start_sensors(self):
         """Start sensors that need warmup (like SPS30)"""
@@ -31,6 +230,24 @@ class SensorManager:
                 except Exception as e:
                     logging.error(f"Error starting {sensor_name}: {e}")
 
+    def prepare_sensors(self, measurement_start: datetime.datetime):
+        """
+        Start sensors with a warmup period early enough to be ready at measurement_start.
+
+        Called repeatedly while waiting for the measurement period so the warmup
+        overlaps the idle time instead of eating into the measurement window.
+        """
+        now = self.clock()
+        for sensor_name, sensor_instance in self.sensors.items():
+            warmup = getattr(sensor_instance, "warmup_seconds", 0)
+            if not warmup or getattr(sensor_instance, "is_started", False):
+                continue
+            if now >= measurement_start - datetime.timedelta(seconds=warmup):
+                try:
+                    sensor_instance.start()
+                except Exception as e:
+                    logging.error(f"Error starting {sensor_name}: {e}")
+
     def stop_sensors(self):
         """Stop sensors after measurement period"""
         for sensor_name, sensor_instance in self.sensors.items():
@@ -40,39 +257,128 @@ class SensorManager:
                 except Exception as e:
                     logging.error(f"Error stopping {sensor_name}: {e}")
 
-    def collect_single_reading(self):
-        """Collect one reading from all sensors (except rain)"""
-        timestamp = datetime.datetime.now()
+    @staticmethod
+    def _is_failed_reading(data) -> bool:
+        """A reading fails if it is empty or every value in it is None."""
+        if data is None:
+            return True
+        if isinstance(data, dict):
+            return all(value is None for value in data.values())
+        return False
+
+    def collect_single_reading(self) -> dict:
+        """
+        Collect one reading from all sensors (except rain and sensors with an open circuit).
+
+        Returns the (start, end) time.time() of each sensor read.
+        """
+        read_times = {}
 
         for sensor_name, sensor_instance in self.sensors.items():
             if sensor_name == "rain":  # Rain is handled separately
                 continue
+
+            health = self.health[sensor_name]
+            if not health.allow_request():
+                # Keep the packet shape stable while the sensor is skipped
+                for key in self._sensor_keys.get(sensor_name, ()):
+                    self.measurement_buffer[key].append(None)
+                continue
+
+            read_start = time.time()
             try:
-                data = sensor_instance.read_data()
-                if data:
-                    if isinstance(data, dict):
-                        for key, value in data.items():
-                            self.measurement_buffer[key].append(value)
-                    else:
-                        self.measurement_buffer[sensor_name].append(data)
+                with SENSOR_READ_SECONDS.labels(sensor_name).time():
+                    data = sensor_instance.read_data()
             except Exception as e:
                 logging.error(f"Error reading {sensor_name}: {e}")
+                data = None
+            read_times[sensor_name] = (read_start, time.time())
+
+            if data is NOT_READY:
+                continue
+
+            if self._is_failed_reading(data):
+                SENSOR_READ_FAILURES.labels(sensor_name).inc()
+                if health.record_failure():
+                    logging.warning(f"✗ {sensor_name} failed {health.consecutive_failures} times in a row, "
+                                    f"skipping it, next probe in {health.backoff:.0f}s")
+            else:
+                health.record_success()
+
+            if data:
+                if isinstance(data, dict):
+                    self._sensor_keys[sensor_name] = tuple(data)
+                    for key, value in data.items():
+                        self.measurement_buffer[key].append(value)
+                else:
+                    self.measurement_buffer[sensor_name].append(data)
+
+        return read_times
+
+    def _probe_sensor(self, sensor_name, sensor_instance) -> bool:
+        """Try one reading from a sensor with an open circuit, re-running its setup if it never came up."""
+        try:
+            if getattr(sensor_instance, "sensor", True) is None and hasattr(sensor_instance, "setup_sensor"):
+                sensor_instance.setup_sensor()
+            data = sensor_instance.read_data()
+            return data is NOT_READY or not self._is_failed_reading(data)
+        except Exception as e:
+            logging.debug(f"Probe of {sensor_name} failed: {e}")
+            return False
+
+    def _probe_loop(self):
+        """Background thread re-probing sensors with an open circuit on their backoff schedule."""
+        while not self._stop_event.wait(5):
+            self._probe_due()
+
+    def _probe_due(self):
+        """Probe every open circuit whose backoff expired."""
+        for sensor_name, health in list(self.health.items()):
+            sensor_instance = self.sensors.get(sensor_name)  # Gone if replaced by a config reload
+            if sensor_instance is None:
+                continue
+            # A sensor with a warmup (SPS30, sleeping PMS5003) is off between measurement
+            # periods; probing it then fails by construction, so wait until it is started
+            if getattr(sensor_instance, "warmup_seconds", 0) and not getattr(sensor_instance, "is_started", True):
+                continue
+            if not health.begin_probe():
+                continue
+
+            with self._sensor_locks[sensor_name]:
+                if self.sensors.get(sensor_name) is not sensor_instance:
+                    continue  # Replaced by a config reload while waiting for the lock
+                responding = self._probe_sensor(sensor_name, sensor_instance)
+
+            if responding:
+                health.record_success()
+                logging.info(f"✓ {sensor_name} is responding again")
+            else:
+                health.record_failure()
+
+    def get_sensor_states(self) -> dict:
+        """Return the circuit state of every sensor"""
+        return {sensor_name: health.state for sensor_name, health in self.health.items()}
 
     def start_measurement_period(self, start_time: datetime.datetime, end_time: datetime.datetime):
         """Collect readings every READING_TIME seconds until end_time"""
         self.measurement_buffer.clear()  # Clear previous data
-        self.start_sensors()
+        self.start_sensors()  # No-op for sensors already started by prepare_sensors
 
-        # Now start collecting readings
+        # Sensors still warming up return NOT_READY and are skipped until ready
         logging.info("Beginning data collection...")
-        next_reading = datetime.datetime.now()  # Start immediately after warmup
+        next_reading = self.clock()
+        # The schedule recorder works in time.time(); planned times are on self.clock
+        skew = next_reading.timestamp() - time.time()
+        self.schedule.start_window(next_reading.timestamp() - skew, end_time.timestamp() - skew)
 
-        while datetime.datetime.now() < end_time:
-            now = datetime.datetime.now()
+        while self.clock() < end_time:
+            now = self.clock()
 
             if now >= next_reading:
-                self.collect_single_reading()
-                next_reading += datetime.timedelta(seconds=READING_TIME)
+                sample_start = time.time()
+                read_times = self.collect_single_reading()
+                self.schedule.record_sample(next_reading.timestamp() - skew, sample_start, time.time(), read_times)
+                next_reading += datetime.timedelta(seconds=config.READING_TIME)
 
             time.sleep(0.5)  # Prevent busy loop
 
@@ -98,6 +404,12 @@ class SensorManager:
             # For direction (compass), use most common value
             if key == "direction":
                 averages[key] = max(set(valid_values), key=valid_values.count)
+            elif key == "gust":
+                # The gust of the whole period is the strongest gust of any reading
+                averages[key] = max(valid_values)
+            elif key == "speed_std":
+                # Each reading pools the 1 s speeds since the period started; the last covers them all
+                averages[key] = valid_values[-1]
             else:
                 # Numeric average
                 try:
@@ -108,29 +420,36 @@ class SensorManager:
 
         return averages
 
-    def get_rain_data(self) -> float:
-        """Get accumulated rain data"""
+    def get_rain_data(self) -> dict:
+        """Get accumulated rain and peak intensities"""
         if "rain" not in self.sensors:
-            return 0.0
+            return {"rain": 0.0}
         try:
-            rain_value = self.sensors["rain"].read_data()
-            return rain_value if rain_value is not None else 0.0
+            with SENSOR_READ_SECONDS.labels("rain").time():
+                rain_data = self.sensors["rain"].read_data()
+            return rain_data if rain_data is not None else {"rain": 0.0}
         except Exception as e:
             logging.error(f"Error reading rain sensor: {e}")
-            return 0.0
+            return {"rain": 0.0}
 
     def get_averaged_data(self, timestamp: datetime.datetime):
         """Prepare final data packet with averages and rain"""
         data = self.calculate_averages()
-        data["rain"] = self.get_rain_data()
+        data.update(self.get_rain_data())
 
         # Only set direction to None if speed is 0, otherwise keep whatever direction value we have
         if data.get("speed") == 0 or data.get("speed") is None:
             data["direction"] = None
 
+        data["sensor_state"] = self.get_sensor_states()
+        if METRICS["packet_summary"]:
+            data["metrics"] = REGISTRY.summary()
         data["time"] = timestamp.strftime("%Y-%m-%d %H:%M:%S")
         return data
 
     def cleanup(self):
         """Cleanup sensors if needed"""
-        self.stop_sensors()
\ No newline at end of file
+        self._stop_event.set()
+        self.stop_sensors()
+        for port, devices in bus_stats().items():
+            logging.info(f"[SensorManager] I2C bus {port} transactions: {devices}")
\ No newline at end of file
@@ -0,0 +1,131 @@
+import datetime
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from logger_config import logging
+
+API_URL = "https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&hourly=uv_index&timezone=auto"
+
+
+class UVForecastCache:
+    """
+    Hourly UV index forecast from Open-Meteo, cached in memory and on disk.
+
+    Lookups never touch the network: they are served from a dict keyed by
+    hour. When the forecast is older than ``ttl`` seconds a refresh runs in a
+    background thread, so the station keeps reporting UV through outages until
+    the cached forecast runs out.
+    """
+
+    RETRY_INTERVAL = 300  # seconds between refresh attempts after a failure
+
+    def __init__(self, latitude: float, longitude: float, cache_path: str, ttl: float = 3 * 3600):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl
+
+        self._series = {}      # "YYYY-MM-DDTHH:00" -> UV index
+        self._fetched_at = 0.0  # wall clock time of the last successful download
+        self._last_attempt = 0.0
+        self._refreshing = threading.Lock()
+
+        self._load()
+
+    @staticmethod
+    def hour_key(when: datetime.datetime) -> str:
+        return when.strftime("%Y-%m-%dT%H:00")
+
+    def is_stale(self) -> bool:
+        return time.time() - self._fetched_at > self.ttl
+
+    def lookup(self, when: datetime.datetime = None):
+        """
+        Return the forecast UV index for the hour of ``when`` (default: now), or None.
+
+        Starts a background refresh if the forecast is stale.
+        """
+        if self.is_stale() and time.time() - self._last_attempt > self.RETRY_INTERVAL:
+            self.refresh_async()
+
+        uv = self._series.get(self.hour_key(when or datetime.datetime.now()))
+        return None if uv is None else round(uv)
+
+    def refresh_async(self):
+        """Refresh the forecast in a daemon thread unless a refresh is already running."""
+        if not self._refreshing.acquire(blocking=False):
+            return
+        self._last_attempt = time.time()
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="uv-forecast", daemon=True).start()
+
+    def refresh(self) -> bool:
+        """Download and store the forecast. Returns True on success."""
+        import requests
+
+        self._last_attempt = time.time()
+        try:
+            url = API_URL.format(lat=self.latitude, lon=self.longitude)
+            response = requests.get(url, timeout=5)
+            response.raise_for_status()
+
+            data = response.json()
+            series = dict(zip(data["hourly"]["time"], data["hourly"]["uv_index"]))
+        except requests.exceptions.ConnectionError:
+            logging.warning("No internet or DNS failure while fetching UV forecast — using cached forecast.")
+            return False
+        except requests.exceptions.Timeout:
+            logging.warning("Open-Meteo API request timed out — using cached forecast.")
+            return False
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request error while fetching UV forecast from Open-Meteo: {e}")
+            return False
+        except Exception as e:
+            logging.error(f"Unexpected error fetching UV forecast: {e}", exc_info=True)
+            return False
+
+        # Swap in the new series in one assignment so lookups never see a partial update
+        self._series = series
+        self._fetched_at = time.time()
+        self._save()
+        logging.info(f"[UV] Forecast updated ({len(series)} hours)")
+        return True
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                cached = json.load(f)
+            if (cached["latitude"], cached["longitude"]) != (self.latitude, self.longitude):
+                return
+            self._series = cached["series"]
+            self._fetched_at = cached["fetched_at"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"[UV] Ignoring unreadable forecast cache {self.cache_path}: {e}")
+
+    def _save(self):
+        """Write the cache atomically so a crash never leaves a truncated file."""
+        now_key = self.hour_key(datetime.datetime.now())
+        cached = {
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "fetched_at": self._fetched_at,
+            "series": {hour: uv for hour, uv in self._series.items() if hour >= now_key}
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(cached, f)
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logging.error(f"[UV] Failed to save forecast cache: {e}")